@@ -0,0 +1,321 @@
+"""
+Cold Archive - rolls closed days of klines and liquidations out of SQLite into Parquet
+Run: python archive.py [--db btc_data.db] [--after-days 8] [--dry-run] [--status]
+
+Layout: <ARCHIVE_DIR>/<table>/symbol=<SYMBOL>/date=<YYYY-MM-DD>.parquet (zstd).
+Each archived (table, symbol, day) is recorded in archive_log, so readers know
+which days are cold without listing the filesystem. A day is written to a
+temporary file and renamed into place before its rows are deleted from the hot
+database in small transactions, so the collector keeps getting the write lock
+and a crash at any point leaves every row in at least one tier.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import config
+from rollups import TIMEFRAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+DB_PATH = config.DB_PATH
+ARCHIVE_DIR = config.ARCHIVE_DIR
+
+DAY_MS = TIMEFRAMES["1d"]
+# Rows deleted from the hot database per transaction
+DELETE_BATCH_ROWS = 5000
+
+# table -> (archived columns, key columns used to drop duplicates on re-archive)
+TABLES = {
+    "klines": (["timestamp", "open", "high", "low", "close", "volume"], ["timestamp"]),
+    "liquidations": (["id", "side", "price", "quantity", "amount", "timestamp"], ["id"]),
+}
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS archive_log (
+        table_name TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        min_timestamp INTEGER,
+        max_timestamp INTEGER,
+        path TEXT NOT NULL,
+        archived_at REAL NOT NULL,
+        PRIMARY KEY (table_name, symbol, day)
+    ) WITHOUT ROWID
+"""
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise RuntimeError("the Parquet archive needs pyarrow (pip install pyarrow)")
+
+
+def day_path(table, symbol, day_ms):
+    """Archive file for one (table, symbol, UTC day), relative to the archive directory"""
+    date = datetime.fromtimestamp(day_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    return os.path.join(table, f"symbol={symbol}", f"date={date}.parquet")
+
+
+def archived_days(conn, table, symbol, start_ms=None, end_ms=None):
+    """[(day, path), ...] archived for ``symbol`` overlapping [start_ms, end_ms)"""
+    start_ms = start_ms if start_ms is not None else 0
+    end_ms = end_ms if end_ms is not None else 2 ** 62
+    try:
+        return conn.execute("""
+            SELECT day, path FROM archive_log
+            WHERE table_name = ? AND symbol = ? AND day > ? AND day < ?
+            ORDER BY day
+        """, (table, symbol, start_ms - DAY_MS, end_ms)).fetchall()
+    except sqlite3.OperationalError:
+        # Database from before the archive migration
+        return []
+
+
+def archived_symbols(conn, table):
+    """Symbols with archived days of ``table``"""
+    try:
+        return [row[0] for row in conn.execute(
+            "SELECT DISTINCT symbol FROM archive_log WHERE table_name = ? ORDER BY symbol", (table,)
+        )]
+    except sqlite3.OperationalError:
+        return []
+
+
+def archived_until(conn, table, symbol):
+    """End (exclusive, ms) of the newest archived day, or None"""
+    try:
+        row = conn.execute(
+            "SELECT MAX(day) FROM archive_log WHERE table_name = ? AND symbol = ?", (table, symbol)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] + DAY_MS if row and row[0] is not None else None
+
+
+def read_archive(conn, table, symbol, start_ms=None, end_ms=None, archive_dir=ARCHIVE_DIR):
+    """Archived rows of ``table`` for ``symbol`` in [start_ms, end_ms), ordered by timestamp"""
+    columns = TABLES[table][0]
+    days = archived_days(conn, table, symbol, start_ms, end_ms)
+    if not days:
+        return pd.DataFrame(columns=columns)
+    _require_pyarrow()
+
+    filters = []
+    if start_ms is not None:
+        filters.append(("timestamp", ">=", start_ms))
+    if end_ms is not None:
+        filters.append(("timestamp", "<", end_ms))
+    tables = []
+    for _, path in days:
+        full_path = os.path.join(archive_dir, path)
+        if os.path.exists(full_path):
+            tables.append(pq.read_table(full_path, columns=columns, filters=filters or None))
+        else:
+            print(f"⚠️ Archive file missing: {full_path}")
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    frame = pa.concat_tables(tables).to_pandas()
+    return frame.sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+def liquidation_side_totals(conn, archive_dir=ARCHIVE_DIR):
+    """{side: (count, notional)} over every archived liquidation day.
+
+    Files are aggregated one at a time with pyarrow and only the side and amount
+    columns are read, so memory stays at one day however long the history is.
+    """
+    totals = {}
+    try:
+        paths = [row[0] for row in conn.execute(
+            "SELECT path FROM archive_log WHERE table_name = 'liquidations' ORDER BY symbol, day"
+        )]
+    except sqlite3.OperationalError:
+        return totals
+    if paths:
+        _require_pyarrow()
+    for path in paths:
+        full_path = os.path.join(archive_dir, path)
+        if not os.path.exists(full_path):
+            print(f"⚠️ Archive file missing: {full_path}")
+            continue
+        day = pq.read_table(full_path, columns=["side", "amount"])
+        grouped = day.group_by("side").aggregate([("amount", "count"), ("amount", "sum")])
+        for side, count, amount in zip(*(grouped.column(name).to_pylist()
+                                         for name in ("side", "amount_count", "amount_sum"))):
+            previous_count, previous_amount = totals.get(side, (0, 0.0))
+            totals[side] = (previous_count + count, previous_amount + (amount or 0.0))
+    return totals
+
+
+def archive_totals(conn):
+    """{table: (rows, oldest timestamp, newest timestamp)} across every archived day"""
+    try:
+        rows = conn.execute("""
+            SELECT table_name, SUM(rows), MIN(min_timestamp), MAX(max_timestamp)
+            FROM archive_log GROUP BY table_name
+        """).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    return {table: (count, oldest, newest) for table, count, oldest, newest in rows}
+
+
+def _closed_days(conn, table, cutoff_ms):
+    """[(symbol, day), ...] with hot rows that ended before ``cutoff_ms``"""
+    rows = conn.execute(f"""
+        SELECT DISTINCT symbol, timestamp / {DAY_MS} * {DAY_MS} AS day FROM {table}
+        WHERE timestamp < ?
+        ORDER BY symbol, day
+    """, (cutoff_ms,)).fetchall()
+    return [(symbol, day) for symbol, day in rows if day + DAY_MS <= cutoff_ms]
+
+
+def archive_day(conn, table, symbol, day, archive_dir=ARCHIVE_DIR, pause_seconds=0.0):
+    """Copy one day to Parquet, log it and delete it from the hot table; returns rows moved"""
+    _require_pyarrow()
+    columns, key = TABLES[table]
+    hot = pd.read_sql_query(f"""
+        SELECT {', '.join(columns)} FROM {table}
+        WHERE symbol = ? AND timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    """, conn, params=(symbol, day, day + DAY_MS))
+    if hot.empty:
+        return 0
+
+    path = day_path(table, symbol, day)
+    full_path = os.path.join(archive_dir, path)
+    frame = hot
+    if os.path.exists(full_path):
+        # Rows for an archived day showed up again (late write, interrupted run)
+        existing = pq.read_table(full_path).to_pandas()
+        frame = pd.concat([existing, hot], ignore_index=True).drop_duplicates(key, keep="last")
+        frame = frame.sort_values("timestamp", kind="stable", ignore_index=True)
+
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    temp_path = f"{full_path}.tmp"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), temp_path, compression="zstd")
+    os.replace(temp_path, full_path)
+
+    conn.execute("""
+        INSERT OR REPLACE INTO archive_log
+            (table_name, symbol, day, rows, min_timestamp, max_timestamp, path, archived_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (table, symbol, day, len(frame), int(frame["timestamp"].min()),
+          int(frame["timestamp"].max()), path, time.time()))
+    conn.commit()
+
+    # Only rows that were read above are deleted; anything written meanwhile
+    # stays hot and is picked up by the next run
+    if table == "liquidations":
+        bound_sql, bound = "id <= ?", int(hot["id"].max())
+        select_key = "id"
+    else:
+        bound_sql, bound = "timestamp <= ?", int(hot["timestamp"].max())
+        select_key = "timestamp"
+    deleted = 0
+    while True:
+        # total_changes also counts rows removed by the compact schema's INSTEAD OF
+        # triggers, where cursor.rowcount stays 0
+        changes = conn.total_changes
+        conn.execute(f"""
+            DELETE FROM {table} WHERE symbol = ? AND {select_key} IN (
+                SELECT {select_key} FROM {table}
+                WHERE symbol = ? AND timestamp >= ? AND timestamp < ? AND {bound_sql}
+                LIMIT ?
+            )
+        """, (symbol, symbol, day, day + DAY_MS, bound, DELETE_BATCH_ROWS))
+        conn.commit()
+        batch = conn.total_changes - changes
+        deleted += batch
+        if batch < DELETE_BATCH_ROWS:
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return deleted
+
+
+def archive_closed_days(db_path=DB_PATH, after_days=config.ARCHIVE_AFTER_DAYS, archive_dir=ARCHIVE_DIR,
+                        now_ms=None, pause_seconds=0.05, dry_run=False, verbose=True):
+    """Archive every UTC day that ended more than ``after_days`` days ago.
+
+    Returns {table: rows moved} (rows that would move with ``dry_run``).
+    """
+    from storage import connect_writer
+
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    cutoff_ms = (now_ms // DAY_MS - after_days) * DAY_MS
+    conn = connect_writer(db_path)
+    moved = {}
+    try:
+        conn.execute(CREATE_TABLE)
+        conn.commit()
+        for table in TABLES:
+            moved[table] = 0
+            for symbol, day in _closed_days(conn, table, cutoff_ms):
+                start = time.perf_counter()
+                if dry_run:
+                    rows = conn.execute(
+                        f"SELECT COUNT(*) FROM {table} WHERE symbol = ? AND timestamp >= ? AND timestamp < ?",
+                        (symbol, day, day + DAY_MS)
+                    ).fetchone()[0]
+                else:
+                    rows = archive_day(conn, table, symbol, day, archive_dir, pause_seconds)
+                moved[table] += rows
+                if verbose:
+                    action = "would archive" if dry_run else "archived"
+                    print(f"🧊 {table} {symbol} {day_path(table, symbol, day)}: {action} {rows:,} rows "
+                          f"in {time.perf_counter() - start:.2f} s")
+    finally:
+        conn.close()
+    return moved
+
+
+def print_status(db_path=DB_PATH, archive_dir=ARCHIVE_DIR):
+    conn = sqlite3.connect(db_path)
+    try:
+        totals = archive_totals(conn)
+    finally:
+        conn.close()
+    if not totals:
+        print("🧊 Archive is empty")
+        return
+    size = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(archive_dir) for name in names if name.endswith(".parquet")
+    )
+    print(f"🧊 Archive at {archive_dir} ({size / 1024 / 1024:.1f} MB)")
+    for table, (rows, oldest, newest) in sorted(totals.items()):
+        first = datetime.fromtimestamp(oldest / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        last = datetime.fromtimestamp(newest / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+        print(f"  {table}: {rows:,} rows, {first} -> {last}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move closed days of klines and liquidations to Parquet")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--after-days", type=int, default=config.ARCHIVE_AFTER_DAYS,
+                        help="keep this many closed days in SQLite")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move")
+    parser.add_argument("--status", action="store_true", help="show what is archived")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.db, args.archive_dir)
+        return
+    moved = archive_closed_days(args.db, args.after_days, args.archive_dir, dry_run=args.dry_run)
+    print(f"✅ {'Would move' if args.dry_run else 'Moved'} "
+          + ", ".join(f"{rows:,} {table}" for table, rows in moved.items()))
+
+
+if __name__ == "__main__":
+    main()
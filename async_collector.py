@@ -0,0 +1,131 @@
+"""
+Async Collector Engine - single event loop alternative to the thread-per-socket collector
+Run: python data_collector.py --engine asyncio [--symbols BTCUSDT,ETHUSDT]
+
+Pipeline: receive tasks (one per combined-stream shard) -> bounded asyncio.Queue
+-> persist task (decode + route) -> BatchWriter thread. When the writer falls
+behind, the persist task pauses, the queue fills and the receive tasks stop
+reading, so pressure propagates back to the socket instead of growing memory.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from websockets.asyncio.client import connect
+
+import metrics
+import streams
+
+# Raw frames buffered between the receive and persist stages
+RECEIVE_QUEUE_SIZE = 10_000
+# Pause decoding while the writer has this many rows waiting
+WRITER_HIGH_WATER = 20_000
+RECONNECT_DELAY = 5
+
+
+class AsyncCollector:
+    """Runs every combined-stream shard, the persist stage and backfills on one loop.
+
+    The collector's own functions are injected (``handlers``, ``decoder``, ``writer``,
+    ``backfill``, ``set_status``) so this module never imports data_collector,
+    which usually runs as ``__main__``.
+    """
+
+    def __init__(self, symbols, handlers, decoder, writer, backfill, set_status,
+                 max_streams=streams.MAX_STREAMS_PER_CONNECTION, all_liquidations=False):
+        self.symbols = symbols
+        self.handlers = handlers
+        self.decoder = decoder
+        self.writer = writer
+        self.backfill = backfill
+        self.set_status = set_status
+        self.shards = streams.shard_streams(
+            streams.stream_names(symbols, all_liquidations=all_liquidations), max_streams
+        )
+        self.queue = None
+        # The loop holds tasks only weakly; running backfills stay referenced here until done
+        self._backfills = set()
+        self.received = 0
+        self.persisted = 0
+
+    async def run(self):
+        self.queue = asyncio.Queue(maxsize=RECEIVE_QUEUE_SIZE)
+        tasks = [asyncio.create_task(self.persist(), name="persist"),
+                 asyncio.create_task(self.report(), name="report")]
+        tasks.extend(
+            asyncio.create_task(self.receive(shard, index), name=f"receive-{index}")
+            for index, shard in enumerate(self.shards)
+        )
+        print(f"\n✅ Async collector running: {sum(len(s) for s in self.shards)} streams "
+              f"over {len(self.shards)} connection(s)")
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def receive(self, names, shard_index):
+        """Read one shard's socket forever, reconnecting after failures"""
+        kline_symbols = sorted(name.split("@")[0].upper() for name in names
+                               if streams.stream_kind(name) == "kline")
+        url = streams.combined_url(names)
+        while True:
+            try:
+                async with connect(url, ping_interval=20, ping_timeout=10, max_size=None) as ws:
+                    print(f"✅ Shard {shard_index} connected ({len(names)} streams) "
+                          f"at {datetime.now().strftime('%H:%M:%S')}")
+                    if kline_symbols:
+                        await asyncio.to_thread(self.set_status, True)
+                        task = asyncio.create_task(self.run_backfill(kline_symbols))
+                        self._backfills.add(task)
+                        task.add_done_callback(self._backfills.discard)
+                    async for message in ws:
+                        self.received += 1
+                        metrics.record_message(streams.stream_name(message) or "combined")
+                        # Blocks here when the persist stage is behind
+                        await self.queue.put(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Shard {shard_index} WebSocket closed: {e}")
+            metrics.RECONNECTS.inc(connection=f"shard-{shard_index}")
+            if kline_symbols:
+                await asyncio.to_thread(self.set_status, False)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def persist(self):
+        """Decode frames and hand rows to the writer thread"""
+        while True:
+            message = await self.queue.get()
+            try:
+                streams.demultiplex(message, self.handlers, self.decoder)
+                self.persisted += 1
+            except Exception as e:
+                metrics.DECODE_ERRORS.inc(stream=streams.stream_name(message) or "combined")
+                print(f"Error processing combined stream message: {e}")
+            finally:
+                self.queue.task_done()
+
+            # Backpressure from the DB: wait for the writer to drain
+            while self.writer.queue_depth() > WRITER_HIGH_WATER:
+                await asyncio.sleep(0.05)
+
+    async def run_backfill(self, symbols):
+        """REST gap backfill; runs on a worker thread with its own fetch pool"""
+        try:
+            await asyncio.to_thread(self.backfill, symbols)
+        except Exception as e:
+            print(f"❌ Kline backfill failed: {e}")
+
+    async def report(self, interval=60):
+        last = time.monotonic()
+        last_received = 0
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            rate = (self.received - last_received) / (now - last)
+            last, last_received = now, self.received
+            print(f"📈 Async status: {rate:,.1f} msg/s, receive queue {self.queue.qsize()}, "
+                  f"writer queue {self.writer.queue_depth()}, "
+                  f"last batch {self.writer.last_batch_size} rows in {self.writer.last_flush_ms:.1f} ms")
@@ -0,0 +1,160 @@
+"""
+Kline Backfill - finds missing 1m candles and refetches them in parallel
+Run: python backfill.py [--symbol BTCUSDT] [--hours 168] [--workers 4]
+"""
+
+import argparse
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import archive
+import rest_client
+import retention
+from config import BINANCE_REST_URL, DB_PATH, RETENTION
+
+INTERVAL_MS = 60_000
+# Largest page /fapi/v1/klines returns
+MAX_LIMIT = 1500
+
+
+def last_closed_open_time(now_ms=None):
+    """Open time of the most recent fully closed 1m candle"""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return (now_ms // INTERVAL_MS) * INTERVAL_MS - INTERVAL_MS
+
+
+def find_gaps(conn, symbol, start_ms, end_ms):
+    """Return [(first_missing, last_missing), ...] open times within [start_ms, end_ms]
+
+    Only closed candles count as present: a forming candle left behind by a
+    disconnect keeps its partial OHLC until it is refetched.
+    """
+    start_ms = (start_ms // INTERVAL_MS) * INTERVAL_MS
+    rows = conn.execute("""
+        SELECT prev, timestamp FROM (
+            SELECT timestamp, LAG(timestamp) OVER (ORDER BY timestamp) AS prev
+            FROM klines
+            WHERE symbol = ? AND timestamp BETWEEN ? AND ? AND is_closed = 1
+        )
+        WHERE prev IS NOT NULL AND timestamp - prev > ?
+    """, (symbol, start_ms, end_ms, INTERVAL_MS)).fetchall()
+    first, last = conn.execute("""
+        SELECT MIN(timestamp), MAX(timestamp) FROM klines
+        WHERE symbol = ? AND timestamp BETWEEN ? AND ? AND is_closed = 1
+    """, (symbol, start_ms, end_ms)).fetchone()
+
+    if first is None:
+        return [(start_ms, end_ms)] if start_ms <= end_ms else []
+
+    gaps = []
+    if first > start_ms:
+        gaps.append((start_ms, first - INTERVAL_MS))
+    gaps.extend((prev + INTERVAL_MS, ts - INTERVAL_MS) for prev, ts in rows)
+    if last < end_ms:
+        gaps.append((last + INTERVAL_MS, end_ms))
+    return gaps
+
+
+def split_pages(gaps, limit=MAX_LIMIT):
+    """Split gap ranges into (startTime, endTime) pages of at most ``limit`` candles"""
+    pages = []
+    for first, last in gaps:
+        start = first
+        while start <= last:
+            end = min(start + (limit - 1) * INTERVAL_MS, last)
+            pages.append((start, end))
+            start = end + INTERVAL_MS
+    return pages
+
+
+def fetch_page(client, symbol, start_ms, end_ms):
+    """Fetch one page of 1m klines (the client handles rate limits and retries)"""
+    limit = (end_ms - start_ms) // INTERVAL_MS + 1
+    return client.klines(symbol, "1m", limit, start_ms, end_ms)
+
+
+def retention_policy(spec=RETENTION):
+    """The configured retention policy; an invalid one is ignored, as the collector does"""
+    try:
+        return retention.parse_policy(spec)
+    except ValueError:
+        return {}
+
+
+def backfill_klines(writer, symbol="BTCUSDT", lookback_hours=168, workers=4,
+                    db_path=DB_PATH, base_url=BINANCE_REST_URL, now_ms=None, policy=None):
+    """Detect missing candles in the lookback window and refetch them concurrently.
+
+    Rows are handed to ``writer`` (a BatchWriter), which persists them in
+    batched transactions. Returns the number of candles written. ``policy``
+    (default: RETENTION) bounds the window: expired candles are not gaps.
+    """
+    end_ms = last_closed_open_time(now_ms)
+    start_ms = end_ms - lookback_hours * 3600 * 1000
+    cutoff_ms = retention.cutoff_for(retention_policy() if policy is None else policy, "klines", symbol, now_ms)
+    if cutoff_ms is not None:
+        # First candle retention keeps (anything older would be deleted again)
+        start_ms = max(start_ms, -(-cutoff_ms // INTERVAL_MS) * INTERVAL_MS)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # Archived days left SQLite on purpose; they are not gaps
+        start_ms = max(start_ms, archive.archived_until(conn, "klines", symbol) or 0)
+        gaps = find_gaps(conn, symbol, start_ms, end_ms)
+    finally:
+        conn.close()
+
+    pages = split_pages(gaps)
+    if not pages:
+        print(f"✅ No kline gaps for {symbol} in the last {lookback_hours}h")
+        return 0
+
+    missing = sum((last - first) // INTERVAL_MS + 1 for first, last in gaps)
+    print(f"🔎 {symbol}: {missing:,} missing candles in {len(gaps)} gap(s), fetching {len(pages)} page(s)...")
+
+    client = rest_client.get_client(base_url)
+    saved = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_page, client, symbol, first, last): (first, last)
+            for first, last in pages
+        }
+        for future in as_completed(futures):
+            try:
+                candles = future.result()
+            except Exception as e:
+                first, last = futures[future]
+                print(f"❌ Backfill page {first}-{last} failed: {e}")
+                continue
+            for candle in candles:
+                writer.put_kline(candle[0], symbol, float(candle[1]), float(candle[2]),
+                                 float(candle[3]), float(candle[4]), float(candle[5]))
+            saved += len(candles)
+
+    writer.flush()
+    print(f"✅ Backfilled {saved:,} candles for {symbol} in {time.perf_counter() - start:.1f} s")
+    return saved
+
+
+def main():
+    from db_writer import BatchWriter
+
+    parser = argparse.ArgumentParser(description="Fill gaps in the klines table from Binance REST")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--hours", type=int, default=168, help="lookback window to scan for gaps")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--base-url", default=BINANCE_REST_URL)
+    args = parser.parse_args()
+
+    writer = BatchWriter(args.db).start()
+    try:
+        backfill_klines(writer, args.symbol, args.hours, args.workers, args.db, args.base_url)
+    finally:
+        writer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Chart Benchmark - create_candlestick_chart vs the previous row-by-row builder
+Run: python benchmarks/bench_chart.py [--points 1000 10000 100000] [--json out.json]
+
+The legacy builder below is the pre-vectorization implementation, kept only
+as a reference point for the speedup.
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+
+from common import best_of, chart_frames, write_results
+
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+with contextlib.redirect_stderr(io.StringIO()):
+    import main
+
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+CANDLES = 1440
+
+
+def legacy_chart(df, liquidations_df):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.02, row_heights=[0.7, 0.3])
+    fig.add_trace(go.Candlestick(x=df['Date'], open=df['Open'], high=df['High'],
+                                 low=df['Low'], close=df['Close']), row=1, col=1)
+    liq_df = liquidations_df[(liquidations_df['time'] >= df['Date'].min()) &
+                             (liquidations_df['time'] <= df['Date'].max())]
+    for side in ('SELL', 'BUY'):
+        side_df = liq_df[liq_df['side'] == side]
+        if not side_df.empty:
+            fig.add_trace(go.Scatter(
+                x=side_df['time'], y=side_df['price'], mode='markers',
+                marker=dict(size=side_df['amount'].apply(lambda x: min(max(x/1000, 5), 30))),
+                customdata=side_df['amount']), row=1, col=1)
+    colors = ['#00D4AA' if df.iloc[i]['Close'] >= df.iloc[i]['Open']
+              else '#FF6B6B' for i in range(len(df))]
+    fig.add_trace(go.Bar(x=df['Date'], y=df['Volume'], marker_color=colors), row=2, col=1)
+    return fig
+
+
+def run(points=(1_000, 10_000, 100_000), repeat=3):
+    results = []
+    for n in points:
+        df, liq = chart_frames(CANDLES, n)
+        legacy_ms = best_of(lambda: legacy_chart(df, liq), repeat)
+        vectorized_ms = best_of(lambda: main.create_candlestick_chart(df, liq), repeat)
+        results.append({
+            "candles": CANDLES,
+            "liquidations": n,
+            "webgl": n > main.WEBGL_POINT_THRESHOLD,
+            "legacy_ms": legacy_ms,
+            "vectorized_ms": vectorized_ms,
+            "speedup": legacy_ms / vectorized_ms,
+        })
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Measure candlestick chart build time")
+    parser.add_argument("--points", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = run(args.points)
+    print(f"create_candlestick_chart ({CANDLES:,} candles):")
+    for r in results:
+        print(f"  {r['liquidations']:>8,} liquidations: legacy {r['legacy_ms']:8.1f} ms  "
+              f"vectorized {r['vectorized_ms']:7.1f} ms  {r['speedup']:5.1f}x"
+              f"{'  (Scattergl)' if r['webgl'] else ''}")
+    if args.json:
+        write_results({"chart": results}, args.json)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,114 @@
+"""
+Dashboard Benchmark - liquidation loading vs table size, chart build vs point count
+Run: python benchmarks/bench_dashboard.py [--rows 10000 100000 1000000] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+
+from common import best_of, chart_frames, fill_database, write_results
+
+import live_ring
+
+# Importing main runs its page setup in Streamlit "bare" mode; silence the warnings
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+with contextlib.redirect_stderr(io.StringIO()):
+    import main
+
+DASHBOARD_HOURS = 100 / 60
+
+CHART_SIZES = [(100, 100), (1440, 1_000), (1440, 10_000), (10_000, 100_000)]
+
+
+def bench_liquidation_query(rows, repeat=5):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dashboard.db")
+        fill_database(path, liquidations=rows, klines=100)
+        main.DB_PATH = path
+        main.get_read_pool.clear()
+
+        def reset_hub():
+            main.get_data_hub().stop()
+            main.get_data_hub.clear()
+
+        def cold():
+            # A fresh hub loads the full window on its first refresh
+            main.get_data_hub.clear()
+            return main.get_liquidations_from_db(hours=DASHBOARD_HOURS)
+
+        def session_rerun():
+            return main.get_liquidations_from_db(hours=DASHBOARD_HOURS)
+
+        cold_ms = best_of(lambda: (cold(), reset_hub()), repeat)
+        window_rows = len(cold())
+        hub_refresh_ms = best_of(main.get_data_hub().refresh, repeat)
+        rerun_ms = best_of(session_rerun, repeat)
+        klines_ms = best_of(lambda: main.get_klines_from_db(limit=100), repeat)
+        reset_hub()
+
+        # The same window from the collector's memory-mapped ring instead of SQL
+        with sqlite3.connect(path) as conn:
+            live_ring.RingSet(path, ["BTCUSDT"]).seed(conn).close()
+        ring = live_ring.RingReader(live_ring.ring_path(path, "BTCUSDT"), "BTCUSDT")
+        ring_ms = best_of(lambda: ring.read(100, int(DASHBOARD_HOURS * 3_600_000)), repeat)
+        main.get_read_pool().close_all()
+        main.get_read_pool.clear()
+
+    return {
+        "table_rows": rows,
+        "window_rows": window_rows,
+        "liquidations_cold_ms": cold_ms,
+        "hub_refresh_ms": hub_refresh_ms,
+        "session_rerun_ms": rerun_ms,
+        "klines_ms": klines_ms,
+        "ring_read_ms": ring_ms,
+    }
+
+
+def bench_chart(candles, liquidations, repeat=3):
+    df, liq = chart_frames(candles, liquidations)
+    return {
+        "candles": candles,
+        "liquidations": liquidations,
+        "build_ms": best_of(lambda: main.create_candlestick_chart(df, liq), repeat),
+    }
+
+
+def run(rows=(10_000, 100_000, 1_000_000), chart_sizes=CHART_SIZES):
+    return {
+        "liquidation_query": [bench_liquidation_query(n) for n in rows],
+        "chart": [bench_chart(c, l) for c, l in chart_sizes],
+    }
+
+
+def print_results(results):
+    print("get_liquidations_from_db / get_klines_from_db:")
+    for r in results["liquidation_query"]:
+        print(f"  {r['table_rows']:>10,} rows ({r['window_rows']:,} in window): "
+              f"cold {r['liquidations_cold_ms']:8.2f} ms  hub refresh {r['hub_refresh_ms']:6.2f} ms  "
+              f"session rerun {r['session_rerun_ms']:6.3f} ms  klines {r['klines_ms']:6.3f} ms  "
+              f"ring {r.get('ring_read_ms', float('nan')):6.3f} ms")
+    print("create_candlestick_chart:")
+    for r in results["chart"]:
+        print(f"  {r['candles']:>7,} candles / {r['liquidations']:>7,} liquidations: {r['build_ms']:9.1f} ms")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Measure dashboard data loading and chart building")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = run(args.rows)
+    print_results(results)
+    if args.json:
+        write_results({"dashboard": results}, args.json)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,77 @@
+"""
+Decoder Benchmark - messages/second per decoder backend on recorded frames
+Run: python benchmarks/bench_decoders.py [--file benchmarks/payloads/binance_frames.jsonl]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from common import write_results
+
+import decoders
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "payloads", "binance_frames.jsonl")
+
+
+def load_frames(path):
+    """{kind: [raw frame, ...]} from a JSONL file of {"kind": ..., "frame": ...}"""
+    frames = {}
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            frames.setdefault(record["kind"], []).append(record["frame"])
+    return frames
+
+
+def bench(decode, frames, seconds):
+    """Decode frames round-robin for ``seconds``; returns messages/second"""
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for frame in frames:
+            decode(frame)
+        count += len(frames)
+    return count / (time.perf_counter() - start)
+
+
+METHODS = {"kline": "decode_kline", "liquidation": "decode_liquidation", "combined": "decode_combined"}
+
+
+def run(path=DEFAULT_FILE, seconds=1.0):
+    """{kind: {decoder: msg/s}} for every installed decoder"""
+    frames = load_frames(path)
+    available = decoders.available_decoders()
+    return {
+        kind: {name: bench(getattr(decoder, method), frames[kind], seconds)
+               for name, decoder in available.items()}
+        for kind, method in METHODS.items() if kind in frames
+    }
+
+
+def print_results(results):
+    for kind, rates in results.items():
+        print(f"\n{kind}:")
+        for name, rate in rates.items():
+            speedup = f"{rate / rates['json']:6.2f}x vs json" if "json" in rates else ""
+            print(f"  {name:8s} {rate:12,.0f} msg/s  {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare decoder throughput")
+    parser.add_argument("--file", default=DEFAULT_FILE)
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per decoder per message kind")
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    print(f"📦 Decoders: {', '.join(decoders.available_decoders())}")
+    results = run(args.file, args.seconds)
+    print_results(results)
+    if args.json:
+        write_results({"decoders": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Ingest Benchmark - liquidation frames through on_liq_message -> BatchWriter -> SQLite
+Run: python benchmarks/bench_ingest.py [--messages 50000] [--rate 2000] [--json out.json]
+
+Throughput feeds frames as fast as possible; the latency run paces them at
+--rate msg/s so percentiles reflect enqueue-to-commit time rather than backlog.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+from common import liquidation_frame, percentiles, write_results
+
+import data_collector
+from db_writer import BatchWriter
+
+
+def run(messages=50_000, rate=None, max_batch_rows=500, max_latency=0.25):
+    latencies = []
+    batch_sizes = []
+    flush_ms = []
+
+    def on_flush(size, seconds, queued_at):
+        committed = time.monotonic()
+        batch_sizes.append(size)
+        flush_ms.append(seconds * 1000)
+        latencies.extend((committed - t) * 1000 for t in queued_at)
+
+    rng = random.Random(1)
+    frames = [liquidation_frame(i, rng=rng) for i in range(messages)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_collector.DB_PATH = os.path.join(tmp, "ingest.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_collector.init_database()
+
+        writer = BatchWriter(data_collector.DB_PATH, max_batch_rows, max_latency,
+                             verbose=False, on_flush=on_flush).start()
+        data_collector._writer = writer
+        try:
+            # The collector prints every event; keep that cost but not the terminal
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for i, frame in enumerate(frames):
+                    if rate:
+                        delay = start + i / rate - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    data_collector.on_liq_message(None, frame)
+                enqueued = time.perf_counter() - start
+                writer.flush()
+                elapsed = time.perf_counter() - start
+        finally:
+            writer.stop()
+            data_collector._writer = None
+
+    return {
+        "messages": messages,
+        "paced_rate": rate,
+        "decoder": data_collector.DECODER.name,
+        "enqueue_per_sec": messages / enqueued,
+        "messages_per_sec": messages / elapsed,
+        "latency_ms": percentiles(latencies),
+        "batches": len(batch_sizes),
+        "batch_rows": percentiles(batch_sizes),
+        "flush_ms": percentiles(flush_ms),
+    }
+
+
+def print_result(name, result):
+    latency = result["latency_ms"]
+    print(f"{name}: {result['messages']:,} msgs, {result['messages_per_sec']:,.0f} msg/s committed "
+          f"({result['enqueue_per_sec']:,.0f} msg/s enqueued, decoder={result['decoder']})")
+    print(f"  enqueue->commit latency ms: p50 {latency['p50']:.1f}  p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    print(f"  {result['batches']} batches, median {result['batch_rows']['p50']:.0f} rows, "
+          f"flush p99 {result['flush_ms']['p99']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure collector ingest throughput and latency")
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--rate", type=float, default=2000, help="paced msg/s for the latency run")
+    parser.add_argument("--json", help="write results as JSON to this path ('-' for stdout)")
+    args = parser.parse_args()
+
+    results = {
+        "throughput": run(args.messages),
+        "latency": run(min(args.messages, int(args.rate * 5)), rate=args.rate),
+    }
+    for name, result in results.items():
+        print_result(name, result)
+    if args.json:
+        write_results({"ingest": results}, args.json)
+
+
+if __name__ == "__main__":
+    main()
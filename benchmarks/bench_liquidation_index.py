@@ -0,0 +1,125 @@
+"""
+Liquidation Index Benchmark - query times before/after the covering indexes
+Run: python benchmarks/bench_liquidation_index.py --rows 1000000 10000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT"]
+START_TS = 1_700_000_000_000
+# Average spacing between generated liquidations (ms)
+SPACING_MS = 250
+
+QUERIES = {
+    "dashboard_window": ("""
+        SELECT symbol, side, price, quantity, amount, timestamp
+        FROM liquidations
+        WHERE timestamp >= ? AND symbol = 'BTCUSDT'
+        ORDER BY timestamp ASC
+    """, "window"),
+    "max_timestamp": ("SELECT MAX(timestamp) FROM liquidations", None),
+    "group_by_side": ("SELECT side, COUNT(*), SUM(amount) FROM liquidations GROUP BY side", None),
+}
+
+
+def build_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+    # Same table definition as the collector, without the new indexes
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE liquidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            amount REAL NOT NULL,
+            timestamp INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(symbol, timestamp, side, amount)
+        )
+    """)
+
+    rng = random.Random(42)
+
+    def generate():
+        for i in range(rows):
+            price = 30000 + rng.random() * 40000
+            quantity = rng.random() * 2
+            yield (rng.choice(SYMBOLS), rng.choice(("BUY", "SELL")), price, quantity,
+                   price * quantity, START_TS + i * SPACING_MS)
+
+    cursor.executemany("""
+        INSERT INTO liquidations (symbol, side, price, quantity, amount, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, generate())
+    conn.commit()
+    return conn
+
+
+def time_query(conn, sql, params, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run_queries(conn, rows, repeat):
+    # Dashboard shows ~100 minutes of history
+    window_start = START_TS + rows * SPACING_MS - 100 * 60 * 1000
+    results = {}
+    for name, (sql, param) in QUERIES.items():
+        params = (window_start,) if param == "window" else ()
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        results[name] = (time_query(conn, sql, params, repeat), " | ".join(row[-1] for row in plan))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            print("=" * 60)
+            print(f"📦 Building {rows:,} liquidations...")
+            conn = build_database(path, rows)
+
+            before = run_queries(conn, rows, args.repeat)
+
+            start = time.perf_counter()
+            migrations.add_liquidation_indexes(migrations.MigrationContext(conn, verbose=False))
+            conn.commit()
+            print(f"🛠️ Index migration took {time.perf_counter() - start:.1f} s")
+
+            after = run_queries(conn, rows, args.repeat)
+            conn.close()
+
+            for name in QUERIES:
+                before_ms, before_plan = before[name]
+                after_ms, after_plan = after[name]
+                print(f"  {name:18s} {before_ms:10.2f} ms -> {after_ms:10.2f} ms "
+                      f"({before_ms / max(after_ms, 1e-6):.1f}x)")
+                print(f"    before: {before_plan}")
+                print(f"    after:  {after_plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Shared helpers for the benchmark scripts: synthetic data, timing, JSON results
+"""
+
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+START_TS = 1_700_000_000_000
+
+
+def percentiles(values, points=(50, 90, 99, 99.9)):
+    """{'p50': ..., ...} of a list of numbers (empty dict for no values)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        result[f"p{p:g}"] = ordered[index]
+    result["mean"] = statistics.fmean(ordered)
+    result["max"] = ordered[-1]
+    return result
+
+
+def best_of(func, repeat=5):
+    """Fastest wall time of ``func()`` in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def liquidation_frame(i, symbol="BTCUSDT", rng=random):
+    """Raw forceOrder frame as the single-stream socket delivers it"""
+    price = 60000 + rng.random() * 1000
+    return json.dumps({"e": "forceOrder", "E": START_TS + i, "o": {
+        "s": symbol, "S": rng.choice(("BUY", "SELL")), "o": "LIMIT", "f": "IOC",
+        "q": f"{rng.random() * 2:.3f}", "p": f"{price:.2f}", "ap": f"{price:.2f}",
+        "X": "FILLED", "l": "0.001", "z": "0.001", "T": START_TS + i,
+    }}, separators=(",", ":"))
+
+
+def fill_database(path, liquidations, klines=0, now_ms=None, spacing_ms=250, seed=42):
+    """Create a migrated DB with synthetic BTCUSDT liquidations/klines ending at ``now_ms``"""
+    import heatmap
+    import migrations
+    import rollups
+    from storage import connect_writer
+
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    conn = connect_writer(path)
+    migrations.migrate(conn, verbose=False)
+    rng = random.Random(seed)
+
+    first_ts = now_ms - liquidations * spacing_ms
+
+    def liquidation_rows():
+        for i in range(liquidations):
+            price = 60000 + rng.random() * 1000
+            quantity = rng.random() * 2
+            yield ("BTCUSDT", rng.choice(("BUY", "SELL")), price, quantity, price * quantity,
+                   first_ts + i * spacing_ms)
+
+    conn.executemany("""
+        INSERT OR IGNORE INTO liquidations (symbol, side, price, quantity, amount, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, liquidation_rows())
+
+    last_open = (now_ms // 60000) * 60000
+
+    def kline_rows():
+        price = 60000.0
+        for i in range(klines):
+            open_price = price
+            price *= 1 + rng.uniform(-0.001, 0.001)
+            yield (last_open - (klines - 1 - i) * 60000, "BTCUSDT", open_price,
+                   max(open_price, price) * 1.0005, min(open_price, price) * 0.9995, price,
+                   rng.uniform(50, 900), 1)
+
+    conn.executemany("""
+        INSERT OR REPLACE INTO klines (timestamp, symbol, open, high, low, close, volume, is_closed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, kline_rows())
+    conn.commit()
+    rollups.rebuild(conn, verbose=False)
+    heatmap.rebuild(conn, verbose=False)
+    conn.close()
+
+
+def chart_frames(candles, liquidations, seed=7):
+    """(candle df, liquidation df) shaped like main.py's loaders produce"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-01")
+    close = 60000 * np.cumprod(1 + rng.normal(0, 0.001, candles))
+    open_ = np.concatenate(([60000.0], close[:-1]))
+    df = pd.DataFrame({
+        "Date": start + pd.to_timedelta(np.arange(candles), unit="min"),
+        "Open": open_,
+        "High": np.maximum(open_, close) * 1.0005,
+        "Low": np.minimum(open_, close) * 0.9995,
+        "Close": close,
+        "Volume": rng.uniform(50, 900, candles),
+    })
+    offsets = np.sort(rng.uniform(0, candles * 60, liquidations))
+    price = 60000 * (1 + rng.normal(0, 0.01, liquidations))
+    quantity = rng.exponential(0.3, liquidations)
+    liq = pd.DataFrame({
+        "symbol": "BTCUSDT",
+        "side": rng.choice(["BUY", "SELL"], liquidations),
+        "price": price,
+        "quantity": quantity,
+        "amount": price * quantity,
+        "timestamp": (start.value // 1_000_000 + offsets * 1000).astype("int64"),
+    })
+    liq["time"] = pd.to_datetime(liq["timestamp"], unit="ms")
+    return df, liq
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def write_results(results, path):
+    """Write {"environment": ..., "results": ...} as JSON (``-`` for stdout)"""
+    payload = {"environment": environment(), "results": results}
+    text = json.dumps(payload, indent=2, default=float)
+    if path == "-":
+        print(text)
+    else:
+        with open(path, "w") as f:
+            f.write(text + "\n")
+        print(f"💾 Results written to {path}")
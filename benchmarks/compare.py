@@ -0,0 +1,60 @@
+"""
+Compare two benchmark result files and flag regressions
+Run: python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+"""
+
+import argparse
+import json
+
+# Metrics where a larger number is better; everything else is a time/size
+HIGHER_IS_BETTER = ("per_sec", "msg/s", "json", "orjson", "msgspec")
+
+
+def flatten(value, prefix=""):
+    """{'a.b[0].c': number} for every numeric leaf"""
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f"{prefix}.{key}" if prefix else key))
+        return items
+    if isinstance(value, list):
+        items = {}
+        for index, child in enumerate(value):
+            items.update(flatten(child, f"{prefix}[{index}]"))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare benchmark JSON results")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change to flag")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(args.candidate) as f:
+        candidate = flatten(json.load(f)["results"])
+
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        if old == 0 or key.endswith(("rows", "messages", "candles", "liquidations", "batches")):
+            continue
+        change = (new - old) / abs(old) * 100
+        better = change > 0 if key.endswith(HIGHER_IS_BETTER) or "per_sec" in key else change < 0
+        marker = "  "
+        if abs(change) >= args.threshold:
+            marker = "✅" if better else "❌"
+            regressions += not better
+        print(f"{marker} {key:60s} {old:14.2f} -> {new:14.2f} ({change:+6.1f}%)")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:g}%")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
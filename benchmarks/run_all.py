@@ -0,0 +1,63 @@
+"""
+Benchmark Suite - runs every benchmark and writes one JSON result file
+Run: python benchmarks/run_all.py [--quick] [-o bench_results.json]
+Compare two runs: python benchmarks/compare.py old.json new.json
+"""
+
+import argparse
+
+from common import write_results
+
+import bench_chart
+import bench_dashboard
+import bench_decoders
+import bench_ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the full benchmark suite")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    args = parser.parse_args()
+
+    messages = 10_000 if args.quick else 50_000
+    rows = [10_000, 100_000] if args.quick else [10_000, 100_000, 1_000_000]
+    chart_sizes = bench_dashboard.CHART_SIZES[:2] if args.quick else bench_dashboard.CHART_SIZES
+
+    print("=" * 60)
+    print("⏱️ Ingest")
+    print("=" * 60)
+    ingest = {
+        "throughput": bench_ingest.run(messages),
+        "latency": bench_ingest.run(messages // 5, rate=2000),
+    }
+    for name, result in ingest.items():
+        bench_ingest.print_result(name, result)
+
+    print("\n" + "=" * 60)
+    print("⏱️ Dashboard")
+    print("=" * 60)
+    dashboard = bench_dashboard.run(rows, chart_sizes)
+    bench_dashboard.print_results(dashboard)
+
+    print("\n" + "=" * 60)
+    print("⏱️ Chart builder")
+    print("=" * 60)
+    chart = bench_chart.run([1_000, 10_000] if args.quick else [1_000, 10_000, 100_000])
+    for r in chart:
+        print(f"  {r['liquidations']:>8,} liquidations: legacy {r['legacy_ms']:8.1f} ms  "
+              f"vectorized {r['vectorized_ms']:7.1f} ms  {r['speedup']:5.1f}x")
+
+    print("\n" + "=" * 60)
+    print("⏱️ Decoders")
+    print("=" * 60)
+    decoder_rates = bench_decoders.run(seconds=0.25 if args.quick else 1.0)
+    bench_decoders.print_results(decoder_rates)
+
+    print()
+    write_results({"ingest": ingest, "dashboard": dashboard, "chart": chart,
+                   "decoders": decoder_rates}, args.output)
+
+
+if __name__ == "__main__":
+    main()
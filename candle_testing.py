@@ -1,17 +1,13 @@
 import requests
+from config import BINANCE_REST_URL
+from rest_client import get_client
 
 # Test different limits
-url = "https://fapi.binance.com/fapi/v1/klines"
+client = get_client(BINANCE_REST_URL)
 
 for limit in [100, 500, 1000, 1500]:
-    params = {
-        "symbol": "BTCUSDT",
-        "interval": "1m",
-        "limit": limit
-    }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        data = response.json()
+    try:
+        data = client.klines("BTCUSDT", "1m", limit)
         print(f"Requested: {limit}, Got: {len(data)} candles")
-    else:
-        print(f"Requested: {limit}, Failed: {response.status_code}")
\ No newline at end of file
+    except requests.RequestException as e:
+        print(f"Requested: {limit}, Failed: {e}")
@@ -0,0 +1,340 @@
+"""
+Compact Storage - optional fixed-point encoding for klines and liquidations
+Convert: python compact.py [--db btc_data.db] [--output btc_data.compact.db]
+
+Prices, quantities and volumes are stored as scaled integers (SQLite packs them
+into 1-8 bytes instead of a fixed 8-byte REAL), symbols as ids into a small
+dictionary table, side as 0/1, and rows are clustered WITHOUT ROWID on
+(symbol_id, timestamp) with no per-row created_at. Views named ``klines`` and
+``liquidations`` decode back to the original columns, so every reader works
+unchanged; BatchWriter detects the format and writes the encoded tables itself.
+
+The conversion writes a new file and prints size and scan timings for both, so
+the switch is a BTC_DB_PATH change that can be reverted.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import config
+
+DB_PATH = config.DB_PATH
+
+# Fixed-point scales, per column. Stored values must fit a signed 64-bit
+# INTEGER, so each scale trades resolution for range:
+# prices to 1e-8 (every Binance tick size), up to ~9.2e10
+PRICE_SCALE = 10 ** 8
+# quantities and volumes to 1e-4 (finer than any futures step size), up to ~9.2e14
+QUANTITY_SCALE = 10 ** 4
+# notional in quote currency to 1e-4; price x quantity digits beyond that are float noise
+AMOUNT_SCALE = 10 ** 4
+MAX_INTEGER = 2 ** 63 - 1
+
+SIDES = {'BUY': 0, 'SELL': 1}
+
+CREATE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS symbols (
+        id INTEGER PRIMARY KEY,
+        symbol TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS klines_compact (
+        symbol_id INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL,
+        open INTEGER NOT NULL,
+        high INTEGER NOT NULL,
+        low INTEGER NOT NULL,
+        close INTEGER NOT NULL,
+        volume INTEGER NOT NULL,
+        is_closed INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (symbol_id, timestamp)
+    ) WITHOUT ROWID
+    """,
+    # amount is part of the key to keep the old UNIQUE(symbol, timestamp, side, amount)
+    # dedupe; id keeps the arrival order the incremental readers rely on
+    """
+    CREATE TABLE IF NOT EXISTS liquidations_compact (
+        symbol_id INTEGER NOT NULL,
+        timestamp INTEGER NOT NULL,
+        side INTEGER NOT NULL,
+        amount INTEGER NOT NULL,
+        price INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        id INTEGER NOT NULL,
+        PRIMARY KEY (symbol_id, timestamp, side, amount)
+    ) WITHOUT ROWID
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_liquidations_compact_id ON liquidations_compact (id)",
+    "CREATE INDEX IF NOT EXISTS idx_liquidations_compact_time ON liquidations_compact (timestamp)",
+]
+
+CREATE_VIEWS = [
+    f"""
+    CREATE VIEW IF NOT EXISTS klines AS
+    SELECT k.timestamp, s.symbol,
+           k.open / {PRICE_SCALE:.1f} AS open, k.high / {PRICE_SCALE:.1f} AS high,
+           k.low / {PRICE_SCALE:.1f} AS low, k.close / {PRICE_SCALE:.1f} AS close,
+           k.volume / {QUANTITY_SCALE:.1f} AS volume, k.is_closed
+    FROM klines_compact k JOIN symbols s ON s.id = k.symbol_id
+    """,
+    f"""
+    CREATE VIEW IF NOT EXISTS liquidations AS
+    SELECT l.id, s.symbol, CASE l.side WHEN 1 THEN 'SELL' ELSE 'BUY' END AS side,
+           l.price / {PRICE_SCALE:.1f} AS price, l.quantity / {QUANTITY_SCALE:.1f} AS quantity,
+           l.amount / {AMOUNT_SCALE:.1f} AS amount, l.timestamp
+    FROM liquidations_compact l JOIN symbols s ON s.id = l.symbol_id
+    """,
+    # Deletes through the views (archiving, retention) reach the encoded tables
+    """
+    CREATE TRIGGER IF NOT EXISTS klines_delete INSTEAD OF DELETE ON klines BEGIN
+        DELETE FROM klines_compact
+        WHERE symbol_id = (SELECT id FROM symbols WHERE symbol = OLD.symbol) AND timestamp = OLD.timestamp;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS liquidations_delete INSTEAD OF DELETE ON liquidations BEGIN
+        DELETE FROM liquidations_compact WHERE id = OLD.id;
+    END
+    """,
+]
+
+INSERT_KLINES = """
+    INSERT OR REPLACE INTO klines_compact (symbol_id, timestamp, open, high, low, close, volume, is_closed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_LIQUIDATIONS = """
+    INSERT OR IGNORE INTO liquidations_compact (symbol_id, timestamp, side, amount, price, quantity, id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def is_compact(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'klines_compact'"
+    ).fetchone() is not None
+
+
+def fixed(value, scale):
+    """``value`` as a scaled integer; ValueError if it doesn't fit SQLite's INTEGER"""
+    scaled = round(value * scale)
+    if abs(scaled) > MAX_INTEGER:
+        raise ValueError(f"{value} is out of range at scale {scale}")
+    return scaled
+
+
+class Encoder:
+    """Row encoding for the writer; caches symbol ids for its connection"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def reset(self):
+        """Forget cached ids; call after a rollback, which may have undone their inserts"""
+        self._ids.clear()
+
+    def symbol_id(self, cursor, symbol):
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            cursor.execute("INSERT OR IGNORE INTO symbols (symbol) VALUES (?)", (symbol,))
+            symbol_id = cursor.execute("SELECT id FROM symbols WHERE symbol = ?", (symbol,)).fetchone()[0]
+            self._ids[symbol] = symbol_id
+        return symbol_id
+
+    def klines(self, cursor, rows):
+        """BatchWriter kline tuples -> INSERT_KLINES parameters"""
+        # An out-of-range row raises here; the writer's row-by-row salvage drops only that row
+        return [
+            (self.symbol_id(cursor, symbol), timestamp,
+             fixed(open_price, PRICE_SCALE), fixed(high, PRICE_SCALE), fixed(low, PRICE_SCALE),
+             fixed(close, PRICE_SCALE), fixed(volume, QUANTITY_SCALE), is_closed)
+            for timestamp, symbol, open_price, high, low, close, volume, is_closed in rows
+        ]
+
+    def liquidations(self, cursor, rows):
+        """BatchWriter liquidation tuples -> INSERT_LIQUIDATIONS parameters with fresh ids"""
+        next_id = cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM liquidations_compact").fetchone()[0]
+        return [
+            (self.symbol_id(cursor, symbol), timestamp, SIDES[side], fixed(amount, AMOUNT_SCALE),
+             fixed(price, PRICE_SCALE), fixed(quantity, QUANTITY_SCALE), next_id + i)
+            for i, (symbol, side, price, quantity, amount, timestamp) in enumerate(rows)
+        ]
+
+
+# Encoded columns of each source table and their scales
+SCALED_COLUMNS = {
+    "klines": {"open": PRICE_SCALE, "high": PRICE_SCALE, "low": PRICE_SCALE, "close": PRICE_SCALE,
+               "volume": QUANTITY_SCALE},
+    "liquidations": {"price": PRICE_SCALE, "quantity": QUANTITY_SCALE, "amount": AMOUNT_SCALE},
+}
+
+
+def _check_range(conn, schema="main"):
+    """Raise ValueError if any value in ``schema``'s klines/liquidations won't fit its scale"""
+    for table, columns in SCALED_COLUMNS.items():
+        largest = conn.execute(
+            f"SELECT {', '.join(f'MAX(ABS({column}))' for column in columns)} FROM {schema}.{table}"
+        ).fetchone()
+        for (column, scale), value in zip(columns.items(), largest):
+            if value is not None and value * scale > MAX_INTEGER:
+                raise ValueError(f"{table}.{column} value {value} is out of range at scale {scale}")
+
+
+def convert(src_path, dst_path, verbose=True):
+    """Write a compact copy of ``src_path`` (at the current schema) to ``dst_path``"""
+    if os.path.exists(dst_path):
+        raise FileExistsError(f"{dst_path} already exists")
+    src = sqlite3.connect(src_path)
+    try:
+        if is_compact(src):
+            raise ValueError(f"{src_path} already uses the compact schema")
+        # Every other table and its indexes are copied as they are
+        schema = src.execute("""
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND tbl_name NOT IN ('klines', 'liquidations')
+              AND name NOT LIKE 'sqlite_%'
+            ORDER BY type = 'index'
+        """).fetchall()
+    finally:
+        src.close()
+
+    dst = sqlite3.connect(dst_path)
+    try:
+        # Must be set before the first table is created
+        dst.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        dst.execute("PRAGMA journal_mode = WAL")
+        dst.execute("ATTACH DATABASE ? AS src", (src_path,))
+        # CAST would silently clamp an out-of-range value instead of failing
+        _check_range(dst, "src")
+        start = time.perf_counter()
+        with dst:
+            for statement in CREATE_TABLES + CREATE_VIEWS:
+                dst.execute(statement)
+            for kind, name, table, sql in schema:
+                dst.execute(sql)
+                if kind == "table":
+                    dst.execute(f"INSERT INTO main.{name} SELECT * FROM src.{name}")
+
+            dst.execute("""
+                INSERT INTO symbols (symbol)
+                SELECT symbol FROM src.klines UNION SELECT symbol FROM src.liquidations ORDER BY 1
+            """)
+            dst.execute(f"""
+                INSERT INTO klines_compact (symbol_id, timestamp, open, high, low, close, volume, is_closed)
+                SELECT s.id, k.timestamp,
+                       CAST(ROUND(k.open * {PRICE_SCALE}) AS INTEGER), CAST(ROUND(k.high * {PRICE_SCALE}) AS INTEGER),
+                       CAST(ROUND(k.low * {PRICE_SCALE}) AS INTEGER), CAST(ROUND(k.close * {PRICE_SCALE}) AS INTEGER),
+                       CAST(ROUND(k.volume * {QUANTITY_SCALE}) AS INTEGER), k.is_closed
+                FROM src.klines k JOIN symbols s ON s.symbol = k.symbol
+                ORDER BY s.id, k.timestamp
+            """)
+            dst.execute(f"""
+                INSERT OR IGNORE INTO liquidations_compact (symbol_id, timestamp, side, amount, price, quantity, id)
+                SELECT s.id, l.timestamp, l.side = 'SELL', CAST(ROUND(l.amount * {AMOUNT_SCALE}) AS INTEGER),
+                       CAST(ROUND(l.price * {PRICE_SCALE}) AS INTEGER),
+                       CAST(ROUND(l.quantity * {QUANTITY_SCALE}) AS INTEGER), l.id
+                FROM src.liquidations l JOIN symbols s ON s.symbol = l.symbol
+                ORDER BY s.id, l.timestamp
+            """)
+        dst.execute("DETACH DATABASE src")
+        dst.execute("VACUUM")
+        if verbose:
+            print(f"✅ Wrote {dst_path} in {time.perf_counter() - start:.1f} s")
+    except Exception:
+        dst.close()
+        os.remove(dst_path)
+        raise
+    dst.close()
+
+
+def _best_ms(conn, sql, params=(), repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(path):
+    """On-disk bytes per table and timings for the scans the dashboard and collector run"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        conn.execute("PRAGMA wal_checkpoint")
+        klines_table, liquidations_table = (
+            ("klines_compact", "liquidations_compact") if is_compact(conn) else ("klines", "liquidations")
+        )
+        sizes = dict(conn.execute("""
+            SELECT COALESCE(i.tbl_name, d.name), SUM(d.pgsize) FROM dbstat d
+            LEFT JOIN sqlite_master i ON i.name = d.name AND i.type = 'index'
+            GROUP BY 1
+        """).fetchall())
+        symbol, newest = conn.execute(
+            "SELECT symbol, MAX(timestamp) FROM klines GROUP BY symbol ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone() or (None, 0)
+        day_start = (newest or 0) - 86_400_000
+        return {
+            "file_bytes": os.path.getsize(path),
+            "klines_rows": conn.execute("SELECT COUNT(*) FROM klines").fetchone()[0],
+            "liquidations_rows": conn.execute("SELECT COUNT(*) FROM liquidations").fetchone()[0],
+            "klines_bytes": sizes.get(klines_table, 0),
+            "liquidations_bytes": sizes.get(liquidations_table, 0),
+            "klines_full_scan_ms": _best_ms(conn, "SELECT SUM(close), SUM(volume) FROM klines"),
+            "klines_day_ms": _best_ms(conn, """
+                SELECT timestamp, open, high, low, close, volume FROM klines
+                WHERE symbol = ? AND timestamp >= ? ORDER BY timestamp
+            """, (symbol, day_start)),
+            "liquidations_full_scan_ms": _best_ms(conn, "SELECT side, COUNT(*), SUM(amount) FROM liquidations GROUP BY side"),
+            "liquidations_day_ms": _best_ms(conn, """
+                SELECT id, symbol, side, price, quantity, amount, timestamp FROM liquidations
+                WHERE symbol = ? AND timestamp >= ? ORDER BY timestamp
+            """, (symbol, day_start)),
+        }
+    finally:
+        conn.close()
+
+
+def print_report(before, after):
+    print(f"{'':28}{'before':>14}{'after':>14}{'ratio':>8}")
+    for key in before:
+        old, new = before[key], after[key]
+        ratio = f"{new / old:.2f}" if old else "-"
+        if key.endswith("_ms"):
+            print(f"  {key:26}{old:12.2f}ms{new:12.2f}ms{ratio:>8}")
+        else:
+            print(f"  {key:26}{old:14,}{new:14,}{ratio:>8}")
+    for table in ("klines", "liquidations"):
+        if before[f"{table}_rows"] and after[f"{table}_rows"]:
+            print(f"  {table} bytes/row: {before[f'{table}_bytes'] / before[f'{table}_rows']:.1f} -> "
+                  f"{after[f'{table}_bytes'] / after[f'{table}_rows']:.1f}")
+
+
+def main():
+    import migrations
+
+    parser = argparse.ArgumentParser(description="Write a fixed-point compact copy of the database")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--output", help="compact database to create (default: <db>.compact.db)")
+    args = parser.parse_args()
+    output = args.output or f"{os.path.splitext(args.db)[0]}.compact.db"
+
+    # The source must be at the current schema; this is what the collector does on start
+    conn = migrations.connect_writer(args.db)
+    try:
+        migrations.migrate(conn)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    before = measure(args.db)
+    convert(args.db, output)
+    after = measure(output)
+    print_report(before, after)
+    print(f"\nTo switch: stop the collector, then run with BTC_DB_PATH={output}")
+
+
+if __name__ == "__main__":
+    main()
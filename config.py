@@ -0,0 +1,40 @@
+"""
+Configuration - endpoint settings shared by the collector and dashboard
+Override with environment variables to point at a local stand-in.
+"""
+
+import os
+
+BINANCE_REST_URL = os.environ.get("BINANCE_REST_URL", "https://fapi.binance.com")
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://fstream.binance.com")
+
+# SQLite database shared by the collector and dashboard
+DB_PATH = os.environ.get("BTC_DB_PATH", "btc_data.db")
+
+# Liquidation markers per chart above which the dashboard draws with WebGL (Scattergl)
+WEBGL_POINT_THRESHOLD = int(os.environ.get("WEBGL_POINT_THRESHOLD", "2000"))
+
+# Above this many liquidations in view the chart draws aggregated (bucket x price band) bubbles
+LIQUIDATION_POINT_BUDGET = int(os.environ.get("LIQUIDATION_POINT_BUDGET", "5000"))
+
+# How often the dashboard's live section re-renders (the data hub refreshes every second)
+DASHBOARD_REFRESH_SECONDS = float(os.environ.get("DASHBOARD_REFRESH_SECONDS", "2"))
+
+# Collector Prometheus endpoint (0 disables)
+METRICS_PORT = int(os.environ.get("COLLECTOR_METRICS_PORT", "9108"))
+
+# Cold tier: closed days older than ARCHIVE_AFTER_DAYS move from SQLite to Parquet
+# files under ARCHIVE_DIR; the collector checks every ARCHIVE_INTERVAL_SECONDS (0 disables)
+ARCHIVE_DIR = os.environ.get("BTC_ARCHIVE_DIR", os.path.join(os.path.dirname(DB_PATH), "archive"))
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "8"))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "3600"))
+
+# Collector mirrors the live window into <DB_PATH>.<SYMBOL>.ring for the dashboard (0 disables)
+LIVE_RING = os.environ.get("LIVE_RING", "1") != "0"
+
+# Rolling retention rules "table[:SYMBOL]=<N>d|h", e.g. "liquidations=90d,liquidations:ETHUSDT=30d"
+# (empty keeps everything); the collector applies them every RETENTION_INTERVAL_SECONDS (0 disables)
+RETENTION = os.environ.get("RETENTION", "")
+RETENTION_INTERVAL_SECONDS = float(os.environ.get("RETENTION_INTERVAL_SECONDS", "600"))
+# UTC hours "start-end" in which incremental VACUUM and WAL truncation run (empty: any time)
+MAINTENANCE_HOURS = os.environ.get("MAINTENANCE_HOURS", "2-5")
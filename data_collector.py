@@ -3,115 +3,73 @@ Background Data Collector - Runs 24/7 to collect and store klines + liquidations
 Run this separately: python data_collector.py
 """
 
+import argparse
+import signal
 import sqlite3
-import json
 import time
 from datetime import datetime, timezone
 from websocket import WebSocketApp
-import requests
 import threading
+from db_writer import BatchWriter
+from storage import connect_writer
+import migrations
+import archive
+import retention
+import live_ring
+import backfill
+import streams
+import decoders
+import metrics
+import liveness
+from config import (ARCHIVE_AFTER_DAYS, ARCHIVE_INTERVAL_SECONDS, BINANCE_WS_URL,
+                    DB_PATH, LIVE_RING, MAINTENANCE_HOURS, METRICS_PORT, RETENTION,
+                    RETENTION_INTERVAL_SECONDS)
 
-DB_PATH = "btc_data.db"
+# Shared writer thread - owns the only long-lived write connection
+_writer = None
+
+# Minimum seconds between writes of the currently forming candle
+FORMING_CANDLE_INTERVAL = 1.0
+_last_forming_write = {}
+
+# Fastest available message decoder (override with COLLECTOR_DECODER=json|orjson|msgspec)
+DECODER = decoders.get_decoder()
+
+# Symbols whose klines and liquidations are stored (set from --symbols)
+TRACKED_SYMBOLS = {"BTCUSDT"}
+
+# Backfills run one at a time so concurrent shards don't stack request weight
+_backfill_lock = threading.Lock()
 
 def init_database():
     """Initialize database with proper schema"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Klines table - stores every 1-minute candle
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS klines (
-            timestamp INTEGER PRIMARY KEY,
-            symbol TEXT NOT NULL,
-            open REAL NOT NULL,
-            high REAL NOT NULL,
-            low REAL NOT NULL,
-            close REAL NOT NULL,
-            volume REAL NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Liquidations table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS liquidations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT NOT NULL,
-            side TEXT NOT NULL,
-            price REAL NOT NULL,
-            quantity REAL NOT NULL,
-            amount REAL NOT NULL,
-            timestamp INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(symbol, timestamp, side, amount)
-        )
-    """)
-    
-    # Collector state table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS collector_state (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            last_kline_timestamp INTEGER,
-            last_liquidation_timestamp INTEGER,
-            total_klines_collected INTEGER DEFAULT 0,
-            total_liquidations_collected INTEGER DEFAULT 0,
-            is_running INTEGER DEFAULT 0,
-            last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    cursor.execute("INSERT OR IGNORE INTO collector_state (id, is_running) VALUES (1, 0)")
-    conn.commit()
+    conn = connect_writer(DB_PATH)
+    migrations.migrate(conn)
     conn.close()
 
-def save_kline(timestamp, symbol, open_price, high, low, close, volume):
-    """Save single kline to database"""
+def get_writer():
+    """Return the shared batch writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        _writer = BatchWriter(DB_PATH)
+        _writer.on_flush = metrics.observe_flush(_writer)
+        _writer.start()
+    return _writer
+
+def save_kline(timestamp, symbol, open_price, high, low, close, volume, is_closed=True):
+    """Queue single kline for the batch writer"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO klines (timestamp, symbol, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (timestamp, symbol, open_price, high, low, close, volume))
-        
-        cursor.execute("""
-            UPDATE collector_state 
-            SET last_kline_timestamp = ?,
-                total_klines_collected = total_klines_collected + 1,
-                last_update = CURRENT_TIMESTAMP
-            WHERE id = 1
-        """, (timestamp,))
-        
-        conn.commit()
-        conn.close()
+        get_writer().put_kline(timestamp, symbol, open_price, high, low, close, volume, is_closed)
         return True
     except Exception as e:
         print(f"Error saving kline: {e}")
         return False
 
 def save_liquidation(symbol, side, price, quantity, amount, timestamp):
-    """Save liquidation to database"""
+    """Queue liquidation for the batch writer"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR IGNORE INTO liquidations 
-            (symbol, side, price, quantity, amount, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (symbol, side, price, quantity, amount, timestamp))
-        
-        if cursor.rowcount > 0:
-            cursor.execute("""
-                UPDATE collector_state 
-                SET last_liquidation_timestamp = ?,
-                    total_liquidations_collected = total_liquidations_collected + 1,
-                    last_update = CURRENT_TIMESTAMP
-                WHERE id = 1
-            """, (timestamp,))
-        
-        conn.commit()
-        conn.close()
-        return cursor.rowcount > 0
+        get_writer().put_liquidation(symbol, side, price, quantity, amount, timestamp)
+        return True
     except Exception as e:
         print(f"Error saving liquidation: {e}")
         return False
@@ -131,61 +89,53 @@ def update_collector_status(is_running):
     except Exception as e:
         print(f"Error updating status: {e}")
 
-def fetch_historical_klines(symbol="BTCUSDT", interval="1m", limit=1500):
-    """Fetch and store historical klines from API"""
-    url = "https://fapi.binance.com/fapi/v1/klines"
-    params = {"symbol": symbol, "interval": interval, "limit": limit}
+# Event handlers shared by the single-stream and combined-stream sockets
+def handle_kline_event(event):
+    """Persist one decoded KlineEvent (closed candle, or throttled forming candle)"""
+    # The forming candle updates several times a second; persist it at most
+    # once per FORMING_CANDLE_INTERVAL per symbol, closed candles always
+    now = time.monotonic()
+    if not event.is_closed and now - _last_forming_write.get(event.symbol, 0.0) < FORMING_CANDLE_INTERVAL:
+        return
     
-    try:
-        print(f"Fetching {limit} historical candles...")
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        saved_count = 0
-        for candle in data:
-            timestamp = candle[0]
-            if save_kline(
-                timestamp=timestamp,
-                symbol=symbol,
-                open_price=float(candle[1]),
-                high=float(candle[2]),
-                low=float(candle[3]),
-                close=float(candle[4]),
-                volume=float(candle[5])
-            ):
-                saved_count += 1
-        
-        print(f"✅ Saved {saved_count}/{len(data)} historical candles to database")
-        return True
-    except Exception as e:
-        print(f"❌ Error fetching historical klines: {e}")
-        return False
+    if save_kline(
+        timestamp=event.timestamp,
+        symbol=event.symbol,
+        open_price=event.open,
+        high=event.high,
+        low=event.low,
+        close=event.close,
+        volume=event.volume,
+        is_closed=event.is_closed
+    ):
+        if event.is_closed:
+            dt = datetime.fromtimestamp(event.timestamp/1000)
+            print(f"📊 Queued candle: {event.symbol} @ {dt.strftime('%H:%M:%S')} - Close: ${event.close:,.2f}")
+        else:
+            _last_forming_write[event.symbol] = now
+
+def handle_liquidation_event(event):
+    """Persist one decoded LiquidationEvent for a tracked symbol"""
+    if event.symbol not in TRACKED_SYMBOLS:
+        return
+    
+    if save_liquidation(*event):
+        dt = datetime.fromtimestamp(event.timestamp/1000)
+        print(f"💥 Queued liquidation: {event.symbol} {event.side} ${event.amount:,.0f} @ ${event.price:,.2f} - {dt.strftime('%H:%M:%S')}")
 
 # WebSocket handlers for klines
+KLINE_STREAM = "btcusdt@kline_1m"
+LIQUIDATION_STREAM = "btcusdt@forceOrder"
+
 def on_kline_message(ws, message):
     """Handle kline WebSocket messages"""
+    metrics.record_message(KLINE_STREAM)
     try:
-        data = json.loads(message)
-        if 'k' in data:
-            kline = data['k']
-            # Only save completed candles
-            if kline['x']:  # x = is candle closed
-                timestamp = kline['t']
-                symbol = kline['s']
-                
-                if save_kline(
-                    timestamp=timestamp,
-                    symbol=symbol,
-                    open_price=float(kline['o']),
-                    high=float(kline['h']),
-                    low=float(kline['l']),
-                    close=float(kline['c']),
-                    volume=float(kline['v'])
-                ):
-                    dt = datetime.fromtimestamp(timestamp/1000)
-                    print(f"📊 Saved candle: {symbol} @ {dt.strftime('%H:%M:%S')} - Close: ${float(kline['c']):,.2f}")
+        event = DECODER.decode_kline(message)
+        if event is not None:
+            handle_kline_event(event)
     except Exception as e:
+        metrics.DECODE_ERRORS.inc(stream=KLINE_STREAM)
         print(f"Error processing kline: {e}")
 
 def on_kline_error(ws, error):
@@ -199,24 +149,71 @@ def on_kline_close(ws, close_status_code, close_msg):
 def on_kline_open(ws):
     print(f"✅ Kline WebSocket connected at {datetime.now().strftime('%H:%M:%S')}")
     update_collector_status(True)
+    # Anything missed while disconnected (or suspended) is refetched in the background
+    threading.Thread(target=run_kline_backfill, daemon=True, name="KlineBackfill").start()
+
+def run_kline_backfill(symbols=None):
+    """Fill kline gaps left by collector downtime"""
+    _backfill_lock.acquire()
+    try:
+        for symbol in symbols or sorted(TRACKED_SYMBOLS):
+            backfill.backfill_klines(get_writer(), symbol=symbol, db_path=DB_PATH)
+    except Exception as e:
+        print(f"❌ Kline backfill failed: {e}")
+    finally:
+        _backfill_lock.release()
+
+def run_archiver(interval=ARCHIVE_INTERVAL_SECONDS):
+    """Move closed days older than ARCHIVE_AFTER_DAYS to the Parquet archive, forever"""
+    while True:
+        try:
+            moved = archive.archive_closed_days(DB_PATH, verbose=False)
+            if any(moved.values()):
+                print("🧊 Archived " + ", ".join(f"{rows:,} {table}" for table, rows in moved.items()))
+        except Exception as e:
+            print(f"❌ Archiving failed: {e}")
+        time.sleep(interval)
+
+def run_maintenance(policy, interval=RETENTION_INTERVAL_SECONDS):
+    """Apply the retention policy and, off-peak, reclaim free pages and truncate the WAL, forever"""
+    hours = retention.parse_hours(MAINTENANCE_HOURS)
+    while True:
+        try:
+            conn = connect_writer(DB_PATH)
+            try:
+                if policy:
+                    for table, stats in retention.apply_retention(conn, policy, verbose=False).items():
+                        metrics.RETENTION_ROWS_DELETED.inc(stats["rows"] + stats["archived_rows"], table=table)
+                        metrics.MAINTENANCE_SECONDS.inc(stats["seconds"], task="retention")
+                        if stats["rows"] or stats["archived_rows"]:
+                            print(f"🧹 Expired {stats['rows']:,} {table} rows"
+                                  + (f" + {stats['archived_rows']:,} archived" if stats["archived_rows"] else "")
+                                  + f" in {stats['seconds']:.2f} s")
+                if retention.off_peak(hours):
+                    result = retention.reclaim(conn, DB_PATH)
+                    metrics.MAINTENANCE_SECONDS.inc(result["vacuum_seconds"], task="incremental_vacuum")
+                    metrics.MAINTENANCE_SECONDS.inc(result["checkpoint_seconds"], task="wal_checkpoint")
+                    metrics.BYTES_RECLAIMED.inc(result["bytes_reclaimed"])
+                    metrics.FREE_PAGES.set(result["free_pages_left"])
+                    if result["bytes_reclaimed"] >= 1024 * 1024:
+                        print(f"♻️ Reclaimed {result['bytes_reclaimed'] / 1024 / 1024:.1f} MB in "
+                              f"{result['vacuum_seconds'] + result['checkpoint_seconds']:.2f} s")
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"❌ Maintenance failed: {e}")
+        time.sleep(interval)
 
 # WebSocket handlers for liquidations
 def on_liq_message(ws, message):
     """Handle liquidation WebSocket messages"""
+    metrics.record_message(LIQUIDATION_STREAM)
     try:
-        data = json.loads(message)
-        if 'o' in data:
-            symbol = data['o']['s']
-            side = data['o']['S']
-            price = float(data['o']['p'])
-            quantity = float(data['o']['q'])
-            amount = price * quantity
-            timestamp = data['o']['T']
-            
-            if symbol == 'BTCUSDT' and save_liquidation(symbol, side, price, quantity, amount, timestamp):
-                dt = datetime.fromtimestamp(timestamp/1000)
-                print(f"💥 Saved liquidation: {side} ${amount:,.0f} @ ${price:,.2f} - {dt.strftime('%H:%M:%S')}")
+        event = DECODER.decode_liquidation(message)
+        if event is not None:
+            handle_liquidation_event(event)
     except Exception as e:
+        metrics.DECODE_ERRORS.inc(stream=LIQUIDATION_STREAM)
         print(f"Error processing liquidation: {e}")
 
 def on_liq_error(ws, error):
@@ -233,55 +230,229 @@ def run_kline_websocket():
     while True:
         try:
             ws = WebSocketApp(
-                "wss://fstream.binance.com/ws/btcusdt@kline_1m",
+                f"{BINANCE_WS_URL}/ws/{KLINE_STREAM}",
                 on_message=on_kline_message,
                 on_error=on_kline_error,
                 on_close=on_kline_close,
                 on_open=on_kline_open
             )
             ws.run_forever(ping_interval=20, ping_timeout=10)
-            time.sleep(5)
         except Exception as e:
             print(f"Kline WebSocket crashed: {e}, restarting...")
-            time.sleep(5)
+        metrics.RECONNECTS.inc(connection="kline")
+        time.sleep(5)
 
 def run_liquidation_websocket():
     """Run liquidation WebSocket in loop"""
     while True:
         try:
             ws = WebSocketApp(
-                "wss://fstream.binance.com/ws/btcusdt@forceOrder",
+                f"{BINANCE_WS_URL}/ws/{LIQUIDATION_STREAM}",
                 on_message=on_liq_message,
                 on_error=on_liq_error,
                 on_close=on_liq_close,
                 on_open=on_liq_open
             )
             ws.run_forever(ping_interval=20, ping_timeout=10)
-            time.sleep(5)
         except Exception as e:
             print(f"Liquidation WebSocket crashed: {e}, restarting...")
-            time.sleep(5)
+        metrics.RECONNECTS.inc(connection="liquidation")
+        time.sleep(5)
+
+# Combined-stream mode: many streams per socket, routed by stream name
+COMBINED_HANDLERS = {
+    "kline": handle_kline_event,
+    "forceOrder": handle_liquidation_event,
+}
+
+def on_combined_message(ws, message):
+    """Handle a {"stream": ..., "data": ...} frame from a combined stream"""
+    name = streams.stream_name(message) or "combined"
+    metrics.record_message(name)
+    try:
+        streams.demultiplex(message, COMBINED_HANDLERS, DECODER)
+    except Exception as e:
+        metrics.DECODE_ERRORS.inc(stream=name)
+        print(f"Error processing combined stream message: {e}")
+
+def run_combined_websocket(names, shard_index):
+    """Run one combined-stream connection (a shard of the stream list) in loop"""
+    kline_symbols = sorted(name.split("@")[0].upper() for name in names
+                           if streams.stream_kind(name) == "kline")
+    
+    def on_open(ws):
+        print(f"✅ Shard {shard_index} connected ({len(names)} streams) at {datetime.now().strftime('%H:%M:%S')}")
+        if kline_symbols:
+            update_collector_status(True)
+            threading.Thread(target=run_kline_backfill, args=(kline_symbols,),
+                             daemon=True, name=f"KlineBackfill-{shard_index}").start()
+    
+    def on_error(ws, error):
+        print(f"❌ Shard {shard_index} WebSocket error: {error}")
+    
+    def on_close(ws, close_status_code, close_msg):
+        print(f"⚠️ Shard {shard_index} WebSocket closed: {close_status_code} - {close_msg}")
+        if kline_symbols:
+            update_collector_status(False)
+    
+    while True:
+        try:
+            ws = WebSocketApp(
+                streams.combined_url(names),
+                on_message=on_combined_message,
+                on_error=on_error,
+                on_close=on_close,
+                on_open=on_open
+            )
+            ws.run_forever(ping_interval=20, ping_timeout=10)
+        except Exception as e:
+            print(f"Shard {shard_index} WebSocket crashed: {e}, restarting...")
+        metrics.RECONNECTS.inc(connection=f"shard-{shard_index}")
+        time.sleep(5)
+
+def start_combined_streams(symbols, max_streams=streams.MAX_STREAMS_PER_CONNECTION, all_liquidations=False):
+    """Subscribe to every symbol over combined streams, sharded across connections"""
+    names = streams.stream_names(symbols, all_liquidations=all_liquidations)
+    shards = streams.shard_streams(names, max_streams)
+    for index, shard in enumerate(shards):
+        threading.Thread(target=run_combined_websocket, args=(shard, index),
+                         daemon=True, name=f"CombinedCollector-{index}").start()
+    return shards
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect klines and liquidations into btc_data.db")
+    parser.add_argument("--symbols", help="comma-separated symbols; enables combined-stream mode")
+    parser.add_argument("--max-streams", type=int, default=streams.MAX_STREAMS_PER_CONNECTION,
+                        help="max streams per combined connection before sharding")
+    parser.add_argument("--all-liquidations", action="store_true",
+                        help="use the market-wide !forceOrder@arr stream and filter to --symbols")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus metrics on this port (0 disables)")
+    parser.add_argument("--engine", choices=("threaded", "asyncio"), default="threaded",
+                        help="threaded: one thread per socket; asyncio: single event loop with backpressure")
+    return parser.parse_args()
+
+def run_async_engine(symbols, max_streams, all_liquidations):
+    """Run the asyncio collector engine until interrupted"""
+    import asyncio
+    from async_collector import AsyncCollector
+    
+    collector = AsyncCollector(
+        symbols,
+        handlers=COMBINED_HANDLERS,
+        decoder=DECODER,
+        writer=get_writer(),
+        backfill=run_kline_backfill,
+        set_status=update_collector_status,
+        max_streams=max_streams,
+        all_liquidations=all_liquidations
+    )
+    asyncio.run(collector.run())
+
+def _stop_on_sigterm(signum, frame):
+    # Shut down like Ctrl+C so the writer flushes and the lease is released;
+    # repeated SIGTERMs are ignored so they can't interrupt that shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise KeyboardInterrupt
 
 def main():
+    args = parse_args()
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    
     print("=" * 60)
     print("BTC/USDT Liquidation Collector - Background Service")
     print("=" * 60)
     
-    # Initialize database
-    print("Initializing database...")
-    init_database()
+    # One collector per database: a second instance exits here, before it
+    # can run migrations concurrently with the first
+    lease = liveness.CollectorLease(DB_PATH, stream_times=metrics.last_message_times)
+    try:
+        lease.lock()
+        print("Initializing database...")
+        init_database()
+        lease.acquire()
+    except liveness.LeaseHeld as e:
+        print(f"🛑 Not starting: {e}")
+        raise SystemExit(1)
+    lease.start()
+    print(f"🔒 Collector lease held by {lease.owner} (heartbeat every {lease.interval}s)")
+    writer = get_writer()
     
-    print("\n" + "=" * 60)
-    print("Starting Liquidation WebSocket stream...")
-    print("=" * 60)
+    if args.metrics_port:
+        try:
+            metrics.QUEUE_DEPTH.set_function(writer.queue_depth)
+            metrics.start_http_server(args.metrics_port)
+            print(f"📟 Metrics on http://0.0.0.0:{args.metrics_port}/metrics")
+        except OSError as e:
+            print(f"⚠️ Metrics endpoint disabled: {e}")
+    
+    if ARCHIVE_INTERVAL_SECONDS and archive.pq is not None:
+        threading.Thread(target=run_archiver, daemon=True, name="Archiver").start()
+        print(f"🧊 Archiving days older than {ARCHIVE_AFTER_DAYS}d to {archive.ARCHIVE_DIR}")
+    elif ARCHIVE_INTERVAL_SECONDS:
+        print("⚠️ pyarrow not installed: hot database will not be archived")
+    
+    if RETENTION_INTERVAL_SECONDS:
+        try:
+            policy = retention.parse_policy(RETENTION)
+            threading.Thread(target=run_maintenance, args=(policy,), daemon=True, name="Maintenance").start()
+            print(f"🧹 Retention: {RETENTION or 'keep everything'}; "
+                  f"vacuum/checkpoint {'UTC ' + MAINTENANCE_HOURS + 'h' if MAINTENANCE_HOURS else 'any time'}")
+        except ValueError as e:
+            print(f"⚠️ Retention disabled: {e}")
+    
+    symbols = [s.strip().upper() for s in (args.symbols or "").split(",") if s.strip()] or ["BTCUSDT"]
+    TRACKED_SYMBOLS.clear()
+    TRACKED_SYMBOLS.update(symbols)
     
-    # Start only liquidation WebSocket thread
-    liq_thread = threading.Thread(target=run_liquidation_websocket, daemon=True, name="LiquidationCollector")
-    liq_thread.start()
+    if LIVE_RING:
+        # Mirror committed rows into per-symbol memory-mapped windows for the dashboard
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                writer.on_commit = live_ring.RingSet(DB_PATH, symbols).seed(conn)
+            finally:
+                conn.close()
+            print(f"🧵 Live ring buffer: {live_ring.ring_path(DB_PATH, '<SYMBOL>')}")
+        except Exception as e:
+            print(f"⚠️ Live ring buffer disabled: {e}")
+    
+    if args.engine == "asyncio":
+        print("\n" + "=" * 60)
+        print(f"Starting asyncio engine for {len(symbols)} symbols...")
+        print("=" * 60)
+        try:
+            run_async_engine(symbols, args.max_streams, args.all_liquidations)
+        except KeyboardInterrupt:
+            print("\n\n🛑 Stopping data collector...")
+            get_writer().stop()
+            update_collector_status(False)
+            lease.release()
+            print("✅ Data collector stopped")
+        return
+    
+    if args.symbols:
+        print("\n" + "=" * 60)
+        print(f"Starting combined streams for {len(symbols)} symbols...")
+        print("=" * 60)
+        
+        shards = start_combined_streams(symbols, args.max_streams, args.all_liquidations)
+        print(f"\n✅ Data collector is running! {sum(len(s) for s in shards)} streams over {len(shards)} connection(s)")
+    else:
+        print("\n" + "=" * 60)
+        print("Starting Kline + Liquidation WebSocket streams...")
+        print("=" * 60)
+        
+        kline_thread = threading.Thread(target=run_kline_websocket, daemon=True, name="KlineCollector")
+        kline_thread.start()
+        
+        liq_thread = threading.Thread(target=run_liquidation_websocket, daemon=True, name="LiquidationCollector")
+        liq_thread.start()
+        
+        print("\n✅ Data collector is running!")
     
-    print("\n✅ Liquidation collector is running!")
-    print("💥 Collecting liquidations only")
-    print("📊 Klines now fetched directly from Binance API")
+    print("📊 Collecting 1m candles (closed + forming)")
+    print("💥 Collecting liquidations")
     print("\nPress Ctrl+C to stop...\n")
     
     try:
@@ -298,7 +469,9 @@ def main():
                 print(f"📈 Status: {stats[0]} candles, {stats[1]} liquidations collected")
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping data collector...")
+        get_writer().stop()
         update_collector_status(False)
+        lease.release()
         print("✅ Data collector stopped")
 
 if __name__ == "__main__":
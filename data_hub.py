@@ -0,0 +1,209 @@
+"""
+Dashboard Data Hub - one background refresher shared by every Streamlit session
+The hub keeps the live 1m candle frame, the liquidation window and collector
+status in memory and publishes them as immutable snapshots, so a session rerun
+only renders instead of querying and copying.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+import archive
+import liveness
+from liquidation_tail import LiquidationTail
+
+KLINE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class Snapshot(NamedTuple):
+    """One consistent view of the live data; shared, never modified in place"""
+    klines: pd.DataFrame
+    liquidations: pd.DataFrame
+    status: Optional[dict]
+    db_stats: Optional[dict]
+    updated_at: float
+
+
+class DataHub:
+    """Background refresher publishing :class:`Snapshot` objects.
+
+    Candles are refreshed incrementally: only rows at or after the newest
+    candle already held are read (the forming candle plus anything new), and
+    the whole window again when candles were written further back (a backfill).
+    Database-wide counts are slower queries and refresh on their own interval.
+    """
+
+    def __init__(self, pool, symbol='BTCUSDT', candle_limit=100, liquidation_window_ms=100 * 60_000,
+                 refresh_interval=1.0, stats_interval=15.0, ring=None):
+        self.pool = pool
+        # Optional live_ring.RingReader; SQL is used whenever it can't serve the window
+        self.ring = ring
+        self.symbol = symbol
+        self.candle_limit = candle_limit
+        self.liquidation_window_ms = liquidation_window_ms
+        self.refresh_interval = refresh_interval
+        self.stats_interval = stats_interval
+
+        self._tail = LiquidationTail(liquidation_window_ms, symbol=symbol)
+        self._klines = pd.DataFrame(columns=['timestamp'] + KLINE_COLUMNS)
+        # collector_state.total_klines_collected at the last read, and whether
+        # the newest candle held was already closed (and so counted in it)
+        self._klines_total = None
+        self._klines_last_closed = False
+        self._db_stats = None
+        self._stats_at = 0.0
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.refresh_ms = 0.0
+        self.source = None
+        self._ring_version = None
+        self._ring_frames = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        # Publish a first snapshot before any session asks for one
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="DataHub")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def snapshot(self):
+        """Latest snapshot (zero-copy: every session gets the same frames)"""
+        return self._snapshot
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing dashboard data: {e}")
+
+    def refresh(self):
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            status = self._read_status(conn)
+            live = self._read_ring(status) if self.ring else None
+            if live is None:
+                klines = self._refresh_klines(conn, (status or {}).get('total_klines'))
+                liquidations = self._tail.refresh(conn)
+                self.source = 'sqlite'
+            else:
+                klines, liquidations = live
+                self.source = 'ring'
+            if time.monotonic() - self._stats_at >= self.stats_interval or self._db_stats is None:
+                self._db_stats = self._read_db_stats(conn)
+                self._stats_at = time.monotonic()
+
+        # The tail and _refresh_klines build new frames whenever contents
+        # change, so snapshots already handed out are never touched
+        self._snapshot = Snapshot(klines, liquidations, status, self._db_stats, time.time())
+        self.refresh_ms = (time.perf_counter() - start) * 1000
+        return self._snapshot
+
+    def _read_ring(self, status):
+        """Live frames from the collector's ring buffer, reused while it hasn't changed"""
+        # Only a ring the running collector seeded and keeps writing is trusted
+        started_at = (status or {}).get('started_at')
+        not_before_ms = int(started_at * 1000) if started_at else None
+        version = self.ring.version()
+        if version is None or not self.ring.is_current(not_before_ms=not_before_ms):
+            return None
+        if version != self._ring_version or self._ring_frames is None:
+            self._ring_frames = self.ring.read(self.candle_limit, self.liquidation_window_ms,
+                                               not_before_ms=not_before_ms)
+            self._ring_version = version
+        return self._ring_frames
+
+    def _refresh_klines(self, conn, total_klines=None):
+        frame = self._klines
+        since = int(frame['timestamp'].iloc[-1]) if not frame.empty else 0
+        new_rows = pd.read_sql_query("""
+            SELECT timestamp, open, high, low, close, volume, is_closed FROM (
+                SELECT timestamp, open, high, low, close, volume, is_closed
+                FROM klines
+                WHERE symbol = ? AND timestamp >= ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ) ORDER BY timestamp ASC
+        """, conn, params=(self.symbol, since, self.candle_limit))
+
+        # Candles closed since the last read should all be in this tail; if the
+        # collector counted more, some were written earlier in the window (a
+        # backfilled gap) and the whole window is read again. The count covers
+        # every symbol, so other symbols' candles cause a reload now and then too.
+        previous_total, self._klines_total = self._klines_total, total_klines
+        if since and None not in (previous_total, total_klines):
+            newly_closed = int(new_rows['is_closed'].sum()) - self._klines_last_closed
+            if total_klines - previous_total > newly_closed:
+                self._klines = frame = self._klines.iloc[:0]
+                return self._refresh_klines(conn, total_klines)
+        if new_rows.empty:
+            return frame
+
+        self._klines_last_closed = bool(new_rows['is_closed'].iloc[-1])
+        new_rows = new_rows.drop(columns='is_closed')
+        new_rows['Date'] = pd.to_datetime(new_rows['timestamp'], unit='ms')
+        new_rows = new_rows.rename(columns={
+            'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+        })
+        kept = frame[frame['timestamp'] < new_rows['timestamp'].iloc[0]]
+        frame = new_rows if kept.empty else pd.concat([kept, new_rows], ignore_index=True)
+        frame = frame.iloc[-self.candle_limit:].reset_index(drop=True)
+        self._klines = frame
+        return frame
+
+    def _read_status(self, conn):
+        row = conn.execute("""
+            SELECT total_klines_collected, total_liquidations_collected,
+                   last_update, last_kline_timestamp
+            FROM collector_state WHERE id = 1
+        """).fetchone()
+        if not row:
+            return None
+        # Liveness comes from the collector's heartbeat, not a flag a crashed
+        # process never clears
+        health = liveness.read_health(conn) or {}
+        return {
+            'is_running': health.get('alive', False),
+            'pid': health.get('pid'),
+            'started_at': health.get('started_at'),
+            'heartbeat_age': health.get('heartbeat_age'),
+            'stream_ages': health.get('streams', {}),
+            'total_klines': row[0],
+            'total_liquidations': row[1],
+            'last_update': row[2],
+            'last_candle_time': datetime.fromtimestamp(row[3]/1000) if row[3] else None
+        }
+
+    def _read_db_stats(self, conn):
+        kline_stats = conn.execute("SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM klines").fetchone()
+        liq_count = conn.execute("SELECT COUNT(*) FROM liquidations").fetchone()[0]
+        if not kline_stats or not kline_stats[0]:
+            return None
+        # Days moved to the Parquet archive still count towards the totals
+        totals = archive.archive_totals(conn)
+        archived_klines, archived_oldest, _ = totals.get('klines', (0, None, None))
+        archived_liqs = totals.get('liquidations', (0, None, None))[0]
+        oldest = datetime.fromtimestamp(min(filter(None, (kline_stats[1], archived_oldest)))/1000)
+        newest = datetime.fromtimestamp(kline_stats[2]/1000)
+        return {
+            'total_candles': kline_stats[0] + archived_klines,
+            'total_liquidations': liq_count + archived_liqs,
+            'archived_candles': archived_klines,
+            'archived_liquidations': archived_liqs,
+            'oldest_candle': oldest,
+            'newest_candle': newest,
+            'duration_hours': (newest - oldest).total_seconds() / 3600
+        }
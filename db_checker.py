@@ -6,8 +6,11 @@ Run this to check if klines and liquidations are being saved properly
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
+import archive
+import config
+import liveness
 
-DB_PATH = "btc_data.db"
+DB_PATH = config.DB_PATH
 
 def check_database():
     """Check database contents and status"""
@@ -29,13 +32,18 @@ def check_database():
         print("📈 KLINES DATA")
         print("=" * 40)
         
+        # Closed days moved to the Parquet archive are counted with the hot rows
+        archived = archive.archive_totals(conn)
+        archived_klines, archived_min_ts, _ = archived.get('klines', (0, None, None))
+        
         cursor.execute("SELECT COUNT(*) FROM klines")
         kline_count = cursor.fetchone()[0]
-        print(f"Total klines: {kline_count:,}")
+        print(f"Total klines: {kline_count + archived_klines:,} ({archived_klines:,} archived)")
         
         if kline_count > 0:
             cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM klines")
             min_ts, max_ts = cursor.fetchone()
+            min_ts = min(filter(None, (min_ts, archived_min_ts)))
             min_time = datetime.fromtimestamp(min_ts/1000)
             max_time = datetime.fromtimestamp(max_ts/1000)
             print(f"Date range: {min_time} to {max_time}")
@@ -59,13 +67,16 @@ def check_database():
         print("💥 LIQUIDATIONS DATA")
         print("=" * 40)
         
+        archived_liqs, archived_min_ts, _ = archived.get('liquidations', (0, None, None))
+        
         cursor.execute("SELECT COUNT(*) FROM liquidations")
         liq_count = cursor.fetchone()[0]
-        print(f"Total liquidations: {liq_count:,}")
+        print(f"Total liquidations: {liq_count + archived_liqs:,} ({archived_liqs:,} archived)")
         
         if liq_count > 0:
             cursor.execute("SELECT MIN(timestamp), MAX(timestamp) FROM liquidations")
             min_ts, max_ts = cursor.fetchone()
+            min_ts = min(filter(None, (min_ts, archived_min_ts)))
             min_time = datetime.fromtimestamp(min_ts/1000)
             max_time = datetime.fromtimestamp(max_ts/1000)
             print(f"Date range: {min_time} to {max_time}")
@@ -86,9 +97,12 @@ def check_database():
             
             # Liquidation stats
             cursor.execute("SELECT side, COUNT(*), SUM(amount) FROM liquidations GROUP BY side")
-            liq_stats = cursor.fetchall()
+            liq_stats = {side: (count, amount or 0.0) for side, count, amount in cursor.fetchall()}
+            for side, (count, amount) in archive.liquidation_side_totals(conn).items():
+                hot_count, hot_amount = liq_stats.get(side, (0, 0.0))
+                liq_stats[side] = (hot_count + count, hot_amount + amount)
             print("\n📊 Liquidation stats:")
-            for side, count, total_amount in liq_stats:
+            for side, (count, total_amount) in sorted(liq_stats.items()):
                 print(f"  {side}: {count:,} liquidations, ${total_amount:,.0f} total")
         
         # Check collector status
@@ -104,8 +118,15 @@ def check_database():
         status = cursor.fetchone()
         
         if status:
-            is_running, total_klines, total_liqs, last_update, last_kline_ts = status
-            print(f"Collector running: {'✅ Yes' if is_running else '❌ No'}")
+            _, total_klines, total_liqs, last_update, last_kline_ts = status
+            health = liveness.read_health(conn)
+            if health and health['alive']:
+                print(f"Collector running: ✅ Yes (pid {health['pid']} on {health['hostname']}, "
+                      f"heartbeat {health['heartbeat_age']:.0f}s ago)")
+                for stream, age in sorted(health['streams'].items()):
+                    print(f"  {stream}: last message {age:.0f}s ago")
+            else:
+                print("Collector running: ❌ No (no fresh heartbeat)")
             print(f"Total klines collected: {total_klines:,}")
             print(f"Total liquidations collected: {total_liqs:,}")
             print(f"Last update: {last_update}")
@@ -0,0 +1,236 @@
+"""
+Batched DB Writer - owns a single SQLite connection and persists queued events
+WebSocket callbacks only enqueue rows; this thread flushes them in batches.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+import compact
+import heatmap
+import rollups
+from storage import connect_writer
+
+KLINE = "kline"
+LIQUIDATION = "liquidation"
+
+_STOP = object()
+
+# "database is locked" retries per batch and the first backoff (doubled each time)
+LOCK_RETRIES = 6
+LOCK_BACKOFF_SECONDS = 0.1
+
+
+class BatchWriter:
+    """Drain an in-memory queue into SQLite using batched executemany transactions.
+
+    A batch is flushed when it reaches ``max_batch_rows`` rows or when the oldest
+    queued row has waited ``max_latency`` seconds, whichever comes first.
+    """
+
+    def __init__(self, db_path, max_batch_rows=500, max_latency=0.25, verbose=True, on_flush=None,
+                 on_commit=None):
+        self.db_path = db_path
+        self.max_batch_rows = max_batch_rows
+        self.max_latency = max_latency
+        self.verbose = verbose
+        # Called after each commit with (batch size, flush seconds, [enqueue times])
+        self.on_flush = on_flush
+        # Called after each commit with the committed (klines, liquidations) row tuples
+        self.on_commit = on_commit
+        self._queue = queue.Queue()
+        self._thread = None
+        self._conn = None
+        # Set when the database uses the fixed-point compact schema
+        self._encoder = None
+
+        # Stats from the most recent flush plus running totals
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.last_lock_wait_ms = 0.0
+        self.total_batches = 0
+        self.total_rows = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._thread = threading.Thread(target=self._run, daemon=True, name="DBWriter")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Flush everything still queued and close the connection"""
+        if not self._thread:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def flush(self):
+        """Block until every row queued so far has been committed"""
+        self._queue.join()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def put_kline(self, timestamp, symbol, open_price, high, low, close, volume, is_closed=True):
+        self._queue.put((KLINE, (timestamp, symbol, open_price, high, low, close, volume, int(is_closed)),
+                         time.monotonic()))
+
+    def put_liquidation(self, symbol, side, price, quantity, amount, timestamp):
+        self._queue.put((LIQUIDATION, (symbol, side, price, quantity, amount, timestamp), time.monotonic()))
+
+    def _run(self):
+        self._conn = connect_writer(self.db_path)
+        self._encoder = compact.Encoder() if compact.is_compact(self._conn) else None
+        try:
+            running = True
+            while running:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    break
+
+                batch = [item]
+                deadline = time.monotonic() + self.max_latency
+                while len(batch) < self.max_batch_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        self._queue.task_done()
+                        running = False
+                        break
+                    batch.append(item)
+
+                try:
+                    self._flush_or_salvage(batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def _flush_with_retry(self, batch):
+        """Flush, retrying with backoff while another connection holds the write lock"""
+        for attempt in range(LOCK_RETRIES + 1):
+            try:
+                return self._flush(batch)
+            except sqlite3.OperationalError as e:
+                if attempt == LOCK_RETRIES or not _is_lock_error(e):
+                    raise
+                time.sleep(LOCK_BACKOFF_SECONDS * 2 ** attempt)
+
+    def _flush_or_salvage(self, batch):
+        """Flush a batch; if it fails for any reason but the lock, write its rows one by one
+        so only the rows that fail on their own are dropped"""
+        try:
+            self._flush_with_retry(batch)
+            return
+        except sqlite3.OperationalError as e:
+            if _is_lock_error(e):
+                print(f"Error flushing batch of {len(batch)} rows, database stayed locked: {e}")
+                return
+            error = e
+        except Exception as e:
+            error = e
+        if len(batch) == 1:
+            print(f"Dropped {batch[0][0]} row {batch[0][1]}: {error}")
+            return
+        print(f"Error flushing batch of {len(batch)} rows ({error}), retrying row by row")
+        for item in batch:
+            try:
+                self._flush_with_retry([item])
+            except Exception as e:
+                print(f"Dropped {item[0]} row {item[1]}: {e}")
+
+    def _flush(self, batch):
+        klines = [row for kind, row, _ in batch if kind == KLINE]
+        liquidations = [row for kind, row, _ in batch if kind == LIQUIDATION]
+
+        start = time.perf_counter()
+        cursor = self._conn.cursor()
+        # Take the write lock up front so the wait for it can be measured
+        cursor.execute("BEGIN IMMEDIATE")
+        self.last_lock_wait_ms = (time.perf_counter() - start) * 1000
+        try:
+            if klines:
+                if self._encoder:
+                    cursor.executemany(compact.INSERT_KLINES, self._encoder.klines(cursor, klines))
+                else:
+                    cursor.executemany("""
+                        INSERT OR REPLACE INTO klines (timestamp, symbol, open, high, low, close, volume, is_closed)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, klines)
+                # The forming candle is rewritten many times; only closed candles count
+                closed = [row[0] for row in klines if row[7]]
+                if closed:
+                    cursor.execute("""
+                        UPDATE collector_state
+                        SET last_kline_timestamp = MAX(COALESCE(last_kline_timestamp, 0), ?),
+                            total_klines_collected = total_klines_collected + ?,
+                            last_update = CURRENT_TIMESTAMP
+                        WHERE id = 1
+                    """, (max(closed), len(closed)))
+
+            inserted_liqs = 0
+            if liquidations:
+                if self._encoder:
+                    cursor.executemany(compact.INSERT_LIQUIDATIONS, self._encoder.liquidations(cursor, liquidations))
+                else:
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO liquidations
+                        (symbol, side, price, quantity, amount, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, liquidations)
+                inserted_liqs = max(cursor.rowcount, 0)
+                if inserted_liqs > 0:
+                    cursor.execute("""
+                        UPDATE collector_state
+                        SET last_liquidation_timestamp = MAX(COALESCE(last_liquidation_timestamp, 0), ?),
+                            total_liquidations_collected = total_liquidations_collected + ?,
+                            last_update = CURRENT_TIMESTAMP
+                        WHERE id = 1
+                    """, (max(row[5] for row in liquidations), inserted_liqs))
+
+            # After the liquidations so this batch's events land in their buckets
+            closed_candles = [(row[1], row[0]) for row in klines if row[7]]
+            if closed_candles:
+                rollups.refresh_closed(cursor, closed_candles)
+                heatmap.refresh_closed(cursor, closed_candles)
+
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            if self._encoder:
+                self._encoder.reset()
+            raise
+
+        self.last_batch_size = len(batch)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        self.total_batches += 1
+        self.total_rows += len(batch)
+
+        if self.on_commit:
+            try:
+                self.on_commit(klines, liquidations)
+            except Exception as e:
+                print(f"Error in on_commit callback: {e}")
+
+        if self.on_flush:
+            self.on_flush(len(batch), self.last_flush_ms / 1000, [queued_at for _, _, queued_at in batch])
+
+        if self.verbose:
+            print(f"🗄️ Flushed batch: {len(klines)} klines, {inserted_liqs}/{len(liquidations)} liquidations "
+                  f"in {self.last_flush_ms:.1f} ms")
+
+
+def _is_lock_error(error):
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
@@ -0,0 +1,189 @@
+"""
+Message Decoders - turn raw WebSocket frames into compact event tuples
+Backends: msgspec (typed decoding straight into structs), orjson, stdlib json.
+The fastest installed backend is used unless COLLECTOR_DECODER names one.
+"""
+
+import json
+import os
+from typing import List, NamedTuple, Optional, Union
+
+from streams import stream_kind
+
+
+class KlineEvent(NamedTuple):
+    symbol: str
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    is_closed: bool
+
+
+class LiquidationEvent(NamedTuple):
+    symbol: str
+    side: str
+    price: float
+    quantity: float
+    amount: float
+    timestamp: int
+
+
+def _kline_from_dict(data):
+    kline = data.get('k')
+    if kline is None:
+        return None
+    return KlineEvent(kline['s'], kline['t'], float(kline['o']), float(kline['h']),
+                      float(kline['l']), float(kline['c']), float(kline['v']), kline['x'])
+
+
+def _liquidation_from_dict(data):
+    order = data.get('o')
+    if order is None:
+        return None
+    price = float(order['p'])
+    quantity = float(order['q'])
+    return LiquidationEvent(order['s'], order['S'], price, quantity, price * quantity, order['T'])
+
+
+class DictDecoder:
+    """Parse to dicts with any ``loads`` (stdlib json, orjson), then build events"""
+
+    def __init__(self, name, loads):
+        self.name = name
+        self._loads = loads
+
+    def decode_kline(self, message):
+        return _kline_from_dict(self._loads(message))
+
+    def decode_liquidation(self, message):
+        return _liquidation_from_dict(self._loads(message))
+
+    def decode_combined(self, message):
+        """Return (kind, [events]) for a combined-stream frame"""
+        frame = self._loads(message)
+        kind = stream_kind(frame.get('stream', ''))
+        build = _BUILDERS.get(kind)
+        if build is None:
+            return None, []
+        payload = frame['data']
+        events = (build(item) for item in (payload if isinstance(payload, list) else (payload,)))
+        return kind, [event for event in events if event is not None]
+
+
+_BUILDERS = {'kline': _kline_from_dict, 'forceOrder': _liquidation_from_dict}
+
+
+def _make_msgspec_decoder():
+    import msgspec
+
+    # Binance sends numbers as strings; strict=False lets msgspec parse them to float
+    class RawKline(msgspec.Struct):
+        t: int
+        s: str
+        o: float
+        h: float
+        l: float
+        c: float
+        v: float
+        x: bool
+
+    class KlineMessage(msgspec.Struct):
+        k: Optional[RawKline] = None
+
+    class RawOrder(msgspec.Struct):
+        s: str
+        S: str
+        p: float
+        q: float
+        T: int
+
+    class OrderMessage(msgspec.Struct):
+        o: Optional[RawOrder] = None
+
+    class CombinedFrame(msgspec.Struct):
+        stream: str = ''
+        data: msgspec.Raw = msgspec.Raw(b'null')
+
+    def to_kline(msg):
+        k = msg.k
+        if k is None:
+            return None
+        return KlineEvent(k.s, k.t, k.o, k.h, k.l, k.c, k.v, k.x)
+
+    def to_liquidation(msg):
+        o = msg.o
+        if o is None:
+            return None
+        return LiquidationEvent(o.s, o.S, o.p, o.q, o.p * o.q, o.T)
+
+    class MsgspecDecoder:
+        name = 'msgspec'
+
+        def __init__(self):
+            self._kline = msgspec.json.Decoder(KlineMessage, strict=False)
+            self._order = msgspec.json.Decoder(OrderMessage, strict=False)
+            self._orders = msgspec.json.Decoder(Union[List[OrderMessage], OrderMessage], strict=False)
+            self._frame = msgspec.json.Decoder(CombinedFrame)
+
+        def decode_kline(self, message):
+            return to_kline(self._kline.decode(message))
+
+        def decode_liquidation(self, message):
+            return to_liquidation(self._order.decode(message))
+
+        def decode_combined(self, message):
+            frame = self._frame.decode(message)
+            kind = stream_kind(frame.stream)
+            if kind == 'kline':
+                event = to_kline(self._kline.decode(frame.data))
+                return kind, [event] if event is not None else []
+            if kind == 'forceOrder':
+                payload = self._orders.decode(frame.data)
+                events = (to_liquidation(msg) for msg in (payload if isinstance(payload, list) else (payload,)))
+                return kind, [event for event in events if event is not None]
+            return None, []
+
+    return MsgspecDecoder()
+
+
+def _make_orjson_decoder():
+    import orjson
+    return DictDecoder('orjson', orjson.loads)
+
+
+def _make_stdlib_decoder():
+    return DictDecoder('json', json.loads)
+
+
+# Fastest first
+BACKENDS = {
+    'msgspec': _make_msgspec_decoder,
+    'orjson': _make_orjson_decoder,
+    'json': _make_stdlib_decoder,
+}
+
+
+def available_decoders():
+    """Every backend that can be constructed in this environment"""
+    decoders = {}
+    for name, factory in BACKENDS.items():
+        try:
+            decoders[name] = factory()
+        except ImportError:
+            pass
+    return decoders
+
+
+def get_decoder(name=None):
+    """Decoder for ``name`` (or COLLECTOR_DECODER), else the fastest one installed"""
+    name = name or os.environ.get('COLLECTOR_DECODER')
+    if name:
+        return BACKENDS[name]()
+    for factory in BACKENDS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
@@ -0,0 +1,182 @@
+"""
+Liquidation Heatmap - precomputed time x price-level grid of liquidated notional
+Rebuild: python heatmap.py [--db btc_data.db] [--symbol BTCUSDT]
+
+Price levels are on a log grid (LEVEL_STEP apart, ~5 bps) so one grid works
+across symbols and price regimes. Each (symbol, 5m bucket) row stores only the
+levels that saw liquidations, as little-endian int32/float32 blobs; the
+dashboard reads a whole window with one query and scatters it into a dense grid.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import config
+from rollups import TIMEFRAMES, closed_spans
+
+DB_PATH = config.DB_PATH
+
+BUCKET_MS = TIMEFRAMES["5m"]
+LEVEL_STEP = 0.0005
+_LOG_STEP = np.log1p(LEVEL_STEP)
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS liquidation_heatmap (
+        symbol TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        levels BLOB NOT NULL,
+        long_notional BLOB NOT NULL,
+        short_notional BLOB NOT NULL,
+        PRIMARY KEY (symbol, bucket)
+    ) WITHOUT ROWID
+"""
+
+
+def price_level(price):
+    """Log-grid level index for one price or an array of prices"""
+    return np.floor(np.log(price) / _LOG_STEP).astype(np.int32)
+
+
+def level_price(level):
+    """Lower edge price of a level"""
+    return np.exp(np.asarray(level, dtype=np.float64) * _LOG_STEP)
+
+
+def refresh_range(cursor, symbol, start_ms, end_ms):
+    """Recompute every heatmap bucket overlapping [start_ms, end_ms] for one symbol.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    lo = start_ms // BUCKET_MS * BUCKET_MS
+    hi = end_ms // BUCKET_MS * BUCKET_MS + BUCKET_MS
+    rows = cursor.execute("""
+        SELECT timestamp, side = 'SELL', price, amount FROM liquidations
+        WHERE symbol = ? AND timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    """, (symbol, lo, hi)).fetchall()
+    if not rows:
+        return 0
+
+    data = np.array(rows, dtype=np.float64)
+    buckets = data[:, 0].astype(np.int64) // BUCKET_MS * BUCKET_MS
+    is_long = data[:, 1].astype(bool)
+    levels = price_level(data[:, 2])
+    amount = data[:, 3]
+
+    long_amount = np.where(is_long, amount, 0)
+    short_amount = np.where(is_long, 0, amount)
+
+    # Rows are ordered by time, so each bucket is one contiguous slice
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    records = []
+    for first, last in zip(starts, np.r_[starts[1:], len(buckets)]):
+        unique_levels, index = np.unique(levels[first:last], return_inverse=True)
+        long_notional = np.bincount(index, weights=long_amount[first:last], minlength=len(unique_levels))
+        short_notional = np.bincount(index, weights=short_amount[first:last], minlength=len(unique_levels))
+        records.append((symbol, int(buckets[first]),
+                        unique_levels.astype('<i4').tobytes(),
+                        long_notional.astype('<f4').tobytes(),
+                        short_notional.astype('<f4').tobytes()))
+    cursor.executemany("""
+        INSERT OR REPLACE INTO liquidation_heatmap (symbol, bucket, levels, long_notional, short_notional)
+        VALUES (?, ?, ?, ?, ?)
+    """, records)
+    return len(records)
+
+
+def refresh_closed(cursor, closed):
+    """Refresh the buckets touched by newly closed 1m candles ``[(symbol, timestamp), ...]``"""
+    for symbol, lo, hi in closed_spans(closed):
+        refresh_range(cursor, symbol, lo, hi)
+
+
+def rebuild(conn, symbol=None, chunk_ms=TIMEFRAMES["1d"], pause_seconds=0.0, verbose=True):
+    """Recompute the heatmap from the liquidations table, one day per transaction"""
+    symbols = [symbol] if symbol else [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM liquidations")]
+    for sym in symbols:
+        first, last = conn.execute(
+            "SELECT MIN(timestamp), MAX(timestamp) FROM liquidations WHERE symbol = ?", (sym,)
+        ).fetchone()
+        if first is None:
+            continue
+        start = time.perf_counter()
+        written = 0
+        chunk_start = first // chunk_ms * chunk_ms
+        while chunk_start <= last:
+            written += refresh_range(conn.cursor(), sym, chunk_start, chunk_start + chunk_ms - 1)
+            conn.commit()
+            chunk_start += chunk_ms
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        if verbose:
+            print(f"  ↳ rebuilt {written:,} heatmap buckets for {sym} in {time.perf_counter() - start:.1f} s")
+
+
+def load_grid(conn, symbol, start_ms, end_ms, max_columns=600, max_rows=400):
+    """Dense grid for [start_ms, end_ms) from a single query.
+
+    Returns (bucket times in ms, level prices, long grid, short grid) where the
+    grids are shaped (levels, buckets), or None when there is nothing to show.
+    Adjacent buckets/levels are merged to stay within max_columns x max_rows.
+    """
+    rows = conn.execute("""
+        SELECT bucket, levels, long_notional, short_notional FROM liquidation_heatmap
+        WHERE symbol = ? AND bucket >= ? AND bucket < ?
+        ORDER BY bucket
+    """, (symbol, start_ms // BUCKET_MS * BUCKET_MS, end_ms)).fetchall()
+    if not rows:
+        return None
+
+    first_bucket = start_ms // BUCKET_MS * BUCKET_MS
+    n_buckets = max(1, -(-(end_ms - first_bucket) // BUCKET_MS))
+    time_factor = max(1, -(-n_buckets // max_columns))
+
+    columns = []
+    levels = []
+    long_values = []
+    short_values = []
+    for bucket, level_blob, long_blob, short_blob in rows:
+        bucket_levels = np.frombuffer(level_blob, dtype='<i4')
+        columns.append(np.full(len(bucket_levels), (bucket - first_bucket) // BUCKET_MS // time_factor))
+        levels.append(bucket_levels)
+        long_values.append(np.frombuffer(long_blob, dtype='<f4'))
+        short_values.append(np.frombuffer(short_blob, dtype='<f4'))
+    columns = np.concatenate(columns)
+    levels = np.concatenate(levels)
+
+    min_level = int(levels.min())
+    level_factor = max(1, -(-(int(levels.max()) - min_level + 1) // max_rows))
+    grid_rows = (levels - min_level) // level_factor
+    shape = (int(grid_rows.max()) + 1, -(-n_buckets // time_factor))
+
+    long_grid = np.zeros(shape, dtype=np.float64)
+    short_grid = np.zeros(shape, dtype=np.float64)
+    np.add.at(long_grid, (grid_rows, columns), np.concatenate(long_values))
+    np.add.at(short_grid, (grid_rows, columns), np.concatenate(short_values))
+
+    times = first_bucket + np.arange(shape[1], dtype=np.int64) * BUCKET_MS * time_factor
+    prices = level_price(min_level + np.arange(shape[0]) * level_factor)
+    return times, prices, long_grid, short_grid
+
+
+def main():
+    from storage import connect_writer
+
+    parser = argparse.ArgumentParser(description="Rebuild the liquidation heatmap grid")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--symbol", help="only this symbol (default: all)")
+    args = parser.parse_args()
+
+    conn = connect_writer(args.db)
+    try:
+        conn.execute(CREATE_TABLE)
+        rebuild(conn, args.symbol)
+    finally:
+        conn.close()
+    print("✅ Heatmap rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Liquidation Aggregation - bins liquidations by candle interval, side and price band
+Long-range charts draw one bubble per (bucket, side, band) instead of one per event.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import archive
+from rollups import TIMEFRAMES
+
+AGG_COLUMNS = ['bucket', 'side', 'band', 'count', 'amount', 'quantity', 'vwap']
+
+# Long liquidations are SELL orders
+_AGG_SQL = """
+    SELECT timestamp / :interval * :interval AS bucket, side,
+           CAST(price / :band AS INTEGER) * :band AS band,
+           COUNT(*) AS count, SUM(amount) AS amount, SUM(quantity) AS quantity,
+           SUM(price * quantity) / SUM(quantity) AS vwap
+    FROM liquidations
+    WHERE symbol = :symbol AND timestamp >= :start AND timestamp < :end
+    GROUP BY bucket, side, band
+    ORDER BY bucket
+"""
+
+
+def price_band(low, high, target_bands=40):
+    """Round band width (1/2/5 x 10^n) giving about ``target_bands`` bands over [low, high]"""
+    span = max(high - low, 1e-9) / target_bands
+    magnitude = 10 ** math.floor(math.log10(span))
+    for step in (1, 2, 5, 10):
+        if span <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def aggregate_frame(liquidations_df, interval_ms, band):
+    """Vectorized aggregation of an in-memory liquidation frame (same columns as the SQL path)"""
+    if liquidations_df.empty:
+        return pd.DataFrame(columns=AGG_COLUMNS)
+    price = liquidations_df['price'].to_numpy()
+    quantity = liquidations_df['quantity'].to_numpy()
+    frame = pd.DataFrame({
+        'bucket': liquidations_df['timestamp'].to_numpy() // interval_ms * interval_ms,
+        'side': liquidations_df['side'].to_numpy(),
+        'band': np.floor(price / band) * band,
+        'amount': liquidations_df['amount'].to_numpy(),
+        'quantity': quantity,
+        'notional': price * quantity,
+    })
+    grouped = frame.groupby(['bucket', 'side', 'band'], sort=True).agg(
+        count=('amount', 'size'), amount=('amount', 'sum'),
+        quantity=('quantity', 'sum'), notional=('notional', 'sum'),
+    ).reset_index()
+    grouped['vwap'] = grouped['notional'] / grouped['quantity']
+    return grouped[AGG_COLUMNS]
+
+
+def aggregate_to_budget(liquidations_df, band, budget, min_interval_ms=TIMEFRAMES["1m"]):
+    """Aggregate at the finest timeframe whose bubble count fits ``budget``"""
+    aggregates = None
+    for interval_ms in TIMEFRAMES.values():
+        if interval_ms < min_interval_ms:
+            continue
+        aggregates = aggregate_frame(liquidations_df, interval_ms, band)
+        if len(aggregates) <= budget:
+            break
+    return aggregates
+
+
+class LiquidationAggregator:
+    """SQL aggregation with an LRU cache of closed ranges.
+
+    Buckets before the current (still open) interval never change, so that part
+    of a request is cached per (symbol, range, timeframe, band) and only the open
+    bucket is re-queried on each call. Safe to share between sessions.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _query(self, conn, symbol, start_ms, end_ms, interval_ms, band):
+        if end_ms <= start_ms:
+            return pd.DataFrame(columns=AGG_COLUMNS)
+        # archive_day logs a day before deleting its hot rows (in paused batches,
+        # possibly interrupted), so hot rows of archived days are skipped, not
+        # counted twice
+        archived_until = archive.archived_until(conn, 'liquidations', symbol)
+        hot_start = max(start_ms, archived_until or 0)
+        hot = pd.read_sql_query(_AGG_SQL, conn, params={
+            'symbol': symbol, 'start': hot_start, 'end': end_ms, 'interval': interval_ms, 'band': band,
+        })
+        cold = archive.read_archive(conn, 'liquidations', symbol, start_ms, end_ms)
+        if cold.empty:
+            return hot
+        # Archived days are whole UTC days and buckets are at most one day wide,
+        # so cold and hot buckets don't overlap either
+        cold = aggregate_frame(cold, interval_ms, band)
+        if hot.empty:
+            return cold
+        return pd.concat([cold, hot], ignore_index=True).sort_values('bucket', kind='stable', ignore_index=True)
+
+    def load(self, conn, symbol, start_ms, end_ms, interval_ms, band, now_ms=None):
+        """Aggregates for [start_ms, end_ms); the returned frame must not be modified in place"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed_end = min(end_ms, now_ms // interval_ms * interval_ms)
+
+        key = (symbol, start_ms, closed_end, interval_ms, band)
+        with self._lock:
+            closed = self._cache.get(key)
+            if closed is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if closed is None:
+            closed = self._query(conn, symbol, start_ms, closed_end, interval_ms, band)
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = closed
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        open_part = self._query(conn, symbol, max(start_ms, closed_end), end_ms, interval_ms, band)
+        if open_part.empty:
+            return closed
+        if closed.empty:
+            return open_part
+        return pd.concat([closed, open_part], ignore_index=True)
@@ -0,0 +1,67 @@
+"""
+Incremental Liquidation Tail - keeps a rolling liquidation window in memory
+Only rows newer than the last seen id are read on each refresh; rows that
+fall out of the time window are evicted from the front.
+"""
+
+import time
+
+import pandas as pd
+
+COLUMNS = ['id', 'symbol', 'side', 'price', 'quantity', 'amount', 'timestamp']
+
+
+class LiquidationTail:
+    """Rolling window of liquidations for one symbol, refreshed incrementally.
+
+    ``liquidations.id`` is AUTOINCREMENT, so ``id > last_id`` picks up every row
+    committed since the previous refresh even if its exchange timestamp is older.
+    The returned frame is shared with the tail and must not be modified in place.
+    """
+
+    def __init__(self, window_ms, symbol='BTCUSDT', max_rows=200_000):
+        self.window_ms = window_ms
+        self.symbol = symbol
+        self.max_rows = max_rows
+        self.last_id = None
+        self.frame = pd.DataFrame(columns=COLUMNS + ['time'])
+
+    def refresh(self, conn, now_ms=None):
+        """Fetch rows added since the last call and return the current window"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        cutoff = now_ms - self.window_ms
+
+        # Anchor on the current max id first; anything committed after this
+        # point is picked up by the next refresh
+        max_id = conn.execute("SELECT MAX(id) FROM liquidations").fetchone()[0] or 0
+
+        if self.last_id is None:
+            new_rows = pd.read_sql_query("""
+                SELECT id, symbol, side, price, quantity, amount, timestamp
+                FROM liquidations
+                WHERE timestamp >= ? AND symbol = ? AND id <= ?
+                ORDER BY timestamp ASC
+            """, conn, params=(cutoff, self.symbol, max_id))
+        else:
+            new_rows = pd.read_sql_query("""
+                SELECT id, symbol, side, price, quantity, amount, timestamp
+                FROM liquidations
+                WHERE id > ? AND id <= ? AND symbol = ? AND timestamp >= ?
+                ORDER BY id ASC
+            """, conn, params=(self.last_id, max_id, self.symbol, cutoff))
+        self.last_id = max_id
+
+        frame = self.frame
+        if not new_rows.empty:
+            new_rows = new_rows.sort_values('timestamp', kind='stable')
+            new_rows['time'] = pd.to_datetime(new_rows['timestamp'], unit='ms')
+            frame = new_rows if frame.empty else pd.concat([frame, new_rows], ignore_index=True)
+
+        # Evict from the front only when something actually expired
+        if not frame.empty and frame['timestamp'].min() < cutoff:
+            frame = frame[frame['timestamp'] >= cutoff].reset_index(drop=True)
+        if len(frame) > self.max_rows:
+            frame = frame.iloc[-self.max_rows:].reset_index(drop=True)
+
+        self.frame = frame
+        return frame
@@ -0,0 +1,303 @@
+"""
+Live Ring Buffer - memory-mapped columnar window of recent candles and liquidations
+The collector's writer thread mirrors every committed row into one fixed-size
+file per symbol (<DB_PATH>.<SYMBOL>.ring); the dashboard maps it read-only and
+builds its live frames without running SQL.
+
+Layout: a 64-byte header, then CANDLE_SLOTS candle records and LIQUIDATION_SLOTS
+liquidation records as little-endian NumPy structured arrays.
+- Candles are direct-mapped by minute (slot = minute % CANDLE_SLOTS), so the
+  forming candle and backfilled gaps overwrite their own slot.
+- Liquidations are appended at ``liquidation_seq % LIQUIDATION_SLOTS``.
+The header ``version`` is a sequence lock: odd while the writer is mid-update,
+so a reader retries instead of returning a torn window.
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"LIVERNG1"
+MINUTE_MS = 60_000
+CANDLE_SLOTS = 1440
+LIQUIDATION_SLOTS = 65_536
+# A ring not written for this long is a leftover (collector stopped, symbol no
+# longer collected, ring disabled); the kline stream updates it several times a second
+STALE_MS = 10_000
+
+HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u8"),
+    ("candle_slots", "<u4"),
+    ("liquidation_slots", "<u4"),
+    ("newest_candle", "<i8"),
+    ("liquidation_seq", "<u8"),
+    ("seeded_at", "<i8"),
+    ("updated_at", "<i8"),
+    ("reserved", "<u8"),
+])
+CANDLE = np.dtype([
+    ("timestamp", "<i8"), ("open", "<f8"), ("high", "<f8"),
+    ("low", "<f8"), ("close", "<f8"), ("volume", "<f8"),
+])
+# side: 1 = SELL (long liquidated), 0 = BUY
+LIQUIDATION = np.dtype([
+    ("timestamp", "<i8"), ("price", "<f8"), ("quantity", "<f8"), ("amount", "<f8"), ("side", "<u8"),
+])
+
+
+
+def ring_path(db_path, symbol):
+    return f"{db_path}.{symbol}.ring"
+
+
+def _file_size(candle_slots, liquidation_slots):
+    return HEADER.itemsize + CANDLE.itemsize * candle_slots + LIQUIDATION.itemsize * liquidation_slots
+
+
+def _views(buffer, candle_slots, liquidation_slots):
+    header = np.ndarray((), HEADER, buffer, 0)
+    candles = np.ndarray((candle_slots,), CANDLE, buffer, HEADER.itemsize)
+    liquidations = np.ndarray((liquidation_slots,), LIQUIDATION, buffer,
+                              HEADER.itemsize + CANDLE.itemsize * candle_slots)
+    return header, candles, liquidations
+
+
+class RingWriter:
+    """Single-writer side for one symbol; call only from one thread (the DB writer)"""
+
+    def __init__(self, path, candle_slots=CANDLE_SLOTS, liquidation_slots=LIQUIDATION_SLOTS):
+        self.path = path
+        # Always start from a fresh file (seed() fills it from SQLite). It is built
+        # under a temporary name and renamed, so a reader still mapping the old
+        # file keeps a valid mapping and picks up the new inode on its next read.
+        temp_path = f"{path}.tmp"
+        self._map = np.memmap(temp_path, dtype=np.uint8, mode="w+",
+                              shape=(_file_size(candle_slots, liquidation_slots),))
+        self.header, self.candles, self.liquidations = _views(self._map, candle_slots, liquidation_slots)
+        self.header["magic"] = MAGIC
+        self.header["candle_slots"] = candle_slots
+        self.header["liquidation_slots"] = liquidation_slots
+        self.candles["timestamp"] = -1
+        self._map.flush()
+        os.replace(temp_path, path)
+
+    def _begin(self):
+        self.header["version"] += 1
+
+    def _end(self):
+        self.header["updated_at"] = int(time.time() * 1000)
+        self.header["version"] += 1
+
+    def seed(self, conn, symbol):
+        """Load the newest candles and liquidations from SQLite before live writes start"""
+        candle_slots = int(self.header["candle_slots"])
+        klines = conn.execute("""
+            SELECT timestamp, open, high, low, close, volume FROM klines
+            WHERE symbol = ? ORDER BY timestamp DESC LIMIT ?
+        """, (symbol, candle_slots)).fetchall()
+        liquidations = conn.execute("""
+            SELECT timestamp, price, quantity, amount, side = 'SELL' FROM (
+                SELECT id, timestamp, price, quantity, amount, side FROM liquidations
+                WHERE symbol = ? ORDER BY id DESC LIMIT ?
+            ) ORDER BY id
+        """, (symbol, int(self.header["liquidation_slots"]))).fetchall()
+        self._begin()
+        self._put_candles(klines)
+        self._put_liquidations(liquidations)
+        self.header["seeded_at"] = int(time.time() * 1000)
+        self._end()
+
+    def write(self, klines, liquidations):
+        """Mirror committed rows: klines (timestamp, o, h, l, c, v), liquidations (timestamp, price, qty, amount, is_sell)"""
+        if not klines and not liquidations:
+            return
+        self._begin()
+        self._put_candles(klines)
+        self._put_liquidations(liquidations)
+        self._end()
+
+    def _put_candles(self, klines):
+        if not klines:
+            return
+        rows = np.array(klines, dtype=np.float64).reshape(-1, 6)
+        timestamps = rows[:, 0].astype(np.int64)
+        slots = timestamps // MINUTE_MS % len(self.candles)
+        self.candles["timestamp"][slots] = timestamps
+        for i, field in enumerate(CANDLE.names[1:], start=1):
+            self.candles[field][slots] = rows[:, i]
+        self.header["newest_candle"] = max(int(self.header["newest_candle"]), int(timestamps.max()))
+
+    def _put_liquidations(self, liquidations):
+        if not liquidations:
+            return
+        rows = np.array(liquidations, dtype=np.float64).reshape(-1, 5)
+        seq = int(self.header["liquidation_seq"]) + len(rows)
+        rows = rows[-len(self.liquidations):]
+        slots = (seq - len(rows) + np.arange(len(rows))) % len(self.liquidations)
+        self.liquidations["timestamp"][slots] = rows[:, 0].astype(np.int64)
+        self.liquidations["price"][slots] = rows[:, 1]
+        self.liquidations["quantity"][slots] = rows[:, 2]
+        self.liquidations["amount"][slots] = rows[:, 3]
+        self.liquidations["side"][slots] = rows[:, 4].astype(np.uint64)
+        self.header["liquidation_seq"] = seq
+
+    def close(self):
+        self._map.flush()
+        del self._map
+
+
+class RingSet:
+    """One RingWriter per tracked symbol; a BatchWriter ``on_commit`` callback"""
+
+    def __init__(self, db_path, symbols):
+        self.rings = {symbol: RingWriter(ring_path(db_path, symbol)) for symbol in symbols}
+
+    def seed(self, conn):
+        for symbol, ring in self.rings.items():
+            ring.seed(conn, symbol)
+        return self
+
+    def __call__(self, klines, liquidations):
+        """Route BatchWriter rows (kline and liquidation tuples as queued) to their rings"""
+        for symbol, ring in self.rings.items():
+            ring.write(
+                [row[0:1] + row[2:7] for row in klines if row[1] == symbol],
+                [(row[5], row[2], row[3], row[4], row[1] == 'SELL') for row in liquidations if row[0] == symbol],
+            )
+
+    def close(self):
+        for ring in self.rings.values():
+            ring.close()
+
+
+class RingReader:
+    """Read-only view of one symbol's ring; returns None whenever SQL should be used instead"""
+
+    def __init__(self, path, symbol, retries=100):
+        self.path = path
+        self.symbol = symbol
+        self.retries = retries
+        self._map = None
+        self._inode = None
+
+    def _open(self):
+        """(Re)map the file; a restarted collector replaces it with a new inode"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._map = None
+            return False
+        if self._map is not None and stat.st_ino == self._inode:
+            return True
+        if stat.st_size < HEADER.itemsize:
+            return False
+        buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        header = np.ndarray((), HEADER, buffer, 0)
+        if header["magic"] != MAGIC or \
+                buffer.size != _file_size(int(header["candle_slots"]), int(header["liquidation_slots"])):
+            return False
+        self._map = buffer
+        self._inode = stat.st_ino
+        self.header, self.candles, self.liquidations = _views(
+            buffer, int(header["candle_slots"]), int(header["liquidation_slots"]))
+        return True
+
+    def version(self):
+        """Header sequence number (changes on every write), or None if unavailable"""
+        if not self._open():
+            return None
+        return int(self.header["version"])
+
+    def is_current(self, now_ms=None, max_age_ms=STALE_MS, not_before_ms=None):
+        """Whether the ring is seeded, written within ``max_age_ms`` and seeded at or after
+        ``not_before_ms`` (the running collector's start, so a previous run's file is ignored)"""
+        if not self._open() or not self.header["seeded_at"]:
+            return False
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if now_ms - int(self.header["updated_at"]) > max_age_ms:
+            return False
+        return not_before_ms is None or int(self.header["seeded_at"]) >= not_before_ms
+
+    def read(self, candle_limit, window_ms, now_ms=None, max_age_ms=STALE_MS, not_before_ms=None):
+        """(klines frame, liquidations frame) or None if the ring can't serve the request"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        if not self.is_current(now_ms, max_age_ms, not_before_ms):
+            return None
+        cutoff = now_ms - window_ms
+        for _ in range(self.retries):
+            version = int(self.header["version"])
+            if version % 2:
+                continue
+            newest = int(self.header["newest_candle"])
+            seq = int(self.header["liquidation_seq"])
+            candles = self.candles.copy()
+            liquidations, first_seq = self._recent_liquidations(seq, cutoff)
+            if int(self.header["version"]) == version:
+                break
+        else:
+            return None
+
+        # A full ring must still reach back to the start of the window
+        full = min(seq, len(self.liquidations)) == len(self.liquidations)
+        if full and first_seq == seq - len(self.liquidations) and \
+                len(liquidations) and liquidations["timestamp"].min() > cutoff:
+            return None
+        return self._kline_frame(candles, newest, candle_limit), \
+            self._liquidation_frame(liquidations, first_seq, cutoff)
+
+    def _recent_liquidations(self, seq, cutoff, chunk=1024):
+        """Copy of the newest liquidations back to ``cutoff`` (in append order) and the seq of the first"""
+        capacity = len(self.liquidations)
+        count = min(seq, capacity)
+        timestamps = self.liquidations["timestamp"]
+        take = min(count, chunk)
+        # Appends are close to time order, so stop once the oldest chunk predates the window
+        while take < count and timestamps[(seq - take + np.arange(chunk)) % capacity].min() >= cutoff:
+            take = min(count, take * 2)
+        first = (seq - take) % capacity
+        if first + take <= capacity:
+            return self.liquidations[first:first + take].copy(), seq - take
+        return np.concatenate([self.liquidations[first:], self.liquidations[:first + take - capacity]]), seq - take
+
+    def _kline_frame(self, candles, newest, limit):
+        timestamps = candles["timestamp"]
+        # Unused slots hold -1; slots older than one lap hold stale minutes
+        valid = np.flatnonzero((timestamps >= 0) & (timestamps > newest - len(candles) * MINUTE_MS))
+        index = valid[np.argsort(timestamps[valid])[-limit:]]
+        timestamps = timestamps[index]
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            'Open': candles["open"][index], 'High': candles["high"][index], 'Low': candles["low"][index],
+            'Close': candles["close"][index], 'Volume': candles["volume"][index],
+            'Date': _datetimes(timestamps),
+        }, copy=False)
+
+    def _liquidation_frame(self, liquidations, first_seq, cutoff):
+        timestamps = liquidations["timestamp"]
+        if np.all(timestamps[1:] >= timestamps[:-1]):
+            # Usual case: appended in time order, so the window is a tail slice
+            index = slice(np.searchsorted(timestamps, cutoff), None)
+        else:
+            keep = np.flatnonzero(timestamps >= cutoff)
+            index = keep[np.argsort(timestamps[keep], kind="stable")]
+        ids = np.arange(first_seq, first_seq + len(liquidations), dtype=np.int64)[index]
+        timestamps = timestamps[index]
+        return pd.DataFrame({
+            'id': ids,
+            'symbol': self.symbol,
+            'side': _SIDES[liquidations["side"][index]],
+            'price': liquidations["price"][index], 'quantity': liquidations["quantity"][index],
+            'amount': liquidations["amount"][index], 'timestamp': timestamps,
+            'time': _datetimes(timestamps),
+        }, copy=False)
+
+
+_SIDES = np.array(['BUY', 'SELL'], dtype=object)
+
+
+def _datetimes(timestamps):
+    """Epoch milliseconds -> datetime64[ns] without going through pd.to_datetime"""
+    return (timestamps.astype(np.int64) * 1_000_000).view('datetime64[ns]')
@@ -0,0 +1,239 @@
+"""
+Collector Liveness - single-collector lease with heartbeats
+The collector holds an OS file lock next to the database (one collector per host)
+and a lease row in collector_lease that it heartbeats every few seconds together
+with per-stream last-message times. The dashboard reads that one row to decide
+whether a collector is alive instead of trusting a flag that is never cleared
+when a process dies.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from storage import connect_writer
+
+try:
+    import fcntl
+except ImportError:  # Windows: rely on the database lease alone
+    fcntl = None
+
+# Seconds without a heartbeat before a lease counts as abandoned
+LEASE_TTL = 30
+HEARTBEAT_INTERVAL = 5
+# How long to keep trying for the file lock; lock_held() probes hold it briefly
+LOCK_WAIT_SECONDS = 1.0
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS collector_lease (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        owner TEXT,
+        pid INTEGER,
+        hostname TEXT,
+        started_at REAL,
+        heartbeat REAL,
+        streams TEXT
+    )
+"""
+
+
+def lock_path(db_path):
+    return f"{os.path.abspath(db_path)}.collector.lock"
+
+
+def lock_held(db_path):
+    """True when a collector process on this host holds the file lock"""
+    if fcntl is None or not os.path.exists(lock_path(db_path)):
+        return False
+    with open(lock_path(db_path), "a+") as lock_file:
+        # Shared, so concurrent probes don't see each other as a collector
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+
+class LeaseHeld(Exception):
+    """Another live collector owns the database"""
+
+
+class CollectorLease:
+    """Acquire, heartbeat and release the collector lease for ``db_path``.
+
+    ``stream_times`` is an optional callable returning {stream: unix time of
+    the last message}, stored with every heartbeat. Times are wall-clock so the
+    dashboard process can compare them with its own clock.
+    """
+
+    def __init__(self, db_path, ttl=LEASE_TTL, interval=HEARTBEAT_INTERVAL, stream_times=None):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.interval = interval
+        self.stream_times = stream_times
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lost = False
+        self._lock_file = None
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _acquire_file_lock(self):
+        if fcntl is None:
+            return
+        lock_file = open(lock_path(self.db_path), "a+")
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                # A dashboard's lock_held() probe lets go within milliseconds
+                if time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    continue
+            lock_file.seek(0)
+            holder = lock_file.read().strip() or "unknown"
+            lock_file.close()
+            raise LeaseHeld(f"another collector holds {lock_path(self.db_path)} ({holder})")
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(self.owner)
+        lock_file.flush()
+        self._lock_file = lock_file
+
+    def _check_lease(self, row, now):
+        """Raise LeaseHeld if ``row`` (owner, pid, hostname, heartbeat) is a live lease of another collector"""
+        # Holding the file lock proves a same-host owner is gone, so only a
+        # fresh lease from another host blocks us
+        same_host_dead = self._lock_file is not None and row and row[2] == socket.gethostname()
+        if row and row[0] and row[0] != self.owner and row[3] and now - row[3] < self.ttl \
+                and not same_host_dead:
+            raise LeaseHeld(f"collector pid {row[1]} on {row[2]} heartbeat {now - row[3]:.0f}s ago")
+
+    def lock(self):
+        """Take the file lock and check for a live lease without writing anything.
+
+        Call before schema migrations so two starting collectors never migrate at once;
+        acquire() then writes the lease row once the collector_lease table exists.
+        """
+        if self._lock_file is None:
+            self._acquire_file_lock()
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute(
+                    "SELECT owner, pid, hostname, heartbeat FROM collector_lease WHERE id = 1"
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None  # database from before the lease migration
+            finally:
+                conn.close()
+            self._check_lease(row, time.time())
+        except Exception:
+            self._release_file_lock()
+            raise
+        return self
+
+    def acquire(self):
+        """Take the lease or raise LeaseHeld; expired leases are taken over"""
+        if self._lock_file is None:
+            self._acquire_file_lock()
+        self._conn = connect_writer(self.db_path)
+        now = time.time()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT owner, pid, hostname, heartbeat FROM collector_lease WHERE id = 1"
+            ).fetchone()
+            try:
+                self._check_lease(row, now)
+            except LeaseHeld:
+                self._conn.rollback()
+                raise
+            self._conn.execute("""
+                INSERT OR REPLACE INTO collector_lease (id, owner, pid, hostname, started_at, heartbeat, streams)
+                VALUES (1, ?, ?, ?, ?, ?, '{}')
+            """, (self.owner, os.getpid(), socket.gethostname(), now, now))
+            self._conn.commit()
+        except LeaseHeld:
+            self._release_file_lock()
+            raise
+        except Exception:
+            self._conn.rollback()
+            self._release_file_lock()
+            raise
+        return self
+
+    def heartbeat(self):
+        streams = self.stream_times() if self.stream_times else {}
+        cursor = self._conn.execute("""
+            UPDATE collector_lease SET heartbeat = ?, streams = ?
+            WHERE id = 1 AND owner = ?
+        """, (time.time(), json.dumps(streams), self.owner))
+        self._conn.commit()
+        if cursor.rowcount == 0 and not self.lost:
+            self.lost = True
+            print("⚠️ Collector lease was taken over by another process")
+
+    def start(self):
+        """Heartbeat on a daemon thread until release()"""
+        self._thread = threading.Thread(target=self._run, daemon=True, name="LeaseHeartbeat")
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"Error writing collector heartbeat: {e}")
+
+    def release(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        if self._conn is not None:
+            try:
+                self._conn.execute("UPDATE collector_lease SET heartbeat = NULL WHERE id = 1 AND owner = ?",
+                                   (self.owner,))
+                self._conn.commit()
+            except Exception as e:
+                print(f"Error releasing collector lease: {e}")
+            self._conn.close()
+            self._conn = None
+        self._release_file_lock()
+
+    def _release_file_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def read_health(conn, ttl=LEASE_TTL, now=None):
+    """Collector health from the lease row, or None before the table exists"""
+    now = now if now is not None else time.time()
+    try:
+        row = conn.execute(
+            "SELECT pid, hostname, started_at, heartbeat, streams FROM collector_lease WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if not row:
+        return {'alive': False, 'pid': None, 'hostname': None, 'heartbeat_age': None, 'streams': {}}
+    pid, hostname, started_at, heartbeat, streams = row
+    heartbeat_age = now - heartbeat if heartbeat else None
+    return {
+        'alive': heartbeat_age is not None and heartbeat_age < ttl,
+        'pid': pid,
+        'hostname': hostname,
+        'started_at': started_at,
+        'heartbeat_age': heartbeat_age,
+        'streams': {name: now - seen for name, seen in json.loads(streams or '{}').items()},
+    }
@@ -1,49 +1,74 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import sqlite3
 from datetime import datetime, timedelta, timezone
 import subprocess
 import threading
 import time
 import os
+import sys
+from storage import ReadOnlyPool
+import config
+from liquidation_tail import LiquidationTail
+from data_hub import DataHub
+from rollups import TIMEFRAMES
+import heatmap
+import live_ring
+import liveness
+from liquidation_agg import LiquidationAggregator, aggregate_to_budget, price_band
 
-DB_PATH = "btc_data.db"
+DB_PATH = config.DB_PATH
+WEBGL_POINT_THRESHOLD = config.WEBGL_POINT_THRESHOLD
+LIQUIDATION_POINT_BUDGET = config.LIQUIDATION_POINT_BUDGET
+DASHBOARD_REFRESH_SECONDS = config.DASHBOARD_REFRESH_SECONDS
+# Matches the data hub's database statistics interval
+STATS_REFRESH_SECONDS = 15
 
-# Global variable to track if data collector is running
-_data_collector_started = False
+# Dashboard label -> kline interval; everything above 1m reads the rollup table
+TIMEFRAME_OPTIONS = {
+    "1 Minute": "1m",
+    "5 Minutes": "5m",
+    "15 Minutes": "15m",
+    "1 Hour": "1h",
+    "4 Hours": "4h",
+    "1 Day": "1d",
+}
+
+# Collector output goes here instead of an unread pipe that would eventually block it
+COLLECTOR_LOG = "data_collector.log"
+
+@st.cache_resource
+def get_collector_spawn():
+    """Process-wide record of the last collector this server spawned"""
+    return {'spawned_at': 0.0, 'lock': threading.Lock()}
 
 def start_data_collector():
-    """Start data collector in background if not already running"""
-    global _data_collector_started
-    
-    if _data_collector_started:
-        return
-    
-    try:
-        # Check if data collector is already running
-        status = get_collector_status()
-        if status and status['is_running']:
-            _data_collector_started = True
+    """Start data collector in background unless a live one holds the lease"""
+    spawn = get_collector_spawn()
+    with spawn['lock']:
+        # A spawned collector needs a few seconds to take the lease; don't
+        # start another while it may still be coming up
+        if time.time() - spawn['spawned_at'] < liveness.LEASE_TTL:
             return
-        
-        # Start data collector in background using Popen
         try:
-            process = subprocess.Popen(
-                ["python", "data_collector.py"], 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                stdin=subprocess.PIPE
-            )
-            _data_collector_started = True
-            print("✅ Data collector started in background")
+            status = get_collector_status()
+            if (status and status['is_running']) or liveness.lock_held(DB_PATH):
+                return
+            
+            with open(COLLECTOR_LOG, "ab") as log:
+                subprocess.Popen(
+                    [sys.executable, "data_collector.py"],
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    stdin=subprocess.DEVNULL
+                )
+            spawn['spawned_at'] = time.time()
+            print(f"✅ Data collector started in background (log: {COLLECTOR_LOG})")
         except Exception as e:
             print(f"❌ Failed to start data collector: {e}")
             st.error(f"Failed to start data collector: {e}")
-        
-    except Exception as e:
-        st.error(f"Failed to start data collector: {e}")
 
 st.set_page_config(
     page_title="BTC/USDT Live Dashboard",
@@ -77,134 +102,262 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=5)
-def get_klines_from_api(limit=100):
-    """Get klines directly from Binance API"""
+@st.cache_resource
+def get_read_pool():
+    """Read-only connection pool shared by every session and rerun"""
+    return ReadOnlyPool(DB_PATH)
+
+@st.cache_resource
+def get_data_hub():
+    """Live candles, liquidation window and status, refreshed once for all sessions"""
+    ring = live_ring.RingReader(live_ring.ring_path(DB_PATH, 'BTCUSDT'), 'BTCUSDT') if config.LIVE_RING else None
+    return DataHub(get_read_pool(), ring=ring).start()
+
+def get_klines_from_db(limit=100, symbol='BTCUSDT', interval='1m'):
+    """Get the latest klines (including the forming candle) from the local store.
+
+    Intervals above 1m come from the kline_rollups table, with the forming 1m
+    candle merged into the newest bucket. The live 1m view comes straight from
+    the shared data hub.
+    """
     try:
-        import requests
-        url = "https://fapi.binance.com/fapi/v1/klines"
-        params = {
-            "symbol": "BTCUSDT",
-            "interval": "1m",
-            "limit": limit
-        }
+        hub = get_data_hub()
+        if interval == '1m' and limit == hub.candle_limit and symbol == hub.symbol:
+            return hub.snapshot().klines
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        with get_read_pool().connection() as conn:
+            if interval == '1m':
+                df = pd.read_sql_query("""
+                    SELECT timestamp, open, high, low, close, volume FROM (
+                        SELECT timestamp, open, high, low, close, volume
+                        FROM klines
+                        WHERE symbol = ?
+                        ORDER BY timestamp DESC
+                        LIMIT ?
+                    ) ORDER BY timestamp ASC
+                """, conn, params=(symbol, limit))
+            else:
+                df = pd.read_sql_query("""
+                    SELECT timestamp, open, high, low, close, volume,
+                           long_liq_count, long_liq_notional, short_liq_count, short_liq_notional
+                    FROM (
+                        SELECT bucket AS timestamp, open, high, low, close, volume,
+                               long_liq_count, long_liq_notional, short_liq_count, short_liq_notional
+                        FROM kline_rollups
+                        WHERE interval = ? AND symbol = ?
+                        ORDER BY bucket DESC
+                        LIMIT ?
+                    ) ORDER BY timestamp ASC
+                """, conn, params=(interval, symbol, limit))
+                forming = conn.execute("""
+                    SELECT timestamp, open, high, low, close, volume FROM klines
+                    WHERE symbol = ? AND is_closed = 0
+                    ORDER BY timestamp DESC LIMIT 1
+                """, (symbol,)).fetchone()
+                if forming:
+                    df = merge_forming_candle(df, forming, TIMEFRAMES[interval])
         
-        if data:
-            df = pd.DataFrame(data, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            df['Date'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df = df.rename(columns={
-                'open': 'Open',
-                'high': 'High', 
-                'low': 'Low',
-                'close': 'Close',
-                'volume': 'Volume'
-            })
-            
-            # Convert to numeric
-            for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                df[col] = pd.to_numeric(df[col])
-                
-            return df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
-        return pd.DataFrame()
+        if df.empty:
+            return pd.DataFrame()
+        
+        df['Date'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df = df.rename(columns={
+            'open': 'Open',
+            'high': 'High', 
+            'low': 'Low',
+            'close': 'Close',
+            'volume': 'Volume'
+        })
+        extra = [c for c in df.columns if c.endswith(('_liq_count', '_liq_notional'))]
+        return df[['Date', 'Open', 'High', 'Low', 'Close', 'Volume'] + extra]
     except Exception as e:
-        st.error(f"Error fetching klines from API: {e}")
+        st.error(f"Error loading klines: {e}")
         return pd.DataFrame()
 
-@st.cache_data(ttl=5)
+def merge_forming_candle(df, forming, width):
+    """Fold the forming 1m candle into the newest rollup bucket (or start a new one)"""
+    timestamp, open_, high, low, close, volume = forming
+    bucket = timestamp // width * width
+    if not df.empty and df['timestamp'].iloc[-1] == bucket:
+        last = df.index[-1]
+        df.loc[last, 'high'] = max(df.at[last, 'high'], high)
+        df.loc[last, 'low'] = min(df.at[last, 'low'], low)
+        df.loc[last, 'close'] = close
+        df.loc[last, 'volume'] += volume
+    elif df.empty or df['timestamp'].iloc[-1] < bucket:
+        row = {'timestamp': bucket, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+               'long_liq_count': 0, 'long_liq_notional': 0.0, 'short_liq_count': 0, 'short_liq_notional': 0.0}
+        df = pd.DataFrame([row]) if df.empty else pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    return df
+
 def get_liquidations_from_db(hours=24):
-    """Get recent liquidations from database for the same timeframe as candles"""
+    """Get recent liquidations for the same timeframe as candles.
+
+    The dashboard window is served from the shared data hub; other windows
+    are kept in session state and only rows newer than the last seen id are
+    read on each rerun.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        # Convert hours to milliseconds to match the klines timeframe
-        cutoff_timestamp = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+        window_ms = int(hours * 3600 * 1000)
+        hub = get_data_hub()
+        if window_ms == hub.liquidation_window_ms:
+            return hub.snapshot().liquidations
         
-        query = """
-            SELECT symbol, side, price, quantity, amount, timestamp
-            FROM liquidations
-            WHERE timestamp >= ? AND symbol = 'BTCUSDT'
-            ORDER BY timestamp ASC
-        """
+        tail = st.session_state.get('liquidation_tail')
+        if tail is None or tail.window_ms != window_ms:
+            tail = LiquidationTail(window_ms, symbol='BTCUSDT')
+            st.session_state['liquidation_tail'] = tail
         
-        df = pd.read_sql_query(query, conn, params=(cutoff_timestamp,))
-        conn.close()
-        
-        if not df.empty:
-            df['time'] = pd.to_datetime(df['timestamp'], unit='ms')
-        return df
+        with get_read_pool().connection() as conn:
+            return tail.refresh(conn)
     except Exception as e:
         st.error(f"Error loading liquidations: {e}")
         return pd.DataFrame()
 
+@st.cache_resource
+def get_liquidation_aggregator():
+    """Aggregated liquidation cache shared by every session"""
+    return LiquidationAggregator()
+
+def get_liquidation_aggregates(df, interval, symbol='BTCUSDT'):
+    """Liquidations binned by candle and price band over the charted range"""
+    try:
+        width = TIMEFRAMES[interval]
+        start_ms = int(df['Date'].iloc[0].value // 1_000_000)
+        end_ms = int(df['Date'].iloc[-1].value // 1_000_000) + width
+        band = price_band(df['Low'].min(), df['High'].max())
+        with get_read_pool().connection() as conn:
+            return get_liquidation_aggregator().load(conn, symbol, start_ms, end_ms, width, band)
+    except Exception as e:
+        st.error(f"Error aggregating liquidations: {e}")
+        return pd.DataFrame()
+
+def get_liquidation_heatmap(df, interval, symbol='BTCUSDT'):
+    """Precomputed time x price-level liquidation grid over the charted range"""
+    try:
+        start_ms = int(df['Date'].iloc[0].value // 1_000_000)
+        end_ms = int(df['Date'].iloc[-1].value // 1_000_000) + TIMEFRAMES[interval]
+        with get_read_pool().connection() as conn:
+            return heatmap.load_grid(conn, symbol, start_ms, end_ms)
+    except Exception as e:
+        st.error(f"Error loading liquidation heatmap: {e}")
+        return None
+
 def get_collector_status():
     """Get data collector status"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT is_running, total_klines_collected, total_liquidations_collected, 
-                   last_update, last_kline_timestamp
-            FROM collector_state WHERE id = 1
-        """)
-        row = cursor.fetchone()
-        conn.close()
-        
-        if row:
-            return {
-                'is_running': bool(row[0]),
-                'total_klines': row[1],
-                'total_liquidations': row[2],
-                'last_update': row[3],
-                'last_candle_time': datetime.fromtimestamp(row[4]/1000) if row[4] else None
-            }
+        return get_data_hub().snapshot().status
     except:
-        pass
-    return None
+        return None
 
 def get_db_stats():
     """Get database statistics"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*), MIN(timestamp), MAX(timestamp) FROM klines")
-        kline_stats = cursor.fetchone()
-        
-        cursor.execute("SELECT COUNT(*) FROM liquidations")
-        liq_count = cursor.fetchone()[0]
-        
-        conn.close()
-        
-        if kline_stats and kline_stats[0] > 0:
-            oldest = datetime.fromtimestamp(kline_stats[1]/1000)
-            newest = datetime.fromtimestamp(kline_stats[2]/1000)
-            duration = newest - oldest
-            
-            return {
-                'total_candles': kline_stats[0],
-                'total_liquidations': liq_count,
-                'oldest_candle': oldest,
-                'newest_candle': newest,
-                'duration_hours': duration.total_seconds() / 3600
-            }
+        return get_data_hub().snapshot().db_stats
     except:
-        pass
-    return None
+        return None
+
+def rollup_hover_text(df):
+    """Per-candle liquidation totals for rollup timeframes (None for 1m candles)"""
+    if 'long_liq_count' not in df.columns:
+        return None
+    return ("Long liqs: " + df['long_liq_count'].astype(int).astype(str)
+            + " ($" + df['long_liq_notional'].map('{:,.0f}'.format) + ")<br>Short liqs: "
+            + df['short_liq_count'].astype(int).astype(str)
+            + " ($" + df['short_liq_notional'].map('{:,.0f}'.format) + ")").to_numpy()
+
+def add_liquidation_bubbles(fig, liquidations_df, in_range):
+    """One marker per liquidation"""
+    times = liquidations_df['time'].to_numpy()
+    side = liquidations_df['side'].to_numpy()
+    price = liquidations_df['price'].to_numpy()
+    amount = liquidations_df['amount'].to_numpy()
+    size = np.clip(amount / 1000, 5, 30)
+    scatter = go.Scattergl if in_range.sum() > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    for side_value, label, color, edge in (('SELL', 'Long', 'red', 'darkred'),
+                                           ('BUY', 'Short', 'lime', 'green')):
+        mask = in_range & (side == side_value)
+        if not mask.any():
+            continue
+        fig.add_trace(
+            scatter(
+                x=times[mask],
+                y=price[mask],
+                mode='markers',
+                marker=dict(
+                    size=size[mask],
+                    color=color,
+                    opacity=0.7,
+                    line=dict(width=1, color=edge)
+                ),
+                name=f'{label} Liquidations',
+                hovertemplate=f'<b>{label} Liq</b><br>Price: $%{{y:,.2f}}<br>Amount: $%{{customdata:,.0f}}<extra></extra>',
+                customdata=amount[mask]
+            ),
+            row=1, col=1
+        )
+
+def add_aggregated_liquidations(fig, aggregates):
+    """One marker per (candle, side, price band) at the band's VWAP, area scaled by notional"""
+    side = aggregates['side'].to_numpy()
+    amount = aggregates['amount'].to_numpy()
+    size = 6 + 24 * np.sqrt(amount / amount.max())
+    times = pd.to_datetime(aggregates['bucket'].to_numpy(), unit='ms')
+    customdata = np.column_stack([aggregates['count'].to_numpy(), amount])
+    scatter = go.Scattergl if len(aggregates) > WEBGL_POINT_THRESHOLD else go.Scatter
+
+    for side_value, label, color, edge in (('SELL', 'Long', 'red', 'darkred'),
+                                           ('BUY', 'Short', 'lime', 'green')):
+        mask = side == side_value
+        if not mask.any():
+            continue
+        fig.add_trace(
+            scatter(
+                x=times[mask],
+                y=aggregates['vwap'].to_numpy()[mask],
+                mode='markers',
+                marker=dict(size=size[mask], color=color, opacity=0.6, line=dict(width=1, color=edge)),
+                name=f'{label} Liquidations (aggregated)',
+                hovertemplate=(f'<b>{label} Liqs</b><br>VWAP: $%{{y:,.2f}}<br>Count: %{{customdata[0]:,}}'
+                               '<br>Total: $%{customdata[1]:,.0f}<extra></extra>'),
+                customdata=customdata[mask]
+            ),
+            row=1, col=1
+        )
+
+def create_heatmap_chart(grid, side="Both"):
+    """Liquidated notional by time and price level"""
+    times, prices, long_grid, short_grid = grid
+    z = {"Longs": long_grid, "Shorts": short_grid}.get(side, long_grid + short_grid)
+    # Empty cells stay transparent instead of drawing the bottom of the colorscale
+    z = np.where(z > 0, z, np.nan)
+    
+    fig = go.Figure(go.Heatmap(
+        x=pd.to_datetime(times, unit='ms'),
+        y=prices,
+        z=z,
+        colorscale='Inferno',
+        colorbar=dict(title='Notional $'),
+        hovertemplate='%{x}<br>Price: $%{y:,.2f}<br>Liquidated: $%{z:,.0f}<extra></extra>'
+    ))
+    fig.update_layout(
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#FAFAFA'),
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    fig.update_xaxes(gridcolor='#2F3349', linecolor='#2F3349')
+    fig.update_yaxes(gridcolor='#2F3349', linecolor='#2F3349')
+    return fig
 
-def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute"):
+def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute", liquidation_aggregates=None):
     """Create candlestick chart with liquidation bubbles"""
     if df.empty:
         return None
     
-    # Only show liquidations on 1-minute charts
+    # Raw liquidations only on 1-minute charts; other timeframes pass aggregates
     show_liquidations = timeframe_name == "1 Minute"
     
     fig = make_subplots(
@@ -215,14 +368,19 @@ def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute"):
         subplot_titles=('', 'Volume')
     )
     
+    dates = df['Date'].to_numpy()
+    open_ = df['Open'].to_numpy()
+    close = df['Close'].to_numpy()
+    
     fig.add_trace(
         go.Candlestick(
-            x=df['Date'],
-            open=df['Open'],
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
+            x=dates,
+            open=open_,
+            high=df['High'].to_numpy(),
+            low=df['Low'].to_numpy(),
+            close=close,
             name="BTCUSDT",
+            text=rollup_hover_text(df),
             increasing_line_color='#00D4AA',
             decreasing_line_color='#FF6B6B',
             increasing_fillcolor='#00D4AA',
@@ -231,61 +389,25 @@ def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute"):
         row=1, col=1
     )
     
-    # Add liquidation bubbles - only on 1-minute charts
+    # Individual bubbles on 1-minute charts within the point budget, aggregated
+    # (candle x price band) bubbles for longer timeframes or busier windows
     if show_liquidations and not liquidations_df.empty:
-        chart_start = df['Date'].min()
-        chart_end = df['Date'].max()
+        times = liquidations_df['time'].to_numpy()
         # Filter liquidations to match the exact chart timeframe
-        liq_df = liquidations_df[(liquidations_df['time'] >= chart_start) & 
-                                  (liquidations_df['time'] <= chart_end)]
-        
-        if not liq_df.empty:
-            # Show individual liquidation bubbles
-            long_liqs = liq_df[liq_df['side'] == 'SELL']
-            if not long_liqs.empty:
-                fig.add_trace(
-                    go.Scatter(
-                        x=long_liqs['time'],
-                        y=long_liqs['price'],
-                        mode='markers',
-                        marker=dict(
-                            size=long_liqs['amount'].apply(lambda x: min(max(x/1000, 5), 30)),
-                            color='red',
-                            opacity=0.7,
-                            line=dict(width=1, color='darkred')
-                        ),
-                        name='Long Liquidations',
-                        hovertemplate='<b>Long Liq</b><br>Price: $%{y:,.2f}<br>Amount: $%{customdata:,.0f}<extra></extra>',
-                        customdata=long_liqs['amount']
-                    ),
-                    row=1, col=1
-                )
-            
-            short_liqs = liq_df[liq_df['side'] == 'BUY']
-            if not short_liqs.empty:
-                fig.add_trace(
-                    go.Scatter(
-                        x=short_liqs['time'],
-                        y=short_liqs['price'],
-                        mode='markers',
-                        marker=dict(
-                            size=short_liqs['amount'].apply(lambda x: min(max(x/1000, 5), 30)),
-                            color='lime',
-                            opacity=0.7,
-                            line=dict(width=1, color='green')
-                        ),
-                        name='Short Liquidations',
-                        hovertemplate='<b>Short Liq</b><br>Price: $%{y:,.2f}<br>Amount: $%{customdata:,.0f}<extra></extra>',
-                        customdata=short_liqs['amount']
-                    ),
-                    row=1, col=1
-                )
+        in_range = (times >= dates[0]) & (times <= dates[-1])
+        if in_range.sum() > LIQUIDATION_POINT_BUDGET:
+            band = price_band(df['Low'].min(), df['High'].max())
+            add_aggregated_liquidations(fig, aggregate_to_budget(liquidations_df[in_range], band,
+                                                                 LIQUIDATION_POINT_BUDGET))
+        elif in_range.any():
+            add_liquidation_bubbles(fig, liquidations_df, in_range)
+    elif liquidation_aggregates is not None and not liquidation_aggregates.empty:
+        add_aggregated_liquidations(fig, liquidation_aggregates)
     
-    colors = ['#00D4AA' if df.iloc[i]['Close'] >= df.iloc[i]['Open'] 
-              else '#FF6B6B' for i in range(len(df))]
+    colors = np.where(close >= open_, '#00D4AA', '#FF6B6B')
     
     fig.add_trace(
-        go.Bar(x=df['Date'], y=df['Volume'], marker_color=colors, 
+        go.Bar(x=dates, y=df['Volume'].to_numpy(), marker_color=colors, 
                name="Volume", opacity=0.7, showlegend=True),
         row=2, col=1
     )
@@ -307,9 +429,9 @@ def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute"):
     fig.update_yaxes(gridcolor='#2F3349', linecolor='#2F3349')
     
     if len(df) > 0:
-        latest_price = df.iloc[-1]['Close']
+        latest_price = close[-1]
         fig.add_annotation(
-            x=df.iloc[-1]['Date'], y=latest_price,
+            x=dates[-1], y=latest_price,
             text=f"${latest_price:,.2f}",
             showarrow=True, arrowhead=2,
             bgcolor="#00D4AA", font=dict(color="white", size=12)
@@ -317,29 +439,8 @@ def create_candlestick_chart(df, liquidations_df, timeframe_name="1 Minute"):
     
     return fig
 
-def main():
-    # Auto-start data collector
-    start_data_collector()
-    
-    # Header
-    col1, col2, col3 = st.columns([3, 1, 1])
-    
-    with col1:
-        st.title("₿ BTC/USDT Live Dashboard")
-        st.caption("Real-time data from database + WebSocket streams")
-    
-    with col2:
-        # Only 1-minute timeframe for liquidation display
-        timeframe = "1 Minute"
-        st.info("📊 **1-Minute Chart** - Shows individual liquidations")
-    
-    with col3:
-        auto_refresh = st.checkbox("🔄 Auto Refresh", value=True)
-    
-    # Fixed to 1-minute timeframe
-    hours = 100/60  # Show 100 candles minimum
-    display_name = "Last 100 candles"
-    
+def render_status():
+    """Collector status and database statistics"""
     # Collector status
     status = get_collector_status()
     db_stats = get_db_stats()
@@ -347,7 +448,11 @@ def main():
     col1, col2, col3 = st.columns(3)
     with col1:
         if status and status['is_running']:
-            st.success("🟢 Data Collector Running")
+            st.success(f"🟢 Data Collector Running (pid {status['pid']}, "
+                       f"heartbeat {status['heartbeat_age']:.0f}s ago)")
+            if status['stream_ages']:
+                st.caption(" · ".join(f"{stream}: {age:.0f}s" for stream, age
+                                      in sorted(status['stream_ages'].items())))
         else:
             st.error("🔴 Data Collector Offline")
             st.warning("⚠️ Run: `python data_collector.py` to start collecting data")
@@ -373,12 +478,20 @@ def main():
             
             st.caption(f"Oldest candle: {db_stats['oldest_candle'].strftime('%Y-%m-%d %H:%M:%S')}")
             st.caption(f"Newest candle: {db_stats['newest_candle'].strftime('%Y-%m-%d %H:%M:%S')}")
+            if db_stats['archived_candles'] or db_stats['archived_liquidations']:
+                st.caption(f"🧊 Parquet archive: {db_stats['archived_candles']:,} candles, "
+                           f"{db_stats['archived_liquidations']:,} liquidations")
+
+def render_live(timeframe, interval):
+    """Price metrics, chart, heatmap and recent liquidations"""
+    # Last 100 candles of the selected timeframe; liquidation bubbles cover the last 100 minutes
+    hours = 100 * TIMEFRAMES[interval] / 3_600_000
+    display_name = f"Last 100 {interval} candles"
     
     # Load data
-    with st.spinner(f"📡 Loading {display_name} data from Binance API..."):
-        df = get_klines_from_api(limit=100)  # Get last 100 candles from API
-        # Get liquidations from database (still need WebSocket for this)
-        liquidations_df = get_liquidations_from_db(hours=hours)
+    with st.spinner(f"📡 Loading {display_name} data from database..."):
+        df = get_klines_from_db(limit=100, interval=interval)  # Maintained by the collector
+        liquidations_df = get_liquidations_from_db(hours=100/60)
     
     if not df.empty:
         current_price = df.iloc[-1]['Close']
@@ -393,10 +506,11 @@ def main():
         if not liquidations_df.empty and 'time' in liquidations_df.columns:
             # Convert cutoff time to timezone-naive to match the database datetime
             cutoff_time = datetime.now() - timedelta(minutes=5)
-            # Ensure time column is timezone-naive
-            if liquidations_df['time'].dt.tz is not None:
-                liquidations_df['time'] = liquidations_df['time'].dt.tz_localize(None)
-            recent_liqs = liquidations_df[liquidations_df['time'] > cutoff_time]
+            # Ensure time column is timezone-naive (without touching the shared frame)
+            liq_times = liquidations_df['time']
+            if liq_times.dt.tz is not None:
+                liq_times = liq_times.dt.tz_localize(None)
+            recent_liqs = liquidations_df[liq_times > cutoff_time]
             total_liq_amount = recent_liqs['amount'].sum() if not recent_liqs.empty else 0
             long_liqs = len(recent_liqs[recent_liqs['side'] == 'SELL']) if not recent_liqs.empty else 0
             short_liqs = len(recent_liqs[recent_liqs['side'] == 'BUY']) if not recent_liqs.empty else 0
@@ -412,31 +526,31 @@ def main():
         with col1:
             st.metric("Current Price", f"${current_price:,.2f}", f"{price_change_pct:+.2f}%")
         with col2:
-            st.metric(f"{hours}h High", f"${high_price:,.2f}")
+            st.metric(f"{hours:g}h High", f"${high_price:,.2f}")
         with col3:
-            st.metric(f"{hours}h Low", f"${low_price:,.2f}")
+            st.metric(f"{hours:g}h Low", f"${low_price:,.2f}")
         with col4:
-            st.metric(f"{hours}h Volume", f"{total_volume:,.0f}")
+            st.metric(f"{hours:g}h Volume", f"{total_volume:,.0f}")
         with col5:
             st.metric("Liquidations (5min)", f"{len(recent_liqs)}", f"${total_liq_amount:,.0f}")
         with col6:
             st.metric("Long/Short", f"{long_liqs}/{short_liqs}")
         
         # Chart
-        fig = create_candlestick_chart(df, liquidations_df, timeframe)
+        aggregates = get_liquidation_aggregates(df, interval) if interval != '1m' else None
+        fig = create_candlestick_chart(df, liquidations_df, timeframe, aggregates)
         if fig:
             st.plotly_chart(fig, use_container_width=True)
         
-        
-        # Info
-        st.markdown("### 🎯 Liquidation Legend")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.markdown("🔴 **Red Bubbles** = Long Liquidations")
-        with col2:
-            st.markdown("🟢 **Green Bubbles** = Short Liquidations")
-        with col3:
-            st.markdown("📏 **Bubble Size** = Liquidation Amount")
+        # Liquidation heatmap
+        st.markdown("### 🔥 Liquidation Heatmap")
+        heatmap_side = st.radio("Side", ["Both", "Longs", "Shorts"], horizontal=True,
+                                label_visibility="collapsed")
+        grid = get_liquidation_heatmap(df, interval)
+        if grid is not None:
+            st.plotly_chart(create_heatmap_chart(grid, heatmap_side), use_container_width=True)
+        else:
+            st.caption("No liquidations in this range yet")
         
         # Recent liquidations
         if not recent_liqs.empty:
@@ -460,7 +574,13 @@ def main():
                 st.write(f"**Liquidations matching chart timeframe:** {len(matching_liqs)}")
                 
                 # Show liquidation display info
-                st.write("**📍 Liquidation Mode:** Individual liquidation bubbles will be shown")
+                if interval != '1m':
+                    mode = "Aggregated bubbles (candle x price band)"
+                elif len(matching_liqs) > LIQUIDATION_POINT_BUDGET:
+                    mode = f"Aggregated bubbles ({len(matching_liqs):,} > {LIQUIDATION_POINT_BUDGET:,} point budget)"
+                else:
+                    mode = "Individual liquidation bubbles will be shown"
+                st.write(f"**📍 Liquidation Mode:** {mode}")
                 long_count = len(matching_liqs[matching_liqs['side'] == 'SELL'])
                 short_count = len(matching_liqs[matching_liqs['side'] == 'BUY'])
                 st.write(f"**Long liquidations to display:** {long_count}")
@@ -470,12 +590,43 @@ def main():
                     st.dataframe(matching_liqs[['time', 'side', 'price', 'amount']].head(10))
     else:
         st.warning("⚠️ No data in database. Make sure data_collector.py is running!")
+
+def render_legend():
+    st.markdown("### 🎯 Liquidation Legend")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("🔴 **Red Bubbles** = Long Liquidations")
+    with col2:
+        st.markdown("🟢 **Green Bubbles** = Short Liquidations")
+    with col3:
+        st.markdown("📏 **Bubble Size** = Liquidation Amount")
+
+def main():
+    # Auto-start data collector
+    start_data_collector()
+    
+    # Header
+    col1, col2, col3 = st.columns([3, 1, 1])
+    
+    with col1:
+        st.title("₿ BTC/USDT Live Dashboard")
+        st.caption("Real-time data from database + WebSocket streams")
+    
+    with col2:
+        # Individual liquidation bubbles only on 1m; rollups carry per-candle totals
+        timeframe = st.selectbox("Timeframe", list(TIMEFRAME_OPTIONS), index=0)
+        interval = TIMEFRAME_OPTIONS[timeframe]
+    
+    with col3:
+        auto_refresh = st.checkbox("🔄 Auto Refresh", value=True)
     
-    # Auto-refresh
-    if auto_refresh:
-        import time
-        time.sleep(5)  # Refresh every 5 seconds
-        st.rerun()
+    # Only the live parts re-run on a timer; the header, selectors and legend
+    # stay put and no server thread sleeps between refreshes
+    live = st.fragment(run_every=DASHBOARD_REFRESH_SECONDS if auto_refresh else None)
+    stats = st.fragment(run_every=STATS_REFRESH_SECONDS if auto_refresh else None)
+    stats(render_status)()
+    live(render_live)(timeframe, interval)
+    render_legend()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
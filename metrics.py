@@ -0,0 +1,230 @@
+"""
+Collector Metrics - counters, gauges and histograms served in Prometheus text format
+Scrape: curl http://localhost:9108/metrics (port from --metrics-port / COLLECTOR_METRICS_PORT)
+
+No client library needed: the handful of metric types the collector uses are
+implemented here, and the endpoint runs on a daemon ThreadingHTTPServer.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def samples(self):
+        """[(suffix, label values, extra labels, value), ...] for exposition"""
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.label_names, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Set directly, or computed at scrape time with set_function.
+
+    For labelled gauges the function returns {label value tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def samples(self):
+        if self._function is None:
+            return super().samples()
+        result = self._function()
+        if not isinstance(result, dict):
+            result = {(): result}
+        return [("", key, (), value) for key, value in result.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Collector metrics (threaded and asyncio engines share these)
+MESSAGES_RECEIVED = REGISTRY.counter(
+    "collector_messages_received_total", "WebSocket messages received", ["stream"])
+DECODE_ERRORS = REGISTRY.counter(
+    "collector_decode_errors_total", "Messages that failed to decode or route", ["stream"])
+RECONNECTS = REGISTRY.counter(
+    "collector_reconnects_total", "WebSocket reconnect attempts", ["connection"])
+ROWS_WRITTEN = REGISTRY.counter(
+    "collector_rows_written_total", "Rows committed by the batch writer")
+BATCHES_WRITTEN = REGISTRY.counter(
+    "collector_batches_written_total", "Transactions committed by the batch writer")
+FLUSH_SECONDS = REGISTRY.histogram(
+    "collector_flush_seconds", "Batch flush duration including the write lock wait")
+LOCK_WAIT_SECONDS = REGISTRY.histogram(
+    "collector_write_lock_wait_seconds", "Time spent waiting for the SQLite write lock per batch")
+INGEST_LAG_SECONDS = REGISTRY.histogram(
+    "collector_ingest_lag_seconds", "Enqueue-to-commit time of the oldest row in each batch",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "collector_writer_queue_depth", "Rows waiting for the batch writer")
+LAST_MESSAGE_AGE = REGISTRY.gauge(
+    "collector_last_message_age_seconds", "Seconds since the last message on each stream", ["stream"])
+RETENTION_ROWS_DELETED = REGISTRY.counter(
+    "collector_retention_rows_deleted_total", "Expired rows deleted by the retention policy", ["table"])
+MAINTENANCE_SECONDS = REGISTRY.counter(
+    "collector_maintenance_seconds_total", "Time spent on database maintenance", ["task"])
+BYTES_RECLAIMED = REGISTRY.counter(
+    "collector_bytes_reclaimed_total", "Database and WAL bytes returned to the filesystem")
+FREE_PAGES = REGISTRY.gauge(
+    "collector_db_free_pages", "Free pages left in the database after the last reclaim")
+
+_last_message = {}
+
+
+def record_message(stream):
+    """Count one received message and refresh its stream's last-message time"""
+    MESSAGES_RECEIVED.inc(stream=stream)
+    _last_message[stream] = time.monotonic()
+
+
+LAST_MESSAGE_AGE.set_function(
+    lambda: {(stream,): time.monotonic() - seen for stream, seen in list(_last_message.items())}
+)
+
+
+def last_message_times():
+    """{stream: unix time of its last message}, for the liveness heartbeat"""
+    offset = time.time() - time.monotonic()
+    return {stream: round(seen + offset, 3) for stream, seen in list(_last_message.items())}
+
+
+def observe_flush(writer):
+    """BatchWriter on_flush callback recording rows, flush time, lock wait and lag"""
+    def on_flush(batch_size, flush_seconds, queued_at):
+        ROWS_WRITTEN.inc(batch_size)
+        BATCHES_WRITTEN.inc()
+        FLUSH_SECONDS.observe(flush_seconds)
+        LOCK_WAIT_SECONDS.observe(writer.last_lock_wait_ms / 1000)
+        if queued_at:
+            INGEST_LAG_SECONDS.observe(time.monotonic() - min(queued_at))
+    return on_flush
+
+
+def start_http_server(port, host="0.0.0.0", registry=REGISTRY):
+    """Serve ``/metrics`` on a daemon thread; returns the server"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="MetricsHTTP").start()
+    return server
@@ -0,0 +1,370 @@
+"""
+Schema Migrations - versioned, ordered schema changes for btc_data.db
+Run: python migrations.py [--status] [--dry-run] [--db btc_data.db]
+
+Each migration is a function registered with @migration(version, description).
+Pending migrations run in version order and the schema_version row is bumped
+after each one completes, so steps must be idempotent (IF NOT EXISTS, etc.)
+in case the process dies between the step and the version update.
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import config
+from storage import connect_writer
+
+DB_PATH = config.DB_PATH
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register a migration step"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+class MigrationContext:
+    """Handed to every migration step; provides online batched backfills.
+
+    A backfill commits every chunk so the collector's writer never waits longer
+    than roughly ``max_lock_seconds`` for the write lock. The chunk size adapts
+    to keep each transaction under that bound.
+    """
+
+    def __init__(self, conn, max_lock_seconds=0.2, pause_seconds=0.05, verbose=True):
+        self.conn = conn
+        self.max_lock_seconds = max_lock_seconds
+        self.pause_seconds = pause_seconds
+        self.verbose = verbose
+
+    def backfill(self, table, sql, batch_rows=5000):
+        """Run ``sql`` over ``table`` in rowid chunks bound to :lo and :hi (lo < rowid <= hi)"""
+        # Chunk bounds come from the rows that actually exist, so sparse rowids
+        # (e.g. klines keyed by timestamp) don't produce empty chunks
+        lo = (self.conn.execute(f"SELECT MIN(rowid) FROM {table}").fetchone()[0] or 0) - 1
+        total = 0
+        while True:
+            hi = self.conn.execute(f"""
+                SELECT MAX(rowid) FROM (
+                    SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?
+                )
+            """, (lo, batch_rows)).fetchone()[0]
+            if hi is None:
+                break
+
+            start = time.perf_counter()
+            cursor = self.conn.execute(sql, {"lo": lo, "hi": hi})
+            self.conn.commit()
+            elapsed = time.perf_counter() - start
+            total += max(cursor.rowcount, 0)
+
+            if elapsed > self.max_lock_seconds:
+                batch_rows = max(100, batch_rows // 2)
+            elif elapsed < self.max_lock_seconds / 4:
+                batch_rows = min(batch_rows * 2, 200_000)
+            lo = hi
+
+            # Give the collector a window to take the write lock
+            time.sleep(self.pause_seconds)
+
+        if self.verbose:
+            print(f"  ↳ backfilled {total:,} rows in {table}")
+        return total
+
+
+def ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO schema_version (id, version) VALUES (1, 0)")
+    conn.commit()
+
+
+def get_version(conn):
+    """Current schema version (0 for databases that predate schema_version)"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not exists:
+        return 0
+    row = conn.execute("SELECT version FROM schema_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def pending_migrations(conn):
+    current = get_version(conn)
+    return [m for m in MIGRATIONS if m[0] > current]
+
+
+def migrate(conn, verbose=True, **context_options):
+    """Apply every pending migration in order; returns [(version, seconds), ...]"""
+    ensure_version_table(conn)
+    context = MigrationContext(conn, verbose=verbose, **context_options)
+    timings = []
+    for version, description, func in pending_migrations(conn):
+        if verbose:
+            print(f"🛠️ Migration {version}: {description}")
+        start = time.perf_counter()
+        func(context)
+        conn.execute("""
+            UPDATE schema_version SET version = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+        """, (version,))
+        conn.commit()
+        timings.append((version, time.perf_counter() - start))
+    return timings
+
+
+def dry_run(db_path=DB_PATH):
+    """Run pending migrations on a copy of the database and report durations"""
+    source = sqlite3.connect(db_path)
+    pending = pending_migrations(source)
+    if not pending:
+        source.close()
+        print("✅ Schema is up to date, nothing to migrate")
+        return []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        copy_path = os.path.join(tmp, "migration_copy.db")
+        start = time.perf_counter()
+        copy = sqlite3.connect(copy_path)
+        # Online backup API: consistent snapshot without blocking the collector for long
+        source.backup(copy, pages=1024)
+        source.close()
+        copy.close()
+        print(f"📋 Copied database in {time.perf_counter() - start:.1f} s")
+
+        conn = connect_writer(copy_path)
+        # No collector is competing for the copy, so skip the pauses between chunks
+        timings = migrate(conn, pause_seconds=0)
+        conn.close()
+
+    total = sum(seconds for _, seconds in timings)
+    print("\n📊 Estimated migration duration:")
+    for version, seconds in timings:
+        print(f"  Migration {version}: {seconds:.2f} s")
+    print(f"  Total: {total:.2f} s (plus pauses between backfill chunks when run live)")
+    return timings
+
+
+@migration(1, "Base tables: klines, liquidations, collector_state")
+def create_base_tables(ctx):
+    cursor = ctx.conn.cursor()
+
+    # Klines table - stores every 1-minute candle
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS klines (
+            timestamp INTEGER PRIMARY KEY,
+            symbol TEXT NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Liquidations table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS liquidations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            side TEXT NOT NULL,
+            price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            amount REAL NOT NULL,
+            timestamp INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(symbol, timestamp, side, amount)
+        )
+    """)
+
+    # Collector state table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS collector_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_kline_timestamp INTEGER,
+            last_liquidation_timestamp INTEGER,
+            total_klines_collected INTEGER DEFAULT 0,
+            total_liquidations_collected INTEGER DEFAULT 0,
+            is_running INTEGER DEFAULT 0,
+            last_update TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("INSERT OR IGNORE INTO collector_state (id, is_running) VALUES (1, 0)")
+
+
+@migration(2, "Covering and time indexes on liquidations")
+def add_liquidation_indexes(ctx):
+    cursor = ctx.conn.cursor()
+    # Covering index for the dashboard window query:
+    #   WHERE symbol = ? AND timestamp >= ? ORDER BY timestamp
+    # Every selected column is in the index, so the table itself is never touched
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_liquidations_symbol_ts_cover
+        ON liquidations (symbol, timestamp, side, price, quantity, amount)
+    """)
+    # Plain time index for MAX(timestamp) / time-range scans across all symbols
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_liquidations_timestamp
+        ON liquidations (timestamp)
+    """)
+
+
+@migration(3, "Track the currently forming candle in klines")
+def add_kline_is_closed(ctx):
+    columns = [row[1] for row in ctx.conn.execute("PRAGMA table_info(klines)")]
+    if "is_closed" not in columns:
+        # Existing rows were all written from closed candles
+        ctx.conn.execute("ALTER TABLE klines ADD COLUMN is_closed INTEGER NOT NULL DEFAULT 1")
+
+
+@migration(4, "Key klines by (symbol, timestamp) for multi-symbol collection")
+def rekey_klines_by_symbol(ctx):
+    conn = ctx.conn
+    pk_columns = [row[1] for row in conn.execute("PRAGMA table_info(klines)") if row[5] > 0]
+    if pk_columns != ["timestamp"]:
+        return
+
+    conn.execute("DROP TABLE IF EXISTS klines_v2")
+    conn.execute("""
+        CREATE TABLE klines_v2 (
+            timestamp INTEGER NOT NULL,
+            symbol TEXT NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_closed INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (symbol, timestamp)
+        )
+    """)
+    conn.commit()
+
+    copy_columns = "timestamp, symbol, open, high, low, close, volume, created_at, is_closed"
+    ctx.backfill("klines", f"""
+        INSERT OR REPLACE INTO klines_v2 ({copy_columns})
+        SELECT {copy_columns} FROM klines WHERE rowid > :lo AND rowid <= :hi
+    """)
+
+    # Swap in one transaction; recopy the last hour first in case a live
+    # collector rewrote the forming candle after its chunk was copied
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f"""
+            INSERT OR REPLACE INTO klines_v2 ({copy_columns})
+            SELECT {copy_columns} FROM klines
+            WHERE timestamp >= (SELECT MAX(timestamp) FROM klines) - 3600000
+        """)
+        conn.execute("DROP TABLE klines")
+        conn.execute("ALTER TABLE klines_v2 RENAME TO klines")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+@migration(5, "Pre-aggregated 5m/15m/1h/4h/1d rollups with liquidation totals")
+def add_kline_rollups(ctx):
+    import rollups
+
+    ctx.conn.execute(rollups.CREATE_TABLE)
+    ctx.conn.commit()
+    # One day per transaction so a live collector keeps getting the write lock
+    rollups.rebuild(ctx.conn, pause_seconds=ctx.pause_seconds, verbose=ctx.verbose)
+
+
+@migration(6, "Precomputed liquidation heatmap grid")
+def add_liquidation_heatmap(ctx):
+    import heatmap
+
+    ctx.conn.execute(heatmap.CREATE_TABLE)
+    ctx.conn.commit()
+    heatmap.rebuild(ctx.conn, pause_seconds=ctx.pause_seconds, verbose=ctx.verbose)
+
+
+@migration(7, "Collector lease with heartbeat and per-stream activity")
+def add_collector_lease(ctx):
+    import liveness
+
+    ctx.conn.execute(liveness.CREATE_TABLE)
+    ctx.conn.commit()
+
+
+@migration(8, "Archive log for the Parquet cold tier")
+def add_archive_log(ctx):
+    import archive
+
+    ctx.conn.execute(archive.CREATE_TABLE)
+    ctx.conn.commit()
+
+
+# Largest database migration 9 rewrites inline (a fresh one); anything bigger
+# is left to the offline `python retention.py --enable-incremental`
+INLINE_VACUUM_BYTES = 1 << 20
+
+
+@migration(9, "Incremental auto-vacuum so freed pages can be returned to the OS")
+def enable_incremental_vacuum(ctx):
+    # Switching auto_vacuum on an existing database only takes effect after a
+    # full VACUUM, which blocks the collector and needs the file's size in free
+    # disk; only a (nearly) empty database is switched here
+    import retention
+
+    conn = ctx.conn
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    size = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    if size <= INLINE_VACUUM_BYTES:
+        retention.enable_incremental(conn)
+    elif ctx.verbose:
+        print("  ↳ auto_vacuum left as is; to reclaim free space run "
+              "python retention.py --enable-incremental with the collector stopped")
+
+
+def print_status(db_path):
+    conn = sqlite3.connect(db_path)
+    current = get_version(conn)
+    conn.close()
+    print(f"📌 Schema version: {current}")
+    for version, description, _ in MIGRATIONS:
+        marker = "✅" if version <= current else "⏳"
+        print(f"  {marker} {version}: {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations to btc_data.db")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--status", action="store_true", help="show applied/pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="migrate a copy and estimate duration")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.db)
+    elif args.dry_run:
+        dry_run(args.db)
+    else:
+        conn = connect_writer(args.db)
+        timings = migrate(conn)
+        conn.close()
+        print(f"✅ Applied {len(timings)} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Record & Replay - capture Binance traffic and serve it back from a local stand-in
+Record: python replay.py record --symbols BTCUSDT,ETHUSDT --duration 600 -o session.jsonl.gz
+Serve:  python replay.py serve session.jsonl.gz --speed 10 [--loop] [--cascade-count 5000]
+
+Then point the collector at it:
+    BINANCE_WS_URL=ws://127.0.0.1:9443 BINANCE_REST_URL=http://127.0.0.1:9080 python data_collector.py
+
+Recording format (gzip JSONL, one record per line):
+    {"type": "header", "streams": [...], "created": <unix s>}
+    {"type": "ws", "t": <seconds since start>, "frame": "<raw combined-stream frame>"}
+    {"type": "rest", "path": "/fapi/v1/klines", "symbol": "...", "body": "<raw JSON>"}
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import rest_client
+import streams
+from config import BINANCE_REST_URL
+
+
+# ---------------------------------------------------------------- recording
+
+async def _record_frames(names, duration, out):
+    from websockets.asyncio.client import connect
+
+    start = time.monotonic()
+    count = 0
+    async with connect(streams.combined_url(names), max_size=None) as ws:
+        while True:
+            remaining = duration - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            try:
+                frame = await asyncio.wait_for(ws.recv(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            out.write(json.dumps({"type": "ws", "t": round(time.monotonic() - start, 4), "frame": frame}) + "\n")
+            count += 1
+    return count
+
+
+def record(symbols, duration, output, all_liquidations=False, kline_limit=1500):
+    """Capture raw WebSocket frames for ``duration`` seconds plus recent klines over REST"""
+    names = streams.stream_names(symbols, all_liquidations=all_liquidations)
+    with gzip.open(output, "wt") as out:
+        out.write(json.dumps({"type": "header", "streams": names, "created": time.time()}) + "\n")
+
+        for symbol in symbols:
+            response = rest_client.get_client(BINANCE_REST_URL).get(
+                "/fapi/v1/klines", {"symbol": symbol, "interval": "1m", "limit": kline_limit},
+                weight=rest_client.kline_request_weight(kline_limit))
+            out.write(json.dumps({"type": "rest", "path": "/fapi/v1/klines",
+                                  "symbol": symbol, "body": response.text}) + "\n")
+
+        print(f"🎙️ Recording {len(names)} streams for {duration} s...")
+        count = asyncio.run(_record_frames(names, duration, out))
+    print(f"✅ Recorded {count:,} frames to {output}")
+
+
+# ---------------------------------------------------------------- loading
+
+class Recording:
+    """Frames on a timeline plus recorded REST klines, ready to be served"""
+
+    def __init__(self):
+        self.frames = []   # (t, stream, symbol, data dict)
+        self.klines = {}   # symbol -> sorted list of kline rows
+
+    @classmethod
+    def load(cls, path):
+        recording = cls()
+        with gzip.open(path, "rt") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["type"] == "ws":
+                    recording.add_frame(record["t"], json.loads(record["frame"]))
+                elif record["type"] == "rest" and record["path"] == "/fapi/v1/klines":
+                    rows = recording.klines.setdefault(record["symbol"], [])
+                    rows.extend(json.loads(record["body"]))
+        for symbol, rows in recording.klines.items():
+            recording.klines[symbol] = sorted({row[0]: row for row in rows}.values(), key=lambda r: r[0])
+        return recording
+
+    def add_frame(self, t, frame):
+        data = frame["data"]
+        if "o" in data:
+            symbol = data["o"]["s"]
+        elif "k" in data:
+            symbol = data["k"]["s"]
+        else:
+            symbol = data.get("s")
+        self.frames.append((t, frame["stream"], symbol, data))
+
+    def duration(self):
+        return self.frames[-1][0] if self.frames else 0.0
+
+    def add_cascade(self, symbol, count, seconds, at, start_price, side="SELL", seed=1):
+        """Synthetic liquidation cascade: ``count`` forceOrders over ``seconds`` starting at ``at``"""
+        rng = random.Random(seed)
+        base_ms = int(time.time() * 1000)
+        price = start_price
+        # Long liquidations (SELL) push price down, short liquidations up
+        step = -1 if side == "SELL" else 1
+        for i in range(count):
+            t = at + seconds * i / max(count, 1)
+            price *= 1 + step * rng.uniform(0, 0.00005)
+            quantity = round(rng.expovariate(1 / 0.2), 3) or 0.001
+            event_ms = base_ms + int(t * 1000)
+            data = {"e": "forceOrder", "E": event_ms, "o": {
+                "s": symbol, "S": side, "o": "LIMIT", "f": "IOC", "q": f"{quantity}",
+                "p": f"{price:.2f}", "ap": f"{price:.2f}", "X": "FILLED",
+                "l": f"{quantity}", "z": f"{quantity}", "T": event_ms,
+            }}
+            self.frames.append((t, f"{symbol.lower()}@forceOrder", symbol, data))
+        self.frames.sort(key=lambda frame: frame[0])
+
+    def last_price(self, symbol, default=100_000.0):
+        rows = self.klines.get(symbol)
+        return float(rows[-1][4]) if rows else default
+
+
+def _shift_times(data, offset_ms):
+    """Copy of an event with its timestamps moved forward (keeps looped events unique)"""
+    data = json.loads(json.dumps(data))
+    if "E" in data:
+        data["E"] += offset_ms
+    if "o" in data:
+        data["o"]["T"] += offset_ms
+    if "k" in data:
+        data["k"]["t"] += offset_ms
+        data["k"]["T"] += offset_ms
+    return data
+
+
+def _subscriptions(path):
+    """(stream names, combined?) requested by a client path"""
+    parsed = urlparse(path)
+    if parsed.path.startswith("/stream"):
+        names = parse_qs(parsed.query).get("streams", [""])[0]
+        return [name for name in names.split("/") if name], True
+    return [parsed.path.rsplit("/", 1)[-1]], False
+
+
+def _match(name_set, stream, symbol):
+    """Subscribed stream name that should receive a recorded frame, or None"""
+    if stream in name_set:
+        return stream
+    if streams.stream_kind(stream) == "forceOrder":
+        if streams.ALL_LIQUIDATIONS_STREAM in name_set:
+            return streams.ALL_LIQUIDATIONS_STREAM
+        per_symbol = f"{(symbol or '').lower()}@forceOrder"
+        if per_symbol in name_set:
+            return per_symbol
+    return None
+
+
+# ---------------------------------------------------------------- serving
+
+class ReplayServer:
+    """Local WebSocket + HTTP stand-in for fstream/fapi.binance.com.
+
+    ``speed`` is a multiplier on the recorded timeline (1 = real time); 0 sends
+    frames as fast as the client reads them.
+    """
+
+    def __init__(self, recording, speed=1.0, loop=False, host="127.0.0.1", ws_port=9443, http_port=9080):
+        self.recording = recording
+        self.speed = speed
+        self.loop = loop
+        self.host = host
+        self.ws_port = ws_port
+        self.http_port = http_port
+
+    async def handle_ws(self, ws):
+        names, combined = _subscriptions(ws.request.path)
+        name_set = set(names)
+        duration_ms = int(max(self.recording.duration(), 1.0) * 1000)
+        sent = 0
+        iteration = 0
+        print(f"🔌 Client subscribed to {len(names)} stream(s)")
+        while True:
+            start = time.monotonic()
+            sent_before = sent
+            for t, stream, symbol, data in self.recording.frames:
+                target = _match(name_set, stream, symbol)
+                if target is None:
+                    continue
+                if self.speed > 0:
+                    delay = t / self.speed - (time.monotonic() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif sent % 1000 == 0:
+                    # Max speed: still let other clients and the HTTP side run
+                    await asyncio.sleep(0)
+                if iteration:
+                    data = _shift_times(data, iteration * duration_ms)
+                payload = {"stream": target, "data": data} if combined else data
+                await ws.send(json.dumps(payload, separators=(",", ":")))
+                sent += 1
+            iteration += 1
+            if not self.loop or sent == sent_before:
+                break
+        print(f"📤 Replayed {sent:,} frames")
+        # Keep the socket open like the real stream; the client decides when to leave
+        await ws.wait_closed()
+
+    def make_http_handler(self):
+        recording = self.recording
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != "/fapi/v1/klines":
+                    self.send_error(404)
+                    return
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                rows = recording.klines.get(query.get("symbol", "BTCUSDT"), [])
+                if "startTime" in query:
+                    rows = [r for r in rows if r[0] >= int(query["startTime"])]
+                if "endTime" in query:
+                    rows = [r for r in rows if r[0] <= int(query["endTime"])]
+                limit = int(query.get("limit", 500))
+                rows = rows[:limit] if "startTime" in query else rows[-limit:]
+
+                body = json.dumps(rows).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-MBX-USED-WEIGHT-1M", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    async def serve_forever(self):
+        from websockets.asyncio.server import serve
+
+        http = ThreadingHTTPServer((self.host, self.http_port), self.make_http_handler())
+        threading.Thread(target=http.serve_forever, daemon=True, name="ReplayHTTP").start()
+        async with serve(self.handle_ws, self.host, self.ws_port, max_size=None):
+            print(f"🛰️ Replaying {len(self.recording.frames):,} frames at "
+                  f"{'max' if self.speed <= 0 else f'{self.speed:g}x'} speed")
+            print(f"   BINANCE_WS_URL=ws://{self.host}:{self.ws_port}")
+            print(f"   BINANCE_REST_URL=http://{self.host}:{self.http_port}")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record Binance traffic or replay it locally")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="capture live frames and REST klines")
+    rec.add_argument("--symbols", default="BTCUSDT")
+    rec.add_argument("--duration", type=float, default=300, help="seconds of WebSocket traffic")
+    rec.add_argument("--all-liquidations", action="store_true")
+    rec.add_argument("-o", "--output", default="recording.jsonl.gz")
+
+    srv = sub.add_parser("serve", help="replay a recording as a local WebSocket/HTTP server")
+    srv.add_argument("recording", nargs="?", help="file from 'record' (omit for synthetic-only)")
+    srv.add_argument("--speed", type=float, default=1.0, help="timeline multiplier, 0 = max speed")
+    srv.add_argument("--loop", action="store_true", help="restart the timeline with shifted timestamps")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--ws-port", type=int, default=9443)
+    srv.add_argument("--http-port", type=int, default=9080)
+    srv.add_argument("--cascade-count", type=int, default=0, help="synthetic liquidations to inject")
+    srv.add_argument("--cascade-seconds", type=float, default=10)
+    srv.add_argument("--cascade-at", type=float, default=5, help="seconds into the timeline")
+    srv.add_argument("--cascade-symbol", default="BTCUSDT")
+    srv.add_argument("--cascade-side", choices=("SELL", "BUY"), default="SELL")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+        record(symbols, args.duration, args.output, args.all_liquidations)
+        return
+
+    recording = Recording.load(args.recording) if args.recording else Recording()
+    if args.cascade_count:
+        recording.add_cascade(args.cascade_symbol, args.cascade_count, args.cascade_seconds,
+                              args.cascade_at, recording.last_price(args.cascade_symbol),
+                              args.cascade_side)
+    server = ReplayServer(recording, args.speed, args.loop, args.host, args.ws_port, args.http_port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n🛑 Replay server stopped")
+
+
+if __name__ == "__main__":
+    main()
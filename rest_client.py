@@ -0,0 +1,188 @@
+"""
+REST Client - shared keep-alive session for Binance futures REST calls
+One pooled requests.Session per base URL, so repeated calls reuse TCP/TLS
+connections. Failed calls are retried with jittered exponential backoff:
+429 (rate limited) and 418 (IP banned) honour ``Retry-After`` and pause every
+caller, not just the one that hit the limit. Request weight is tracked
+locally and corrected from the ``X-MBX-USED-WEIGHT-1M`` response header, and
+calls wait before the budget would be exceeded instead of after a 429.
+"""
+
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import BINANCE_REST_URL
+
+# Binance futures request weight limit per minute (per IP)
+WEIGHT_PER_MINUTE = 2400
+# Stay well below the exchange limit; other processes may share the IP
+WEIGHT_BUDGET = WEIGHT_PER_MINUTE // 2
+# Connections kept alive per host (backfill runs up to this many workers)
+POOL_SIZE = 8
+TIMEOUT_SECONDS = 10
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+RETRY_STATUSES = {418, 429, 500, 502, 503, 504}
+
+
+def kline_request_weight(limit):
+    """Request weight of /fapi/v1/klines for a given limit"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(response):
+    """Seconds from a ``Retry-After`` header, or None"""
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return None
+
+
+class WeightTracker:
+    """Request weight spent in the current minute, shared by every caller of a client.
+
+    The local estimate is a sliding one-minute window of weights acquired here.
+    Binance counts per calendar minute across the whole IP and reports the total
+    in ``X-MBX-USED-WEIGHT-1M``; when that is higher it wins until the minute ends.
+    """
+
+    def __init__(self, budget=WEIGHT_BUDGET, window=60.0):
+        self.budget = budget
+        self.window = window
+        self._spent = []  # (monotonic time, weight)
+        self._reported = None  # (wall-clock minute, weight used, monotonic time of the report)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _used(self, now):
+        self._spent = [(t, w) for t, w in self._spent if now - t < self.window]
+        used = sum(w for _, w in self._spent)
+        if self._reported and self._reported[0] == int(time.time() // 60):
+            minute, reported, seen = self._reported
+            used = max(used, reported + sum(w for t, w in self._spent if t > seen))
+        return used
+
+    def used(self):
+        with self._lock:
+            return self._used(time.monotonic())
+
+    def acquire(self, weight):
+        """Block until ``weight`` fits the budget (and any rate-limit pause is over), then spend it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    used = self._used(now)
+                    if used + weight <= self.budget or not used:
+                        self._spent.append((now, weight))
+                        return
+                    # Whichever frees weight first: the server's minute rolling over
+                    # or the oldest local entry leaving the window
+                    wait = 60 - time.time() % 60
+                    if self._spent:
+                        wait = min(wait, self.window - (now - self._spent[0][0]))
+            time.sleep(max(wait, 0.05))
+
+    def update(self, headers):
+        """Record the IP's used weight from a response's headers"""
+        value = headers.get("X-MBX-USED-WEIGHT-1M") or headers.get("X-MBX-USED-WEIGHT")
+        if value is None:
+            return
+        try:
+            reported = int(value)
+        except ValueError:
+            return
+        with self._lock:
+            self._reported = (int(time.time() // 60), reported, time.monotonic())
+
+    def pause(self, seconds):
+        """Hold every caller for ``seconds`` (after a 429/418)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RestClient:
+    """Pooled, retrying, weight-aware GET client for one Binance REST base URL; thread-safe"""
+
+    def __init__(self, base_url=BINANCE_REST_URL, pool_size=POOL_SIZE, max_retries=MAX_RETRIES,
+                 timeout=TIMEOUT_SECONDS, tracker=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.tracker = tracker or WeightTracker()
+        self.session = requests.Session()
+        # Retries are handled below (they need Retry-After and the weight tracker)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path, params=None, weight=1):
+        """GET ``path`` and return the response, retrying transient failures; raises on final failure"""
+        for attempt in range(self.max_retries + 1):
+            self.tracker.acquire(weight)
+            try:
+                response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                print(f"⚠️ {path} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            self.tracker.update(response.headers)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = retry_after(response)
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                if response.status_code in (418, 429):
+                    # The limit is per IP: everyone sharing this client waits
+                    self.tracker.pause(delay)
+                print(f"⚠️ {path} returned {response.status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response
+
+    def klines(self, symbol, interval="1m", limit=500, start_ms=None, end_ms=None):
+        """Raw /fapi/v1/klines rows"""
+        params = {"symbol": symbol, "interval": interval, "limit": limit}
+        if start_ms is not None:
+            params["startTime"] = start_ms
+        if end_ms is not None:
+            params["endTime"] = end_ms
+        return self.get("/fapi/v1/klines", params, weight=kline_request_weight(limit)).json()
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=BINANCE_REST_URL):
+    """The process-wide client for ``base_url`` (shares its connections and weight budget)"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = RestClient(base_url)
+        return client
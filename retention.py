@@ -0,0 +1,330 @@
+"""
+Retention - rolling deletion of expired rows and off-peak space reclamation
+Run: python retention.py [--db btc_data.db] [--policy "liquidations=90d"] [--dry-run] [--reclaim]
+
+Policy rules are comma-separated ``table[:SYMBOL]=<age>`` with the age in days
+(``90d`` or ``90``) or hours (``12h``); a symbol rule overrides its table rule:
+
+    liquidations=90d,liquidations:ETHUSDT=30d,klines=365d
+
+Expired rows are deleted per symbol in chunks sized to stay under
+``max_lock_seconds`` each, with a pause between them so the collector's writer
+keeps getting the lock. Archived Parquet days past the cutoff are removed too.
+
+Freed pages go back to the OS with ``PRAGMA incremental_vacuum`` followed by
+``wal_checkpoint(TRUNCATE)``; the collector does this inside MAINTENANCE_HOURS.
+Incremental vacuum needs auto_vacuum=INCREMENTAL, which an existing database
+only gets from a one-time full rewrite: stop the collector and run
+``python retention.py --enable-incremental`` (needs about the database's size
+in free disk).
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import archive
+import config
+import liveness
+from storage import connect_writer
+
+DB_PATH = config.DB_PATH
+
+# table -> time column; every table is indexed on (symbol, time) or small
+TABLES = {
+    "klines": "timestamp",
+    "liquidations": "timestamp",
+    "kline_rollups": "bucket",
+    "liquidation_heatmap": "bucket",
+}
+
+UNITS_MS = {"d": 86_400_000, "h": 3_600_000}
+
+
+def parse_policy(spec):
+    """"table[:SYMBOL]=<age>,..." -> {(table, symbol or None): max age in ms}"""
+    policy = {}
+    for rule in filter(None, (part.strip() for part in (spec or "").split(","))):
+        try:
+            target, age = (part.strip() for part in rule.split("="))
+            table, _, symbol = target.partition(":")
+            unit = age[-1].lower() if age[-1].isalpha() else "d"
+            age_ms = int(float(age.rstrip("dDhH")) * UNITS_MS[unit])
+        except (ValueError, KeyError, IndexError):
+            raise ValueError(f"bad retention rule {rule!r}, expected table[:SYMBOL]=<N>d|h")
+        if table not in TABLES:
+            raise ValueError(f"unknown retention table {table!r} (one of {', '.join(TABLES)})")
+        policy[(table, symbol.upper() or None)] = age_ms
+    return policy
+
+
+def _symbols(conn, table):
+    """Distinct symbols in ``table`` (one index seek each) plus those only in the archive"""
+    symbols = set()
+    symbol = ""
+    while True:
+        symbol = conn.execute(f"SELECT MIN(symbol) FROM {table} WHERE symbol > ?", (symbol,)).fetchone()[0]
+        if symbol is None:
+            break
+        symbols.add(symbol)
+    if table in archive.TABLES:
+        symbols.update(archive.archived_symbols(conn, table))
+    return sorted(symbols)
+
+
+def cutoff_for(policy, table, symbol, now_ms=None):
+    """Cutoff ms for ``symbol``'s rows in ``table`` (older rows expire), or None if kept forever"""
+    age = policy.get((table, symbol), policy.get((table, None)))
+    if age is None:
+        return None
+    return (now_ms if now_ms is not None else int(time.time() * 1000)) - age
+
+
+def cutoffs(conn, policy, now_ms=None):
+    """[(table, symbol, cutoff ms), ...] for every symbol a rule applies to"""
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    result = []
+    for table in TABLES:
+        if not any(rule_table == table for rule_table, _ in policy):
+            continue
+        for symbol in _symbols(conn, table):
+            cutoff_ms = cutoff_for(policy, table, symbol, now_ms)
+            if cutoff_ms is not None:
+                result.append((table, symbol, cutoff_ms))
+    return result
+
+
+def delete_expired(conn, table, symbol, cutoff_ms, max_lock_seconds=0.1, pause_seconds=0.05,
+                   batch_rows=1000):
+    """Delete rows of ``symbol`` older than ``cutoff_ms`` in time-bounded chunks; returns rows deleted"""
+    time_column = TABLES[table]
+    deleted = 0
+    while True:
+        start = time.perf_counter()
+        # Each chunk is a (symbol, time) range ending at the batch_rows-th expired row
+        bound = conn.execute(f"""
+            SELECT {time_column} FROM {table} WHERE symbol = ? AND {time_column} < ?
+            ORDER BY {time_column} LIMIT 1 OFFSET ?
+        """, (symbol, cutoff_ms, batch_rows - 1)).fetchone()
+        last_chunk = bound is None
+        # total_changes also counts rows removed through the compact schema's views
+        changes = conn.total_changes
+        if last_chunk:
+            conn.execute(f"DELETE FROM {table} WHERE symbol = ? AND {time_column} < ?", (symbol, cutoff_ms))
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE symbol = ? AND {time_column} <= ?", (symbol, bound[0]))
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        deleted += conn.total_changes - changes
+        if last_chunk:
+            return deleted
+
+        if elapsed > max_lock_seconds:
+            batch_rows = max(100, batch_rows // 2)
+        elif elapsed < max_lock_seconds / 4:
+            batch_rows = min(batch_rows * 2, 50_000)
+        time.sleep(pause_seconds)
+
+
+def _expired_days(conn, table, symbol, cutoff_ms):
+    """[(day, rows, path), ...] of archived days that ended before ``cutoff_ms``"""
+    try:
+        return conn.execute("""
+            SELECT day, rows, path FROM archive_log
+            WHERE table_name = ? AND symbol = ? AND day + ? <= ?
+        """, (table, symbol, archive.DAY_MS, cutoff_ms)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def _expired_archive(conn, table, symbol, cutoff_ms, archive_dir=archive.ARCHIVE_DIR):
+    """(rows, bytes) that expire_archive would remove, without removing anything"""
+    rows = size = 0
+    for _, day_rows, path in _expired_days(conn, table, symbol, cutoff_ms):
+        full_path = os.path.join(archive_dir, path)
+        if os.path.exists(full_path):
+            size += os.path.getsize(full_path)
+        rows += day_rows
+    return rows, size
+
+
+def expire_archive(conn, table, symbol, cutoff_ms, archive_dir=archive.ARCHIVE_DIR):
+    """Remove archived days that ended before ``cutoff_ms``; returns (rows, bytes) removed"""
+    rows = size = 0
+    for day, day_rows, path in _expired_days(conn, table, symbol, cutoff_ms):
+        full_path = os.path.join(archive_dir, path)
+        # The log row goes first so a reader never looks for a deleted file
+        conn.execute("DELETE FROM archive_log WHERE table_name = ? AND symbol = ? AND day = ?",
+                     (table, symbol, day))
+        conn.commit()
+        try:
+            size += os.path.getsize(full_path)
+            os.remove(full_path)
+        except FileNotFoundError:
+            pass
+        rows += day_rows
+    return rows, size
+
+
+def apply_retention(conn, policy, now_ms=None, archive_dir=archive.ARCHIVE_DIR, dry_run=False,
+                    verbose=True, **chunk_options):
+    """Apply ``policy``; returns {table: {"rows", "archived_rows", "archive_bytes", "seconds"}}"""
+    stats = {}
+    for table, symbol, cutoff_ms in cutoffs(conn, policy, now_ms):
+        start = time.perf_counter()
+        entry = stats.setdefault(table, {"rows": 0, "archived_rows": 0, "archive_bytes": 0, "seconds": 0.0})
+        if dry_run:
+            time_column = TABLES[table]
+            rows = conn.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE symbol = ? AND {time_column} < ?", (symbol, cutoff_ms)
+            ).fetchone()[0]
+            archived_rows, archive_bytes = (
+                _expired_archive(conn, table, symbol, cutoff_ms, archive_dir) if table in archive.TABLES else (0, 0)
+            )
+        else:
+            rows = delete_expired(conn, table, symbol, cutoff_ms, **chunk_options)
+            archived_rows, archive_bytes = (
+                expire_archive(conn, table, symbol, cutoff_ms, archive_dir) if table in archive.TABLES else (0, 0)
+            )
+        elapsed = time.perf_counter() - start
+        entry["rows"] += rows
+        entry["archived_rows"] += archived_rows
+        entry["archive_bytes"] += archive_bytes
+        entry["seconds"] += elapsed
+        if verbose and (rows or archived_rows):
+            cutoff = datetime.fromtimestamp(cutoff_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+            action = "would delete" if dry_run else "deleted"
+            print(f"🧹 {table} {symbol} before {cutoff}: {action} {rows:,} rows"
+                  + (f" + {archived_rows:,} archived" if archived_rows else "") + f" in {elapsed:.2f} s")
+    return stats
+
+
+def _file_bytes(db_path):
+    return sum(os.path.getsize(path) for path in (db_path, f"{db_path}-wal") if os.path.exists(path))
+
+
+def enable_incremental(conn):
+    """Switch to auto_vacuum=INCREMENTAL with a full VACUUM (rewrites the file; run offline).
+
+    Returns the seconds the rewrite took, 0.0 when nothing needed doing.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return 0.0
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    start = time.perf_counter()
+    conn.execute("VACUUM")
+    return time.perf_counter() - start
+
+
+def reclaim(conn, db_path, max_seconds=2.0, pages_per_step=256):
+    """Return free pages to the OS and truncate the WAL.
+
+    Returns {"freed_pages", "page_bytes", "bytes_reclaimed", "vacuum_seconds", "checkpoint_seconds",
+    "free_pages_left"}; bytes_reclaimed is the drop in database + WAL file size.
+    """
+    before = _file_bytes(db_path)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    start = time.perf_counter()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        print("⚠️ auto_vacuum is not INCREMENTAL, skipping incremental vacuum; "
+              "stop the collector and run python retention.py --enable-incremental")
+    else:
+        # Each step is its own short write transaction, bounded by the time budget
+        while time.perf_counter() - start < max_seconds:
+            if not conn.execute("PRAGMA freelist_count").fetchone()[0]:
+                break
+            # The pragma frees pages as its rows are stepped through
+            conn.execute(f"PRAGMA incremental_vacuum({pages_per_step})").fetchall()
+            conn.commit()
+    vacuum_seconds = time.perf_counter() - start
+    free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    start = time.perf_counter()
+    busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+    checkpoint_seconds = time.perf_counter() - start
+    if busy:
+        print("⚠️ WAL checkpoint could not finish (readers or writer busy); retrying next run")
+
+    return {
+        "freed_pages": free_before - free_after,
+        "bytes_reclaimed": max(before - _file_bytes(db_path), 0),
+        "page_bytes": (free_before - free_after) * page_size,
+        "vacuum_seconds": vacuum_seconds,
+        "checkpoint_seconds": checkpoint_seconds,
+        "free_pages_left": free_after,
+    }
+
+
+def parse_hours(spec):
+    """"2-5" -> (2, 5): UTC hours [start, end), wrapping past midnight; empty -> None (any time)"""
+    if not (spec or "").strip():
+        return None
+    start, _, end = spec.partition("-")
+    return int(start) % 24, int(end or int(start) + 1) % 24
+
+
+def off_peak(hours, now=None):
+    """Whether ``now`` (UTC) falls inside the ``parse_hours`` window"""
+    if hours is None:
+        return True
+    hour = (now or datetime.now(timezone.utc)).hour
+    start, end = hours
+    return start <= hour < end if start < end else hour >= start or hour < end
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete expired rows and reclaim free space")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--policy", default=config.RETENTION,
+                        help='rules like "liquidations=90d,liquidations:ETHUSDT=30d" (default: RETENTION)')
+    parser.add_argument("--archive-dir", default=config.ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    parser.add_argument("--reclaim", action="store_true",
+                        help="run incremental vacuum and truncate the WAL afterwards")
+    parser.add_argument("--enable-incremental", action="store_true",
+                        help="one-time full VACUUM switching to auto_vacuum=INCREMENTAL (collector stopped)")
+    args = parser.parse_args()
+
+    if args.enable_incremental:
+        if liveness.lock_held(args.db):
+            parser.error("a collector is running on this database; stop it first")
+        conn = connect_writer(args.db)
+        try:
+            size = _file_bytes(args.db)
+            seconds = enable_incremental(conn)
+        finally:
+            conn.close()
+        if seconds:
+            print(f"✅ Rewrote {size / 1024 / 1024:.1f} MB with auto_vacuum=INCREMENTAL in {seconds:.1f} s")
+        else:
+            print("ℹ️ auto_vacuum is already INCREMENTAL")
+        return
+
+    try:
+        policy = parse_policy(args.policy)
+    except ValueError as e:
+        parser.error(str(e))
+    conn = connect_writer(args.db)
+    try:
+        if policy:
+            stats = apply_retention(conn, policy, archive_dir=args.archive_dir, dry_run=args.dry_run)
+            total = sum(entry["rows"] for entry in stats.values())
+            print(f"✅ {'Would delete' if args.dry_run else 'Deleted'} {total:,} expired rows")
+        else:
+            print("ℹ️ No retention policy set (--policy or RETENTION)")
+        if args.reclaim and not args.dry_run:
+            result = reclaim(conn, args.db, max_seconds=float("inf"))
+            print(f"♻️ Reclaimed {result['bytes_reclaimed'] / 1024 / 1024:.1f} MB "
+                  f"({result['freed_pages']:,} pages) in "
+                  f"{result['vacuum_seconds'] + result['checkpoint_seconds']:.2f} s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Kline Rollups - pre-aggregated OHLCV + liquidation buckets for higher timeframes
+Rebuild: python rollups.py [--db btc_data.db] [--symbol BTCUSDT]
+
+Each timeframe is built from the one below it (5m from closed 1m klines and raw
+liquidations, 15m from 5m, ... 1d from 4h), so refreshing a bucket only touches
+a handful of child rows. Refreshes recompute buckets from their source rows,
+which keeps them idempotent when a candle is written more than once.
+"""
+
+import argparse
+import time
+
+import config
+
+DB_PATH = config.DB_PATH
+
+MINUTE_MS = 60_000
+
+# interval -> bucket width in ms, smallest first; each one rolls up the previous
+TIMEFRAMES = {
+    "1m": MINUTE_MS,
+    "5m": 5 * MINUTE_MS,
+    "15m": 15 * MINUTE_MS,
+    "1h": 60 * MINUTE_MS,
+    "4h": 240 * MINUTE_MS,
+    "1d": 1440 * MINUTE_MS,
+}
+ROLLUP_INTERVALS = list(TIMEFRAMES)[1:]
+
+# Liquidations can land a moment after their minute's candle closed; refreshing
+# the previous minute's buckets too picks those up on the next close
+LATE_LIQUIDATION_MS = MINUTE_MS
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS kline_rollups (
+        interval TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        volume REAL NOT NULL,
+        candles INTEGER NOT NULL,
+        long_liq_count INTEGER NOT NULL DEFAULT 0,
+        long_liq_notional REAL NOT NULL DEFAULT 0,
+        short_liq_count INTEGER NOT NULL DEFAULT 0,
+        short_liq_notional REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (interval, symbol, bucket)
+    ) WITHOUT ROWID
+"""
+
+_COLUMNS = """interval, symbol, bucket, open, high, low, close, volume, candles,
+              long_liq_count, long_liq_notional, short_liq_count, short_liq_notional"""
+
+# 5m buckets from closed 1m klines; long liquidations are SELL orders
+_FROM_KLINES = f"""
+    INSERT OR REPLACE INTO kline_rollups ({_COLUMNS})
+    SELECT :interval, g.symbol, g.bucket, o.open, g.high, g.low, c.close, g.volume, g.candles,
+           COALESCE(l.long_count, 0), COALESCE(l.long_notional, 0),
+           COALESCE(l.short_count, 0), COALESCE(l.short_notional, 0)
+    FROM (
+        SELECT symbol, timestamp / :width * :width AS bucket,
+               MIN(timestamp) AS first_ts, MAX(timestamp) AS last_ts,
+               MAX(high) AS high, MIN(low) AS low, SUM(volume) AS volume, COUNT(*) AS candles
+        FROM klines
+        WHERE symbol = :symbol AND is_closed = 1 AND timestamp >= :lo AND timestamp < :hi
+        GROUP BY bucket
+    ) g
+    JOIN klines o ON o.symbol = g.symbol AND o.timestamp = g.first_ts
+    JOIN klines c ON c.symbol = g.symbol AND c.timestamp = g.last_ts
+    LEFT JOIN (
+        SELECT timestamp / :width * :width AS bucket,
+               SUM(side = 'SELL') AS long_count,
+               SUM(CASE WHEN side = 'SELL' THEN amount ELSE 0 END) AS long_notional,
+               SUM(side = 'BUY') AS short_count,
+               SUM(CASE WHEN side = 'BUY' THEN amount ELSE 0 END) AS short_notional
+        FROM liquidations
+        WHERE symbol = :symbol AND timestamp >= :lo AND timestamp < :hi
+        GROUP BY bucket
+    ) l ON l.bucket = g.bucket
+"""
+
+# Every higher bucket from the rollup one level down
+_FROM_CHILD = f"""
+    INSERT OR REPLACE INTO kline_rollups ({_COLUMNS})
+    SELECT :interval, g.symbol, g.bucket, o.open, g.high, g.low, c.close, g.volume, g.candles,
+           g.long_count, g.long_notional, g.short_count, g.short_notional
+    FROM (
+        SELECT symbol, bucket / :width * :width AS bucket,
+               MIN(bucket) AS first_bucket, MAX(bucket) AS last_bucket,
+               MAX(high) AS high, MIN(low) AS low, SUM(volume) AS volume, SUM(candles) AS candles,
+               SUM(long_liq_count) AS long_count, SUM(long_liq_notional) AS long_notional,
+               SUM(short_liq_count) AS short_count, SUM(short_liq_notional) AS short_notional
+        FROM kline_rollups
+        WHERE interval = :child AND symbol = :symbol AND bucket >= :lo AND bucket < :hi
+        GROUP BY 2
+    ) g
+    JOIN kline_rollups o ON o.interval = :child AND o.symbol = g.symbol AND o.bucket = g.first_bucket
+    JOIN kline_rollups c ON c.interval = :child AND c.symbol = g.symbol AND c.bucket = g.last_bucket
+"""
+
+
+def refresh_range(cursor, symbol, start_ms, end_ms):
+    """Recompute every rollup bucket overlapping [start_ms, end_ms] for one symbol.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    child = None
+    for interval in ROLLUP_INTERVALS:
+        width = TIMEFRAMES[interval]
+        lo = start_ms // width * width
+        hi = end_ms // width * width + width
+        params = {"interval": interval, "width": width, "symbol": symbol, "lo": lo, "hi": hi}
+        if child is None:
+            cursor.execute(_FROM_KLINES, params)
+        else:
+            cursor.execute(_FROM_CHILD, dict(params, child=child))
+        child = interval
+
+
+def closed_spans(closed):
+    """[(symbol, lo, hi), ...] ranges to refresh for newly closed 1m candles ``[(symbol, timestamp), ...]``"""
+    # Group by symbol and day so a backfill batch spanning days doesn't
+    # recompute every bucket between far-apart candles
+    spans = {}
+    for symbol, timestamp in closed:
+        key = (symbol, timestamp // TIMEFRAMES["1d"])
+        lo, hi = spans.get(key, (timestamp, timestamp))
+        spans[key] = (min(lo, timestamp), max(hi, timestamp))
+    return [(symbol, lo - LATE_LIQUIDATION_MS, hi) for (symbol, _), (lo, hi) in spans.items()]
+
+
+def refresh_closed(cursor, closed):
+    """Refresh the buckets touched by newly closed 1m candles"""
+    for symbol, lo, hi in closed_spans(closed):
+        refresh_range(cursor, symbol, lo, hi)
+
+
+def rebuild(conn, symbol=None, chunk_ms=TIMEFRAMES["1d"], pause_seconds=0.0, verbose=True):
+    """Recompute all rollups from the klines table, one day per transaction"""
+    symbols = [symbol] if symbol else [row[0] for row in conn.execute("SELECT DISTINCT symbol FROM klines")]
+    for sym in symbols:
+        first, last = conn.execute(
+            "SELECT MIN(timestamp), MAX(timestamp) FROM klines WHERE symbol = ?", (sym,)
+        ).fetchone()
+        if first is None:
+            continue
+        start = time.perf_counter()
+        chunk_start = first // chunk_ms * chunk_ms
+        while chunk_start <= last:
+            cursor = conn.cursor()
+            refresh_range(cursor, sym, chunk_start, chunk_start + chunk_ms - 1)
+            conn.commit()
+            chunk_start += chunk_ms
+            if pause_seconds:
+                time.sleep(pause_seconds)
+        if verbose:
+            print(f"  ↳ rebuilt rollups for {sym} in {time.perf_counter() - start:.1f} s")
+
+
+def main():
+    from storage import connect_writer
+
+    parser = argparse.ArgumentParser(description="Rebuild kline rollups from 1m klines")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--symbol", help="only this symbol (default: all)")
+    args = parser.parse_args()
+
+    conn = connect_writer(args.db)
+    try:
+        conn.execute(CREATE_TABLE)
+        rebuild(conn, args.symbol)
+    finally:
+        conn.close()
+    print("✅ Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    main()
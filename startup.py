@@ -16,9 +16,8 @@ def run_data_collector():
     print("🚀 Starting data collector...")
     try:
         # Run data_collector.py with Popen to avoid blocking
-        process = subprocess.Popen([sys.executable, "data_collector.py"], 
-                                 stdout=subprocess.PIPE, 
-                                 stderr=subprocess.PIPE)
+        # Output is inherited: an unread PIPE fills up and stalls the collector
+        process = subprocess.Popen([sys.executable, "data_collector.py"])
         # Keep the process running
         process.wait()
     except Exception as e:
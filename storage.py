@@ -0,0 +1,92 @@
+"""
+Storage Layer - SQLite connection setup shared by the collector and dashboard
+The collector owns the writer connection (WAL mode); the dashboard reads through
+a small pool of read-only connections that is reused across Streamlit reruns.
+"""
+
+import queue
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+# Page cache size per connection in KiB (negative value = KiB for SQLite)
+CACHE_SIZE_KIB = 32 * 1024
+# Map up to 256 MiB of the database file instead of read() syscalls
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+# How long a connection waits on a lock before raising "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+
+def _apply_common_pragmas(conn):
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def connect_writer(db_path):
+    """Open the collector's write connection with WAL and tuned pragmas"""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # WAL is persistent in the file: readers no longer block the writer and vice versa
+    conn.execute("PRAGMA journal_mode = WAL")
+    # NORMAL is durable across application crashes in WAL mode; only an OS crash
+    # can lose the last few committed transactions, which the backfill recovers
+    conn.execute("PRAGMA synchronous = NORMAL")
+    _apply_common_pragmas(conn)
+    return conn
+
+
+def connect_readonly(db_path):
+    """Open a read-only connection (mode=ro URI) for dashboard queries"""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conn.execute("PRAGMA query_only = ON")
+    _apply_common_pragmas(conn)
+    return conn
+
+
+class ReadOnlyPool:
+    """Fixed-size pool of read-only connections, safe to share between threads.
+
+    Connections are created lazily; a connection is only ever used by one
+    thread at a time.
+    """
+
+    def __init__(self, db_path, size=4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(None)
+
+    @contextmanager
+    def connection(self, timeout=10):
+        self._slots.get(timeout=timeout)
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = connect_readonly(self.db_path)
+        except Exception:
+            self._slots.put(None)
+            raise
+
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            # Don't return a connection in an unknown state to the pool
+            conn.close()
+            conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.put(None)
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,70 @@
+"""
+Combined Streams - builds, shards and demultiplexes Binance combined streams
+One connection carries many streams: /stream?streams=a@forceOrder/b@kline_1m/...
+Every frame arrives wrapped as {"stream": "<name>", "data": {...}}.
+"""
+
+from config import BINANCE_WS_URL
+
+# Binance USD-M futures accepts up to 200 streams per combined connection
+MAX_STREAMS_PER_CONNECTION = 200
+
+ALL_LIQUIDATIONS_STREAM = "!forceOrder@arr"
+
+
+def stream_names(symbols, kline_interval="1m", all_liquidations=False):
+    """Stream names for a symbol list: klines per symbol, liquidations per symbol or market-wide"""
+    names = []
+    if all_liquidations:
+        names.append(ALL_LIQUIDATIONS_STREAM)
+    else:
+        names.extend(f"{symbol.lower()}@forceOrder" for symbol in symbols)
+    names.extend(f"{symbol.lower()}@kline_{kline_interval}" for symbol in symbols)
+    return names
+
+
+def shard_streams(names, max_per_connection=MAX_STREAMS_PER_CONNECTION):
+    """Split stream names into per-connection groups"""
+    return [names[i:i + max_per_connection] for i in range(0, len(names), max_per_connection)]
+
+
+def combined_url(names, base_url=BINANCE_WS_URL):
+    return f"{base_url}/stream?streams={'/'.join(names)}"
+
+
+def stream_kind(name):
+    """'kline' or 'forceOrder' for a stream name (None if unknown)"""
+    if name == ALL_LIQUIDATIONS_STREAM or name.endswith("@forceOrder"):
+        return "forceOrder"
+    if "@kline_" in name:
+        return "kline"
+    return None
+
+
+def stream_name(message):
+    """Stream name of a raw combined frame without decoding it (None if not found).
+
+    Binance always sends ``{"stream":"<name>","data":...}`` with the name first.
+    """
+    prefix = '{"stream":"'
+    if isinstance(message, str) and message.startswith(prefix):
+        end = message.find('"', len(prefix))
+        if end > 0:
+            return message[len(prefix):end]
+    return None
+
+
+def demultiplex(message, handlers, decoder):
+    """Route one combined-stream frame to ``handlers[kind](event)``.
+
+    ``handlers`` maps 'kline' / 'forceOrder' to callables that take a decoded
+    event (see decoders.py). Returns the stream kind, or None if not routed.
+    """
+    kind, events = decoder.decode_combined(message)
+    handler = handlers.get(kind)
+    if handler is None:
+        return None
+    # !forceOrder@arr may deliver several events in one frame
+    for event in events:
+        handler(event)
+    return kind